@@ -0,0 +1,139 @@
+"""In-memory stand-in for the parts of `minio.Minio` the private service uses.
+
+Calls arrive from `StorageExecutor` worker threads, so every access to the store holds a lock.
+`latency` adds a fixed sleep per call to mimic a network round trip.
+"""
+import datetime
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+from typing import Iterator, Optional
+from minio.deleteobjects import DeleteError, DeleteObject
+from minio.error import S3Error
+
+
+@dataclass
+class FakeObject:
+    object_name: str
+    data: bytes
+    content_type: str
+    last_modified: datetime.datetime
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+    @property
+    def etag(self) -> str:
+        return hashlib.md5(self.data).hexdigest()
+
+
+class FakeResponse:
+    def __init__(self, data: bytes):
+        self._data = data
+
+    def read(self) -> bytes:
+        return self._data
+
+    def stream(self, chunk_size: int) -> Iterator[bytes]:
+        for start in range(0, len(self._data), chunk_size):
+            yield self._data[start:start + chunk_size]
+
+    def close(self):
+        pass
+
+    def release_conn(self):
+        pass
+
+
+class FakeMinio:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self._lock = threading.Lock()
+        self._buckets: dict[str, dict[str, FakeObject]] = {}
+
+    def _wait(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _bucket(self, bucket_name: str) -> dict[str, FakeObject]:
+        if bucket_name not in self._buckets:
+            raise S3Error("NoSuchBucket", "Bucket does not exist", bucket_name, "", "", None)
+        return self._buckets[bucket_name]
+
+    def _object(self, bucket_name: str, object_name: str) -> FakeObject:
+        stored_object = self._bucket(bucket_name).get(object_name)
+        if stored_object is None:
+            raise S3Error("NoSuchKey", "Object does not exist", object_name, "", "", None)
+        return stored_object
+
+    def bucket_exists(self, bucket_name: str) -> bool:
+        with self._lock:
+            return bucket_name in self._buckets
+
+    def make_bucket(self, bucket_name: str):
+        with self._lock:
+            self._buckets.setdefault(bucket_name, {})
+
+    def remove_bucket(self, bucket_name: str):
+        with self._lock:
+            self._buckets.pop(bucket_name, None)
+
+    def put_object(self, bucket_name: str, object_name: str, data, length: int, content_type: str = None,
+                   part_size: int = 10 * 1024 * 1024, **kwargs):
+        self._wait()
+        if length >= 0:
+            payload = data.read(length)
+        else:
+            parts = []
+            while chunk := data.read(part_size):
+                parts.append(chunk)
+            payload = b"".join(parts)
+
+        with self._lock:
+            self._bucket(bucket_name)[object_name] = FakeObject(
+                object_name=object_name,
+                data=payload,
+                content_type=content_type or "application/octet-stream",
+                last_modified=datetime.datetime.now(datetime.timezone.utc)
+            )
+
+    def get_object(self, bucket_name: str, object_name: str, offset: int = 0, length: int = 0, **kwargs):
+        self._wait()
+        with self._lock:
+            data = self._object(bucket_name, object_name).data
+        return FakeResponse(data[offset:offset + length] if length else data[offset:])
+
+    def stat_object(self, bucket_name: str, object_name: str, **kwargs) -> FakeObject:
+        self._wait()
+        with self._lock:
+            return self._object(bucket_name, object_name)
+
+    def remove_object(self, bucket_name: str, object_name: str, **kwargs):
+        self._wait()
+        with self._lock:
+            self._bucket(bucket_name).pop(object_name, None)
+
+    def remove_objects(self, bucket_name: str, delete_object_list, **kwargs) -> Iterator[DeleteError]:
+        # Lazy like the real client: nothing is deleted until the result is iterated
+        self._wait()
+        objects: list[DeleteObject] = list(delete_object_list)
+        with self._lock:
+            bucket = self._bucket(bucket_name)
+            for delete_object in objects:
+                bucket.pop(delete_object._name, None)
+        yield from ()
+
+    def list_objects(self, bucket_name: str, recursive: bool = False, start_after: Optional[str] = None,
+                     **kwargs) -> Iterator[FakeObject]:
+        self._wait()
+        with self._lock:
+            objects = sorted(self._bucket(bucket_name).values(), key=lambda stored_object: stored_object.object_name)
+        return iter([obj for obj in objects if start_after is None or obj.object_name > start_after])
+
+    def presigned_get_object(self, bucket_name: str, object_name: str, expires=None, **kwargs) -> str:
+        return f"http://fake-minio/{bucket_name}/{object_name}?X-Amz-Signature={'0' * 64}"
+
+    def presigned_put_object(self, bucket_name: str, object_name: str, expires=None, **kwargs) -> str:
+        return f"http://fake-minio/{bucket_name}/{object_name}?X-Amz-Signature={'1' * 64}&upload=1"
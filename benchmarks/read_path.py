@@ -0,0 +1,107 @@
+"""Compare the SQLAlchemy and the raw asyncpg read paths on the queries behind `GET /memes` and `GET /memes/{id}`.
+
+Run with `python -m benchmarks.read_path --db-url postgresql+asyncpg://... [--rows 1000] [--limit 100]
+[--requests 4000] [--concurrency 1,16]`. The memes tables of that database are dropped and recreated.
+
+Both paths go through `MemeRepository._fetch_page` / `_fetch_meme` with the cache bypassed, so the numbers
+only cover the database round trip and turning rows into response dicts.
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+from typing import Awaitable, Callable
+
+from benchmarks.load import percentile
+
+
+OPERATIONS = ("page", "cursor", "meme")
+
+
+async def measure(call: Callable[[], Awaitable], requests: int, concurrency: int) -> dict:
+    latencies = []
+
+    async def worker(count: int):
+        for _ in range(count):
+            started_at = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - started_at)
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(worker(requests // concurrency) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started_at
+
+    latencies.sort()
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50_us": percentile(latencies, 0.5) * 1e6,
+        "p99_us": percentile(latencies, 0.99) * 1e6
+    }
+
+
+async def main(args: argparse.Namespace):
+    # The services read their settings at import time, so they are imported once DB_URL is in place
+    os.environ["DB_URL"] = args.db_url
+    import public_api.repository
+    from sqlalchemy import insert
+    from public_api.database.config import create_tables, delete_tables, engine
+    from public_api.database.models import Memes
+    from public_api.database.readers import AsyncpgMemeReader, asyncpg_dsn
+    from public_api.repository import MemeRepository
+
+    await delete_tables()
+    await create_tables()
+    async with engine.begin() as conn:
+        await conn.execute(insert(Memes), [
+            {"meme_name": f"meme {index}", "filename": f"{index:064x}", "image_url": f"http://minio/{index:064x}",
+             "text": "when the benchmark finally runs " * 3}
+            for index in range(args.rows)
+        ])
+
+    readers = {"sqlalchemy": None, "asyncpg": AsyncpgMemeReader(asyncpg_dsn(args.db_url), 1, max(args.concurrency))}
+    rng = random.Random(0)
+    calls = {
+        "page": lambda: MemeRepository._fetch_page(rng.randrange(args.rows), args.limit, None),
+        "cursor": lambda: MemeRepository._fetch_page(0, args.limit, rng.randrange(args.rows)),
+        "meme": lambda: MemeRepository._fetch_meme(rng.randrange(1, args.rows + 1))
+    }
+
+    try:
+        results = {}
+        for path, reader in readers.items():
+            public_api.repository.meme_reader = reader
+            for operation in OPERATIONS:
+                # One untimed round so both paths start with open connections and prepared statements
+                await measure(calls[operation], max(args.concurrency), max(args.concurrency))
+                for concurrency in args.concurrency:
+                    results[path, operation, concurrency] = await measure(
+                        calls[operation], args.requests, concurrency
+                    )
+
+        print(f"{args.rows} rows, {args.limit} per page")
+        for operation in OPERATIONS:
+            for concurrency in args.concurrency:
+                old = results["sqlalchemy", operation, concurrency]
+                new = results["asyncpg", operation, concurrency]
+                print(
+                    f"{operation:>6} x{concurrency:<3} sqlalchemy: {old['rps']:8.0f} rps, p50 {old['p50_us']:7.0f}us, "
+                    f"p99 {old['p99_us']:7.0f}us | asyncpg: {new['rps']:8.0f} rps, p50 {new['p50_us']:7.0f}us, "
+                    f"p99 {new['p99_us']:7.0f}us ({new['rps'] / old['rps']:.1f}x)"
+                )
+
+    finally:
+        await readers["asyncpg"].close()
+        await delete_tables()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db-url", default=os.getenv("BENCH_DB_URL"), required=not os.getenv("BENCH_DB_URL"),
+                        help="SQLAlchemy URL of a scratch Postgres database (or set BENCH_DB_URL)")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=4000, help="calls per operation and concurrency level")
+    parser.add_argument("--concurrency", type=lambda value: [int(item) for item in value.split(",")], default=[1, 16])
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,65 @@
+"""Compare the old and the new way `GET /memes` turns a page of rows into a JSON body.
+
+Run with `python -m benchmarks.serialization [--rows 100] [--number 2000]`.
+
+old: ORM objects -> `MemeFull.from_orm` per row -> response_model validation -> `json.dumps`
+new: plain row dicts -> `orjson.dumps`
+"""
+import argparse
+import datetime
+import json
+import timeit
+
+import orjson
+from pydantic import TypeAdapter
+
+from public_api.database.models import Memes
+from public_api.schemas import MemeFull
+
+
+def make_rows(count: int) -> list[dict]:
+    now = datetime.datetime(2024, 1, 1, 12, 30, 15, 123456)
+    return [
+        {
+            "id": index,
+            "meme_name": f"meme {index}",
+            "filename": f"{index:064x}",
+            "image_url": f"http://minio:9000/memes/{index:064x}?X-Amz-Signature={'f' * 64}",
+            "text": "when the benchmark finally runs " * 3,
+            "date_added": now,
+            "date_updated": now
+        }
+        for index in range(count)
+    ]
+
+
+def old_path(rows: list[dict], adapter: TypeAdapter) -> bytes:
+    memes = [MemeFull.from_orm(Memes(**row)) for row in rows]
+    content = adapter.dump_python(adapter.validate_python(memes), mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def new_path(rows: list[dict]) -> bytes:
+    memes = [{key: value for key, value in row.items() if key != "filename"} | {"thumbnail_url": None}
+             for row in rows]
+    return orjson.dumps(memes)
+
+
+def main(rows_count: int, number: int):
+    rows = make_rows(rows_count)
+    adapter = TypeAdapter(list[MemeFull])
+    assert json.loads(old_path(rows, adapter)) == json.loads(new_path(rows))
+
+    old = min(timeit.repeat(lambda: old_path(rows, adapter), number=number, repeat=5)) / number
+    new = min(timeit.repeat(lambda: new_path(rows), number=number, repeat=5)) / number
+    print(f"{rows_count} rows per page")
+    print(f"old: {old * 1e6:8.1f} us/page")
+    print(f"new: {new * 1e6:8.1f} us/page ({old / new:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.rows, args.number)
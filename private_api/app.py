@@ -1,19 +1,39 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
 
-from private_api.config import create_bucket, delete_bucket
+from private_api.admission import AdmissionMiddleware
+from private_api.config import (
+    delete_bucket, storage_executor, upload_executor, derivatives_enabled, shutdown_derivative_executor
+)
+from private_api.derivatives import derivatives_available
+from private_api.metrics import MetricsMiddleware, metrics
 from private_api.routes import router as minio_router
+from private_api.warmup import readiness, warm_up, router as health_router
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    create_bucket()
-    print("Bucket has been created")
+    if derivatives_enabled and not derivatives_available():
+        print("DERIVATIVES_ENABLED is set but Pillow is not installed, thumbnails will not be generated")
+    warmup_task = asyncio.create_task(warm_up())
     yield
+    readiness.set_not_ready("shutting down")
+    warmup_task.cancel()
+    # A failed warm-up must not skip the teardown below
+    with suppress(asyncio.CancelledError, Exception):
+        await warmup_task
     delete_bucket()
     print("Bucket has been deleted")
+    storage_executor.shutdown()
+    upload_executor.shutdown()
+    shutdown_derivative_executor()
 
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(AdmissionMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_route("/metrics", metrics, include_in_schema=False)
 
+app.include_router(health_router)
 app.include_router(minio_router)
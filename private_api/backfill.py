@@ -0,0 +1,70 @@
+"""Create derivatives for objects uploaded before they existed.
+
+Run with `python -m private_api.backfill [--force] [--concurrency N]`. Objects are listed page by page,
+and each page is rendered in parallel on the derivative process pool.
+"""
+import argparse
+import asyncio
+import json
+from fastapi import HTTPException
+
+from private_api.config import storage_executor, derived_prefix, shutdown_derivative_executor
+from private_api.derivatives import derivatives_available
+from private_api.utils import MinioUtils
+
+
+async def has_derivatives(filename: str) -> bool:
+    try:
+        await asyncio.gather(*(MinioUtils.stat_file(name) for name in MinioUtils.derived_names(filename)))
+        return True
+    except HTTPException as err:
+        if err.status_code == 404:
+            return False
+        raise
+
+
+async def backfill(force: bool = False, concurrency: int = 8, batch_size: int = 1000) -> dict:
+    report = {"objects": 0, "skipped": 0, "created": 0, "errors": {}}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def process(filename: str):
+        async with semaphore:
+            try:
+                if not force and await has_derivatives(filename):
+                    report["skipped"] += 1
+                    return
+                await MinioUtils.create_derivatives(filename)
+                report["created"] += 1
+            except HTTPException as err:
+                report["errors"][filename] = err.detail
+
+    start_after = None
+    while True:
+        batch = await MinioUtils.list_files(start_after, batch_size)
+        filenames = [obj["name"] for obj in batch if not obj["name"].startswith(f"{derived_prefix}/")]
+        report["objects"] += len(filenames)
+        await asyncio.gather(*(process(filename) for filename in filenames))
+
+        if len(batch) < batch_size:
+            return report
+        start_after = batch[-1]["name"]
+
+
+async def main(force: bool, concurrency: int):
+    try:
+        report = await backfill(force=force, concurrency=concurrency)
+    finally:
+        storage_executor.shutdown()
+        shutdown_derivative_executor()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create missing derivatives for stored images")
+    parser.add_argument("--force", action="store_true", help="re-render derivatives that already exist")
+    parser.add_argument("--concurrency", type=int, default=8, help="images processed at the same time")
+    args = parser.parse_args()
+
+    if not derivatives_available():
+        raise SystemExit("Pillow is not installed")
+    asyncio.run(main(force=args.force, concurrency=args.concurrency))
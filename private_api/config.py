@@ -1,44 +1,121 @@
 import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Optional
 from minio import Minio
-from minio.error import S3Error
 from dotenv import load_dotenv
 
+from private_api.executor import StorageExecutor
+from private_api.metrics import MINIO_CALLS_ACTIVE, MINIO_CALLS_QUEUED
+from private_api.storage.base import StorageBackend, UrlSigner
+from private_api.storage.local_backend import LocalBackend
+from private_api.storage.memory_backend import MemoryBackend
+from private_api.storage.minio_backend import MinioBackend
+
 
 PATH_TO_ENV = Path(__file__).resolve().parent.parent.joinpath("private.env")
 load_dotenv(PATH_TO_ENV)
 
 
-client = Minio(
-    endpoint=os.getenv("MINIO_URL"),
-    access_key=os.getenv("MINIO_ROOT_USER"),
-    secret_key=os.getenv("MINIO_ROOT_PASSWORD"),
-    secure=bool(int(os.getenv("SECURE")))
-)
-
 bucket_name = os.getenv("BUCKET_NAME")
+part_size = int(os.getenv("PART_SIZE", 10 * 1024 * 1024))
+stream_chunk_size = int(os.getenv("STREAM_CHUNK_SIZE", 64 * 1024))
+presign_expires = int(os.getenv("PRESIGN_EXPIRES", 24 * 60 * 60))
+presign_refresh_margin = int(os.getenv("PRESIGN_REFRESH_MARGIN", 5 * 60))
+# How long an object found missing by `/presign` is not looked up again; rendering a derivative clears its
+# entry on this replica, so keep it below the public `THUMBNAIL_PENDING_TIMEOUT` for the other replicas
+presign_miss_ttl = int(os.getenv("PRESIGN_MISS_TTL", 5 * 60))
+presign_cache_max_size = int(os.getenv("PRESIGN_CACHE_MAX_SIZE", 100_000))
+upload_url_expires = int(os.getenv("UPLOAD_URL_EXPIRES", 15 * 60))
+max_upload_size = int(os.getenv("MAX_UPLOAD_SIZE", 50 * 1024 * 1024))
+allowed_content_types = tuple(os.getenv("ALLOWED_CONTENT_TYPES", "image/").split(","))
+# The base64 JSON upload route carries a third more than the image itself
+upload_max_request_size = int(os.getenv("UPLOAD_MAX_REQUEST_SIZE", max_upload_size * 4 // 3 + 1024 * 1024))
+upload_budget_bytes = int(os.getenv("UPLOAD_BUDGET_BYTES", 512 * 1024 * 1024))
+upload_max_concurrency = int(os.getenv("UPLOAD_MAX_CONCURRENCY", 32))
+upload_retry_after = int(os.getenv("UPLOAD_RETRY_AFTER", 1))
+remove_batch_size = 1000
 
+storage_backend = os.getenv("STORAGE_BACKEND", "minio")
+local_storage_root = os.getenv("LOCAL_STORAGE_ROOT", "/data")
+# Base URL and key of the signed `/files/` URLs handed out by the local and memory backends. The URL must be
+# reachable by the clients the URLs are handed to, and every replica must share the key to accept them
+storage_public_url = os.getenv("STORAGE_PUBLIC_URL", "http://localhost:8001")
+storage_signing_key = os.getenv("STORAGE_SIGNING_KEY", "").encode()
 
-def create_bucket():
-    try:
-        found = client.bucket_exists(bucket_name)
-        if not found:
-            client.make_bucket(bucket_name)
+storage_executor = StorageExecutor(max_workers=int(os.getenv("MINIO_MAX_WORKERS", 16)))
+# A streaming put holds its worker for as long as the client takes to send the body, so streamed uploads get
+# their own threads, one per admitted upload, and can never starve the presign, stat, get and list calls
+upload_executor = StorageExecutor(max_workers=upload_max_concurrency, thread_name_prefix="minio-upload")
+MINIO_CALLS_ACTIVE.set_function(lambda: storage_executor.active + upload_executor.active)
+MINIO_CALLS_QUEUED.set_function(lambda: storage_executor.queue_depth + upload_executor.queue_depth)
+
+# Backoff of the bucket check at startup, which is retried until storage is reachable
+warmup_retry_base = float(os.getenv("WARMUP_RETRY_BASE", 1))
+warmup_retry_max = float(os.getenv("WARMUP_RETRY_MAX", 30))
+
+derivatives_enabled = bool(int(os.getenv("DERIVATIVES_ENABLED", 1)))
+derived_prefix = os.getenv("DERIVED_PREFIX", "derived")
+derivative_sizes = {
+    "thumbnail": int(os.getenv("THUMBNAIL_SIZE", 320)),
+    "medium": int(os.getenv("MEDIUM_SIZE", 1024))
+}
+derivative_quality = int(os.getenv("DERIVATIVE_QUALITY", 80))
+derivative_workers = int(os.getenv("DERIVATIVE_WORKERS", os.cpu_count() or 1))
+# Renders waiting for a worker beyond this many are dropped (`python -m private_api.backfill` catches up later)
+derivative_queue_size = int(os.getenv("DERIVATIVE_QUEUE_SIZE", 100))
+_derivative_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_derivative_executor() -> ProcessPoolExecutor:
+    """The render pool, started on first use so deployments without derivatives never spawn its processes."""
+    global _derivative_executor
+    if _derivative_executor is None:
+        _derivative_executor = ProcessPoolExecutor(max_workers=derivative_workers)
+    return _derivative_executor
+
+
+def shutdown_derivative_executor():
+    global _derivative_executor
+    if _derivative_executor is not None:
+        _derivative_executor.shutdown()
+        _derivative_executor = None
 
-    except S3Error as err:
-        print(f"Something went wrong while bucket creating: {err}")
+
+def create_storage(backend: str) -> StorageBackend:
+    if backend == "minio":
+        client = Minio(
+            endpoint=os.getenv("MINIO_URL"),
+            access_key=os.getenv("MINIO_ROOT_USER"),
+            secret_key=os.getenv("MINIO_ROOT_PASSWORD"),
+            secure=bool(int(os.getenv("SECURE")))
+        )
+        return MinioBackend(client, bucket_name, part_size)
+
+    if backend in ("local", "memory") and not storage_signing_key:
+        raise ValueError(f"STORAGE_SIGNING_KEY must be set to sign URLs of STORAGE_BACKEND {backend!r}")
+
+    signer = UrlSigner(storage_public_url, storage_signing_key)
+    if backend == "local":
+        return LocalBackend(local_storage_root, signer, chunk_size=stream_chunk_size)
+    if backend == "memory":
+        return MemoryBackend(signer)
+
+    raise ValueError(f"Unknown STORAGE_BACKEND {backend!r}, expected 'minio', 'local' or 'memory'")
+
+
+storage = create_storage(storage_backend)
+
+
+def create_bucket():
+    """Create the bucket. Errors are raised, `warmup.ensure_bucket` retries them."""
+    storage.create_bucket()
 
 
 def delete_bucket():
     try:
-        found = client.bucket_exists(bucket_name)
-        if found:
-            objects = client.list_objects(bucket_name, recursive=True)
-            for obj in objects:
-                client.remove_object(bucket_name, obj.object_name)
-            client.remove_bucket(bucket_name)
-        else:
-            print(f"Bucket {bucket_name} does not exist")
-
-    except S3Error as err:
+        storage.delete_bucket()
+
+    # Storage may be unreachable at shutdown, which must not stop the rest of the teardown
+    except Exception as err:
         print(f"Something went wrong while bucket deleting: {err}")
@@ -0,0 +1,44 @@
+"""Resized copies of uploaded images.
+
+`render_derivatives` is CPU bound and runs in the derivative worker processes, so it must stay
+a picklable top-level function that only depends on Pillow.
+"""
+import io
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = ImageOps = None
+
+
+DERIVATIVE_FORMAT = "WEBP"
+DERIVATIVE_CONTENT_TYPE = "image/webp"
+DERIVATIVE_EXTENSION = "webp"
+
+
+def derivatives_available() -> bool:
+    return Image is not None
+
+
+def derived_name(prefix: str, derivative: str, filename: str) -> str:
+    return f"{prefix}/{derivative}/{filename}.{DERIVATIVE_EXTENSION}"
+
+
+def render_derivatives(data: bytes, sizes: dict[str, int], quality: int) -> dict[str, bytes]:
+    """Fit the image into a `size` x `size` box for every entry of `sizes` and encode it as WebP.
+
+    Images already smaller than a box are re-encoded without upscaling.
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+        rendered = {}
+        for derivative, size in sizes.items():
+            resized = image.copy()
+            resized.thumbnail((size, size), Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            resized.save(buffer, format=DERIVATIVE_FORMAT, quality=quality)
+            rendered[derivative] = buffer.getvalue()
+        return rendered
@@ -0,0 +1,69 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable
+
+from private_api.metrics import MINIO_CALL_LATENCY, MINIO_QUEUE_WAIT
+
+
+class StorageExecutor:
+    """Bounded thread pool for the blocking MinIO client calls.
+
+    `max_workers` caps how many storage calls run at once; everything above the cap
+    waits in the executor queue, whose depth is reported by `stats`. The time a call waits
+    and the time it runs are recorded separately, labelled by the called function's name.
+    """
+
+    def __init__(self, max_workers: int, thread_name_prefix: str = "minio"):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self._lock = threading.Lock()
+        self._submitted = 0
+        self._active = 0
+
+    def _call(self, submitted_at: float, func: Callable, *args, **kwargs) -> Any:
+        started_at = time.perf_counter()
+        MINIO_QUEUE_WAIT.observe(started_at - submitted_at)
+        with self._lock:
+            self._active += 1
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._active -= 1
+            MINIO_CALL_LATENCY.labels(operation=getattr(func, "__name__", "call")).observe(
+                time.perf_counter() - started_at
+            )
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._submitted += 1
+        try:
+            return await loop.run_in_executor(
+                self._executor, partial(self._call, time.perf_counter(), func, *args, **kwargs)
+            )
+        finally:
+            with self._lock:
+                self._submitted -= 1
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def queue_depth(self) -> int:
+        with self._lock:
+            return max(self._submitted - self._active, 0)
+
+    def stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "active": self.active,
+            "queued": self.queue_depth
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
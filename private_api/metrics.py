@@ -0,0 +1,80 @@
+import time
+from prometheus_client import (
+    CollectorRegistry, Counter, Gauge, Histogram, ProcessCollector, PlatformCollector, GCCollector,
+    CONTENT_TYPE_LATEST, generate_latest
+)
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+registry = CollectorRegistry()
+ProcessCollector(registry=registry)
+PlatformCollector(registry=registry)
+GCCollector(registry=registry)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Time spent handling HTTP requests", ["method", "route", "status"],
+    registry=registry
+)
+REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests being handled", registry=registry)
+
+MINIO_CALL_LATENCY = Histogram(
+    "minio_call_duration_seconds", "Time a MinIO client call spends running on a worker thread", ["operation"],
+    registry=registry
+)
+MINIO_QUEUE_WAIT = Histogram(
+    "minio_queue_wait_seconds", "Time a MinIO client call waits for a free worker thread", registry=registry
+)
+MINIO_CALLS_ACTIVE = Gauge("minio_calls_active", "MinIO client calls running on worker threads", registry=registry)
+MINIO_CALLS_QUEUED = Gauge("minio_calls_queued", "MinIO client calls waiting for a worker thread", registry=registry)
+
+DERIVATIVE_LATENCY = Histogram(
+    "derivative_render_duration_seconds", "Time spent rendering the derivatives of one image", registry=registry
+)
+DERIVATIVES_DROPPED = Counter(
+    "derivatives_dropped", "Derivative renders skipped because too many were already waiting", registry=registry
+)
+UPLOAD_BYTES = Counter("upload_bytes", "Image bytes received on the upload routes", registry=registry)
+UPLOAD_BYTES_IN_FLIGHT = Gauge(
+    "upload_bytes_in_flight", "Request bytes reserved by the uploads being handled", registry=registry
+)
+UPLOADS_IN_FLIGHT = Gauge("uploads_in_flight", "Uploads being handled", registry=registry)
+UPLOADS_REJECTED = Counter("uploads_rejected", "Uploads refused by admission control", ["reason"], registry=registry)
+
+
+class MetricsMiddleware:
+    """Records latency by route template (not raw path, to keep label cardinality bounded) and status."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            route = scope.get("route")
+            REQUEST_LATENCY.labels(
+                method=scope["method"],
+                route=route.path if route is not None else "unmatched",
+                status=status
+            ).observe(time.perf_counter() - start)
+
+
+async def metrics(request: Request) -> Response:
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
@@ -1,31 +1,181 @@
+import asyncio
 import base64
-from fastapi import HTTPException
+import uuid
+from datetime import datetime
+from email.utils import format_datetime
+from typing import AsyncIterator, Awaitable, Optional
+from fastapi import HTTPException, Response
+from fastapi.responses import StreamingResponse
 
-from private_api.schemas import UploadRequest, UpdateRequest
-from private_api.utils import MinioUtils
+from private_api.config import (
+    max_upload_size, allowed_content_types, derivatives_enabled, derivative_workers, derivative_queue_size
+)
+from private_api.derivatives import derivatives_available
+from private_api.metrics import DERIVATIVES_DROPPED
+from private_api.schemas import (
+    UploadRequest, UpdateRequest, PresignRequest, ReserveRequest, CompleteRequest, DeleteRequest
+)
+from private_api.utils import MinioUtils, parse_range, etag_matches
 
 
 class MinioRepository:
+    _derivative_tasks: set[asyncio.Task] = set()
+    # Each render holds the whole source image in memory, so only one per worker process runs at a time
+    _derivative_slots = asyncio.Semaphore(derivative_workers)
+
+    @classmethod
+    async def _create_derivatives(cls, filename: str):
+        async with cls._derivative_slots:
+            try:
+                await MinioUtils.create_derivatives(filename)
+            except HTTPException as err:
+                print(f"Failed to create derivatives of {filename}: {err.detail}")
+
+    @classmethod
+    def _schedule_derivatives(cls, filename: str):
+        """Render derivatives in the background so the upload response does not wait for the resize.
+
+        At most `DERIVATIVE_WORKERS` renders run at once and `DERIVATIVE_QUEUE_SIZE` wait; uploads beyond
+        that get no derivatives until the backfill runs.
+        """
+        if not derivatives_enabled or not derivatives_available():
+            return
+        if len(cls._derivative_tasks) >= derivative_workers + derivative_queue_size:
+            DERIVATIVES_DROPPED.inc()
+            print(f"Too many derivative renders pending, skipping {filename}")
+            return
+
+        task = asyncio.create_task(cls._create_derivatives(filename))
+        cls._derivative_tasks.add(task)
+        task.add_done_callback(cls._derivative_tasks.discard)
+
     @classmethod
     async def create_meme(cls, request: UploadRequest):
         file_data = base64.b64decode(request.image)
-        return await MinioUtils.upload_file(request.filename, file_data)
+        if len(file_data) > max_upload_size:
+            raise HTTPException(status_code=413, detail=f"Object is larger than {max_upload_size} bytes")
+        image_url = await MinioUtils.upload_file(request.filename, file_data)
+        cls._schedule_derivatives(request.filename)
+        return image_url
+
+    @classmethod
+    async def create_meme_stream(cls, filename: str, chunks: AsyncIterator[bytes],
+                                 content_type: Optional[str] = None, sha256: Optional[str] = None):
+        image_url = await MinioUtils.upload_stream(filename, chunks, content_type, sha256)
+        cls._schedule_derivatives(filename)
+        return image_url
+
+    @classmethod
+    async def list_memes(cls, start_after: Optional[str], limit: int) -> list[dict]:
+        return await MinioUtils.list_files(start_after, limit)
+
+    @classmethod
+    async def get_meme_info(cls, filename: str) -> dict:
+        stat = await MinioUtils.stat_file(filename)
+        image_url = (await MinioUtils.presign_files([filename]))[filename]
+        return {"image_url": image_url, **stat}
+
+    @classmethod
+    async def get_meme_content(cls, filename: str, range_header: Optional[str] = None,
+                               if_none_match: Optional[str] = None) -> Response:
+        stat = await MinioUtils.stat_file(filename)
+        headers = {"Accept-Ranges": "bytes", "ETag": f'"{stat["etag"]}"'}
+        if stat["last_modified"]:
+            headers["Last-Modified"] = format_datetime(datetime.fromisoformat(stat["last_modified"]), usegmt=True)
+
+        if etag_matches(if_none_match, headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+
+        byte_range = parse_range(range_header, stat["size"])
+        if byte_range is None:
+            start, end, status_code = 0, stat["size"] - 1, 200
+        else:
+            (start, end), status_code = byte_range, 206
+            headers["Content-Range"] = f"bytes {start}-{end}/{stat['size']}"
+        headers["Content-Length"] = str(end - start + 1)
+
+        chunks = await MinioUtils.open_file(filename, offset=start, length=end - start + 1)
+        return StreamingResponse(chunks, status_code=status_code, headers=headers,
+                                 media_type=stat["content_type"] or "application/octet-stream")
+
+    @classmethod
+    def _check_signature(cls, method: str, filename: str, expires: int, signature: str):
+        if not MinioUtils.verify_url(method, filename, expires, signature):
+            raise HTTPException(status_code=403, detail="Invalid or expired signature")
+
+    @classmethod
+    async def download_file(cls, filename: str, expires: int, signature: str, range_header: Optional[str] = None,
+                            if_none_match: Optional[str] = None) -> Response:
+        cls._check_signature("GET", filename, expires, signature)
+        return await cls.get_meme_content(filename, range_header=range_header, if_none_match=if_none_match)
+
+    @classmethod
+    async def upload_file(cls, filename: str, expires: int, signature: str, chunks: AsyncIterator[bytes],
+                          content_type: Optional[str] = None) -> Response:
+        cls._check_signature("PUT", filename, expires, signature)
+        await MinioUtils.upload_stream(filename, chunks, content_type)
+        return Response(status_code=200)
+
+    @classmethod
+    async def presign_memes(cls, request: PresignRequest) -> dict[str, str]:
+        return await MinioUtils.presign_files(request.filenames, request.existing_only)
+
+    @classmethod
+    async def reserve_upload(cls, request: ReserveRequest) -> dict:
+        object_name = f"{uuid.uuid4().hex}_{request.filename}"
+        upload_url = await MinioUtils.presign_upload(object_name)
+        return {"object_name": object_name, "upload_url": upload_url}
+
+    @classmethod
+    async def complete_upload(cls, request: CompleteRequest) -> dict:
+        stat = await MinioUtils.stat_file(request.object_name)
+
+        if not 0 < stat["size"] <= max_upload_size:
+            await MinioUtils.remove_file(request.object_name)
+            raise HTTPException(status_code=400, detail=f"Invalid object size: {stat['size']} bytes")
+
+        if not (stat["content_type"] or "").startswith(allowed_content_types):
+            await MinioUtils.remove_file(request.object_name)
+            raise HTTPException(status_code=400, detail=f"Invalid content type: {stat['content_type']}")
+
+        image_url = (await MinioUtils.presign_files([request.object_name]))[request.object_name]
+        cls._schedule_derivatives(request.object_name)
+        return {"image_url": image_url, **stat}
 
     @classmethod
     async def delete_meme(cls, filename: str):
         return await MinioUtils.remove_file(filename)
 
+    @classmethod
+    async def delete_memes(cls, request: DeleteRequest) -> dict:
+        return await MinioUtils.remove_files(request.filenames)
+
     @classmethod
     async def update_meme(cls, request: UpdateRequest):
+        return await cls._replace_meme(
+            upload=cls.create_meme(UploadRequest(filename=request.filename, image=request.image)),
+            filename=request.filename,
+            old_filename=request.old_filename
+        )
+
+    @classmethod
+    async def update_meme_stream(cls, filename: str, old_filename: str, chunks: AsyncIterator[bytes],
+                                 content_type: Optional[str] = None):
+        return await cls._replace_meme(
+            upload=cls.create_meme_stream(filename, chunks, content_type),
+            filename=filename,
+            old_filename=old_filename
+        )
+
+    @classmethod
+    async def _replace_meme(cls, upload: Awaitable[str], filename: str, old_filename: str):
         try:
-            new_file_url = await cls.create_meme(
-                UploadRequest(filename=request.filename, image=request.image)
-            )
+            new_file_url = await upload
 
-            delete_response = await cls.delete_meme(request.old_filename)
+            delete_response = await cls.delete_meme(old_filename)
 
             if delete_response["status"] != "success":
-                await cls.delete_meme(request.filename)
+                await cls.delete_meme(filename)
                 raise HTTPException(status_code=500, detail="Failed to delete the old object")
 
             return new_file_url
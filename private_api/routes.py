@@ -1,8 +1,12 @@
-from fastapi import APIRouter
+from typing import Optional
+from fastapi import APIRouter, Request, Query, Header, Response
 from pydantic import HttpUrl
 
+from private_api.config import storage_executor, upload_executor
 from private_api.repository import MinioRepository
-from private_api.schemas import UploadRequest, UpdateRequest
+from private_api.schemas import (
+    UploadRequest, UpdateRequest, PresignRequest, ReserveRequest, CompleteRequest, DeleteRequest
+)
 
 
 router = APIRouter(
@@ -15,6 +19,72 @@ async def create_meme(request: UploadRequest) -> HttpUrl:
     return await MinioRepository.create_meme(request)
 
 
+@router.post("/stream")
+async def create_meme_stream(request: Request, filename: str, sha256: Optional[str] = None) -> HttpUrl:
+    return await MinioRepository.create_meme_stream(
+        filename=filename,
+        chunks=request.stream(),
+        content_type=request.headers.get("content-type"),
+        sha256=sha256
+    )
+
+
+@router.get("/objects")
+async def list_memes(start_after: Optional[str] = None, limit: int = Query(default=1000, gt=0, le=1000)) -> list[dict]:
+    return await MinioRepository.list_memes(start_after, limit)
+
+
+# `/content` is matched first, since object names may contain `/`
+@router.get("/objects/{filename:path}/content")
+async def get_meme_content(filename: str, range_header: Optional[str] = Header(default=None, alias="Range"),
+                           if_none_match: Optional[str] = Header(default=None)) -> Response:
+    return await MinioRepository.get_meme_content(filename, range_header=range_header, if_none_match=if_none_match)
+
+
+@router.get("/objects/{filename:path}")
+async def get_meme_info(filename: str) -> dict:
+    return await MinioRepository.get_meme_info(filename)
+
+
+@router.get("/files/{filename:path}")
+async def download_file(filename: str, expires: int, signature: str,
+                        range_header: Optional[str] = Header(default=None, alias="Range"),
+                        if_none_match: Optional[str] = Header(default=None)) -> Response:
+    return await MinioRepository.download_file(filename, expires, signature, range_header=range_header,
+                                               if_none_match=if_none_match)
+
+
+@router.put("/files/{filename:path}")
+async def upload_file(request: Request, filename: str, expires: int, signature: str) -> Response:
+    return await MinioRepository.upload_file(
+        filename=filename,
+        expires=expires,
+        signature=signature,
+        chunks=request.stream(),
+        content_type=request.headers.get("content-type")
+    )
+
+
+@router.post("/presign")
+async def presign_memes(request: PresignRequest) -> dict[str, str]:
+    return await MinioRepository.presign_memes(request)
+
+
+@router.post("/uploads")
+async def reserve_upload(request: ReserveRequest) -> dict:
+    return await MinioRepository.reserve_upload(request)
+
+
+@router.post("/uploads/complete")
+async def complete_upload(request: CompleteRequest) -> dict:
+    return await MinioRepository.complete_upload(request)
+
+
+@router.post("/delete")
+async def delete_memes(request: DeleteRequest) -> dict:
+    return await MinioRepository.delete_memes(request)
+
+
 @router.delete("/{filename}")
 async def delete_meme(filename: str) -> dict:
     return await MinioRepository.delete_meme(filename)
@@ -23,3 +93,18 @@ async def delete_meme(filename: str) -> dict:
 @router.put("/")
 async def update_meme(request: UpdateRequest) -> HttpUrl:
     return await MinioRepository.update_meme(request)
+
+
+@router.put("/stream")
+async def update_meme_stream(request: Request, filename: str, old_filename: str) -> HttpUrl:
+    return await MinioRepository.update_meme_stream(
+        filename=filename,
+        old_filename=old_filename,
+        chunks=request.stream(),
+        content_type=request.headers.get("content-type")
+    )
+
+
+@router.get("/executor")
+async def get_executor_stats() -> dict:
+    return {**storage_executor.stats(), "uploads": upload_executor.stats()}
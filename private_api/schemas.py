@@ -18,3 +18,21 @@ class UploadRequest(BaseModel):
 
 class UpdateRequest(UploadRequest):
     old_filename: str
+
+
+class PresignRequest(BaseModel):
+    filenames: list[str]
+    # Signed only if the object exists, e.g. derivatives that may not have been rendered
+    existing_only: list[str] = []
+
+
+class ReserveRequest(BaseModel):
+    filename: str
+
+
+class CompleteRequest(BaseModel):
+    object_name: str
+
+
+class DeleteRequest(BaseModel):
+    filenames: list[str]
@@ -0,0 +1,170 @@
+import hashlib
+import hmac
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import BinaryIO, Callable, Iterator, Optional
+from urllib.parse import quote
+
+
+class StorageError(Exception):
+    pass
+
+
+class ObjectNotFound(StorageError):
+    pass
+
+
+class InvalidObjectName(StorageError):
+    pass
+
+
+def iter_chunks(data: BinaryIO, length: int = -1, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Read `length` bytes from `data` chunk by chunk (everything up to EOF when `length` is -1)."""
+    remaining = length
+    while remaining != 0:
+        chunk = data.read(chunk_size if remaining < 0 else min(chunk_size, remaining))
+        if not chunk:
+            return
+        if remaining > 0:
+            remaining -= len(chunk)
+        yield chunk
+
+
+@dataclass
+class ObjectStat:
+    size: int
+    content_type: Optional[str]
+    etag: str
+    last_modified: Optional[datetime]
+
+
+@dataclass
+class ObjectInfo:
+    name: str
+    last_modified: Optional[datetime]
+
+
+class ObjectReader:
+    """Iterator over the chunks of an open object.
+
+    `release` frees whatever the backend holds for the object (a connection, a file, a mapping)
+    and runs exactly once, whether the chunks were read to the end or not.
+    """
+
+    def __init__(self, chunks: Iterator[bytes], release: Callable[[], None] = lambda: None):
+        self._chunks = chunks
+        self._release = release
+        self._closed = False
+
+    def __iter__(self) -> "ObjectReader":
+        return self
+
+    def __next__(self) -> bytes:
+        return next(self._chunks)
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._release()
+
+
+class UrlSigner:
+    """HMAC-signed, expiring URLs to the private service's `/files/` routes.
+
+    Used by the backends that, unlike MinIO, have no server of their own to hand out URLs for.
+    """
+
+    def __init__(self, base_url: str, key: bytes):
+        self.base_url = base_url.rstrip("/")
+        self.key = key
+
+    def sign(self, method: str, name: str, expires_at: int) -> str:
+        message = f"{method}\n{name}\n{expires_at}".encode()
+        return hmac.new(self.key, message, hashlib.sha256).hexdigest()
+
+    def url(self, method: str, name: str, expires: timedelta) -> str:
+        expires_at = int(time.time() + expires.total_seconds())
+        signature = self.sign(method, name, expires_at)
+        return f"{self.base_url}/files/{quote(name)}?expires={expires_at}&signature={signature}"
+
+    def verify(self, method: str, name: str, expires_at: int, signature: str) -> bool:
+        if expires_at < time.time():
+            return False
+        return hmac.compare_digest(self.sign(method, name, expires_at), signature)
+
+
+class StorageBackend(ABC):
+    """Blocking object store API the private service is written against.
+
+    Every method may block, so callers run them on `storage_executor`. Missing objects raise
+    `ObjectNotFound`, every other backend failure raises `StorageError`.
+    """
+
+    @abstractmethod
+    def create_bucket(self):
+        ...
+
+    @abstractmethod
+    def delete_bucket(self):
+        ...
+
+    @abstractmethod
+    def put(self, name: str, data: BinaryIO, length: int = -1, content_type: Optional[str] = None):
+        """Store `length` bytes read from `data` (everything up to EOF when `length` is -1)."""
+
+    @abstractmethod
+    def get(self, name: str, offset: int = 0, length: int = 0, chunk_size: int = 64 * 1024) -> ObjectReader:
+        """Open `length` bytes of the object from `offset` (the whole rest when `length` is 0)."""
+
+    def read(self, name: str) -> bytes:
+        reader = self.get(name)
+        try:
+            return b"".join(reader)
+        finally:
+            reader.close()
+
+    @abstractmethod
+    def stat(self, name: str) -> ObjectStat:
+        ...
+
+    @abstractmethod
+    def remove(self, name: str):
+        """Remove the object; removing a missing object is not an error."""
+
+    @abstractmethod
+    def remove_many(self, names: list[str]) -> dict[str, str]:
+        """Remove the objects and return the error message of every name that could not be removed."""
+
+    @abstractmethod
+    def list(self, start_after: Optional[str], limit: int) -> list[ObjectInfo]:
+        """Return up to `limit` objects in name order, starting after `start_after`."""
+
+    @abstractmethod
+    def presign_get(self, name: str, expires: timedelta = timedelta(days=7)) -> str:
+        ...
+
+    @abstractmethod
+    def presign_put(self, name: str, expires: timedelta = timedelta(days=7)) -> str:
+        ...
+
+    def verify_url(self, method: str, name: str, expires_at: int, signature: str) -> bool:
+        """Check a URL handed out by `presign_get`/`presign_put` that is served by the private service itself."""
+        return False
+
+
+class SignedUrlBackend(StorageBackend, ABC):
+    """Backend whose presigned URLs point at the private service and are checked with `signer`."""
+
+    def __init__(self, signer: UrlSigner):
+        self.signer = signer
+
+    def presign_get(self, name: str, expires: timedelta = timedelta(days=7)) -> str:
+        return self.signer.url("GET", name, expires)
+
+    def presign_put(self, name: str, expires: timedelta = timedelta(days=7)) -> str:
+        return self.signer.url("PUT", name, expires)
+
+    def verify_url(self, method: str, name: str, expires_at: int, signature: str) -> bool:
+        return self.signer.verify(method, name, expires_at, signature)
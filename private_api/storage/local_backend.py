@@ -0,0 +1,206 @@
+import bisect
+import json
+import mimetypes
+import mmap
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional
+
+from private_api.storage.base import (
+    SignedUrlBackend, UrlSigner, StorageError, ObjectNotFound, InvalidObjectName, ObjectStat, ObjectInfo,
+    ObjectReader, iter_chunks
+)
+
+
+META_DIR = ".meta"
+TEMP_PREFIX = ".tmp-"
+# Directory listings are only reused once their mtime is this old
+LISTING_SETTLE_NS = 2 * 10 ** 9
+
+
+class LocalBackend(SignedUrlBackend):
+    """Objects stored as plain files under `root`, for single-node deployments without MinIO.
+
+    Writes go to a temporary file in the target directory and are moved into place with `os.replace`,
+    so readers see either the old or the new object, never a partial one; a reader that already opened
+    the old file keeps reading it. Reads map the file and slice chunks straight out of the page cache.
+    Content types are kept in small JSON files under `root/.meta`; names whose parts start with a dot
+    are rejected, which keeps that directory, temporary files and `..` out of the object namespace.
+    """
+
+    def __init__(self, root: str, signer: UrlSigner, chunk_size: int = 64 * 1024):
+        super().__init__(signer)
+        self.root = Path(root)
+        self.chunk_size = chunk_size
+        self._listings: dict[Path, tuple[int, list[str]]] = {}
+
+    def _path(self, name: str, base: Optional[Path] = None) -> Path:
+        parts = name.split("/")
+        if not name or any(not part or part.startswith(".") for part in parts):
+            raise InvalidObjectName(f"Invalid object name: {name!r}")
+        return (base or self.root).joinpath(*parts)
+
+    def _meta_path(self, name: str) -> Path:
+        path = self._path(name, self.root / META_DIR)
+        return path.with_name(f"{path.name}.json")
+
+    def create_bucket(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def delete_bucket(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    @staticmethod
+    def _replace(path: Path, chunks: Iterator[bytes]):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=TEMP_PREFIX)
+        try:
+            with os.fdopen(fd, "wb") as file:
+                for chunk in chunks:
+                    file.write(chunk)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def put(self, name: str, data: BinaryIO, length: int = -1, content_type: Optional[str] = None):
+        path = self._path(name)
+        try:
+            self._replace(self._meta_path(name), iter([json.dumps({"content_type": content_type}).encode()]))
+            self._replace(path, iter_chunks(data, length, self.chunk_size))
+        except OSError as err:
+            raise StorageError(str(err)) from err
+
+    def get(self, name: str, offset: int = 0, length: int = 0, chunk_size: int = 64 * 1024) -> ObjectReader:
+        try:
+            file = open(self._path(name), "rb")
+        except FileNotFoundError:
+            raise ObjectNotFound(name)
+        except OSError as err:
+            raise StorageError(str(err)) from err
+
+        size = os.fstat(file.fileno()).st_size
+        end = min(offset + length, size) if length else size
+        if offset >= end:
+            return ObjectReader(iter(()), file.close)
+
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        def release():
+            mapped.close()
+            file.close()
+
+        return ObjectReader((mapped[start:min(start + chunk_size, end)] for start in range(offset, end, chunk_size)),
+                            release)
+
+    def read(self, name: str) -> bytes:
+        try:
+            return self._path(name).read_bytes()
+        except FileNotFoundError:
+            raise ObjectNotFound(name)
+        except OSError as err:
+            raise StorageError(str(err)) from err
+
+    def _content_type(self, name: str) -> Optional[str]:
+        try:
+            content_type = json.loads(self._meta_path(name).read_bytes())["content_type"]
+        except (OSError, ValueError, KeyError):
+            content_type = None
+        return content_type or mimetypes.guess_type(name)[0] or "application/octet-stream"
+
+    def stat(self, name: str) -> ObjectStat:
+        try:
+            stat = self._path(name).stat()
+        except FileNotFoundError:
+            raise ObjectNotFound(name)
+        except OSError as err:
+            raise StorageError(str(err)) from err
+
+        return ObjectStat(
+            size=stat.st_size,
+            content_type=self._content_type(name),
+            # Changes with every replace, since each write creates a new file
+            etag=f"{stat.st_ino:x}-{stat.st_mtime_ns:x}-{stat.st_size:x}",
+            last_modified=datetime.fromtimestamp(stat.st_mtime, timezone.utc)
+        )
+
+    def remove(self, name: str):
+        for path in (self._path(name), self._meta_path(name)):
+            try:
+                path.unlink(missing_ok=True)
+            except OSError as err:
+                raise StorageError(str(err)) from err
+
+    def remove_many(self, names: list[str]) -> dict[str, str]:
+        errors = {}
+        for name in names:
+            try:
+                self.remove(name)
+            except StorageError as err:
+                errors[name] = str(err)
+        return errors
+
+    def _entries(self, directory: Path) -> list[str]:
+        """Sorted visible entries of `directory`, subdirectories with a trailing `/`.
+
+        Sorting `name/` keeps a subdirectory where its objects fall among the names of its siblings. Listings
+        are reused while the directory's mtime is unchanged, except right after a change, when a second change
+        could land within the same mtime tick.
+        """
+        try:
+            modified = directory.stat().st_mtime_ns
+        except FileNotFoundError:
+            return []
+
+        cached = self._listings.get(directory)
+        if cached is not None and cached[0] == modified:
+            return cached[1]
+
+        with os.scandir(directory) as entries:
+            keys = sorted(
+                f"{entry.name}/" if entry.is_dir(follow_symlinks=False) else entry.name
+                for entry in entries if not entry.name.startswith(".")
+            )
+        if time.time_ns() - modified > LISTING_SETTLE_NS:
+            self._listings[directory] = (modified, keys)
+        return keys
+
+    def _iter_names(self, directory: Path, prefix: str = "", start_after: Optional[str] = None) -> Iterator[str]:
+        """Object names under `directory` after `start_after` (relative to it), in order, walked lazily."""
+        keys = self._entries(directory)
+        start = 0
+        if start_after is not None:
+            head, slash, rest = start_after.partition("/")
+            start = bisect.bisect_left(keys, f"{head}/") if slash else len(keys)
+            if start < len(keys) and keys[start] == f"{head}/":
+                yield from self._iter_names(directory / head, f"{prefix}{head}/", rest)
+                start += 1
+            else:
+                start = bisect.bisect_right(keys, start_after)
+
+        for key in keys[start:]:
+            if key.endswith("/"):
+                yield from self._iter_names(directory / key[:-1], f"{prefix}{key}")
+            else:
+                yield f"{prefix}{key}"
+
+    def list(self, start_after: Optional[str], limit: int) -> list[ObjectInfo]:
+        objects = []
+        for name in self._iter_names(self.root, start_after=start_after):
+            try:
+                modified = self._path(name).stat().st_mtime
+            except FileNotFoundError:
+                continue
+            objects.append(ObjectInfo(name=name, last_modified=datetime.fromtimestamp(modified, timezone.utc)))
+            if len(objects) == limit:
+                break
+        return objects
@@ -0,0 +1,73 @@
+import bisect
+import hashlib
+import threading
+from datetime import datetime, timezone
+from typing import BinaryIO, Optional
+
+from private_api.storage.base import (
+    SignedUrlBackend, UrlSigner, ObjectNotFound, ObjectStat, ObjectInfo, ObjectReader, iter_chunks
+)
+
+
+class MemoryBackend(SignedUrlBackend):
+    """Objects kept in a dict, for tests and benchmarks. Nothing survives a restart."""
+
+    def __init__(self, signer: UrlSigner):
+        super().__init__(signer)
+        self._lock = threading.Lock()
+        self._objects: dict[str, tuple[bytes, ObjectStat]] = {}
+
+    def create_bucket(self):
+        pass
+
+    def delete_bucket(self):
+        with self._lock:
+            self._objects.clear()
+
+    def put(self, name: str, data: BinaryIO, length: int = -1, content_type: Optional[str] = None):
+        payload = b"".join(iter_chunks(data, length))
+        stat = ObjectStat(
+            size=len(payload),
+            content_type=content_type or "application/octet-stream",
+            etag=hashlib.md5(payload).hexdigest(),
+            last_modified=datetime.now(timezone.utc)
+        )
+        with self._lock:
+            self._objects[name] = (payload, stat)
+
+    def _object(self, name: str) -> tuple[bytes, ObjectStat]:
+        with self._lock:
+            stored = self._objects.get(name)
+        if stored is None:
+            raise ObjectNotFound(name)
+        return stored
+
+    def get(self, name: str, offset: int = 0, length: int = 0, chunk_size: int = 64 * 1024) -> ObjectReader:
+        payload = self._object(name)[0]
+        end = min(offset + length, len(payload)) if length else len(payload)
+        view = memoryview(payload)
+        return ObjectReader(bytes(view[start:min(start + chunk_size, end)])
+                            for start in range(offset, end, chunk_size))
+
+    def read(self, name: str) -> bytes:
+        return self._object(name)[0]
+
+    def stat(self, name: str) -> ObjectStat:
+        return self._object(name)[1]
+
+    def remove(self, name: str):
+        with self._lock:
+            self._objects.pop(name, None)
+
+    def remove_many(self, names: list[str]) -> dict[str, str]:
+        with self._lock:
+            for name in names:
+                self._objects.pop(name, None)
+        return {}
+
+    def list(self, start_after: Optional[str], limit: int) -> list[ObjectInfo]:
+        with self._lock:
+            names = sorted(self._objects)
+            start = bisect.bisect_right(names, start_after) if start_after is not None else 0
+            return [ObjectInfo(name=name, last_modified=self._objects[name][1].last_modified)
+                    for name in names[start:start + limit]]
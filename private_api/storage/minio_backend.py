@@ -0,0 +1,113 @@
+import functools
+import itertools
+from datetime import timedelta
+from typing import BinaryIO, Optional
+from minio import Minio
+from minio.deleteobjects import DeleteObject
+from minio.error import S3Error
+
+from private_api.storage.base import StorageBackend, StorageError, ObjectNotFound, ObjectStat, ObjectInfo, ObjectReader
+
+
+def translate_errors(method):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        try:
+            return method(*args, **kwargs)
+        except S3Error as err:
+            if err.code == "NoSuchKey":
+                raise ObjectNotFound(str(err)) from err
+            raise StorageError(str(err)) from err
+    return wrapper
+
+
+class MinioBackend(StorageBackend):
+    def __init__(self, client: Minio, bucket_name: str, part_size: int = 10 * 1024 * 1024):
+        self.client = client
+        self.bucket_name = bucket_name
+        self.part_size = part_size
+
+    @translate_errors
+    def create_bucket(self):
+        if not self.client.bucket_exists(self.bucket_name):
+            self.client.make_bucket(self.bucket_name)
+
+    @translate_errors
+    def delete_bucket(self):
+        if not self.client.bucket_exists(self.bucket_name):
+            print(f"Bucket {self.bucket_name} does not exist")
+            return
+
+        objects = (DeleteObject(obj.object_name)
+                   for obj in self.client.list_objects(self.bucket_name, recursive=True))
+        for error in self.client.remove_objects(self.bucket_name, objects):
+            print(f"Failed to delete {error.name}: {error.message}")
+        self.client.remove_bucket(self.bucket_name)
+
+    @translate_errors
+    def put(self, name: str, data: BinaryIO, length: int = -1, content_type: Optional[str] = None):
+        self.client.put_object(
+            bucket_name=self.bucket_name,
+            object_name=name,
+            data=data,
+            length=length,
+            part_size=self.part_size,
+            content_type=content_type or "application/octet-stream"
+        )
+
+    @translate_errors
+    def get(self, name: str, offset: int = 0, length: int = 0, chunk_size: int = 64 * 1024) -> ObjectReader:
+        response = self.client.get_object(
+            bucket_name=self.bucket_name,
+            object_name=name,
+            offset=offset,
+            length=length
+        )
+
+        def release():
+            response.close()
+            response.release_conn()
+
+        return ObjectReader(response.stream(chunk_size), release)
+
+    @translate_errors
+    def read(self, name: str) -> bytes:
+        response = self.client.get_object(bucket_name=self.bucket_name, object_name=name)
+        try:
+            return response.read()
+        finally:
+            response.close()
+            response.release_conn()
+
+    @translate_errors
+    def stat(self, name: str) -> ObjectStat:
+        stat = self.client.stat_object(bucket_name=self.bucket_name, object_name=name)
+        return ObjectStat(
+            size=stat.size,
+            content_type=stat.content_type,
+            etag=stat.etag,
+            last_modified=stat.last_modified
+        )
+
+    @translate_errors
+    def remove(self, name: str):
+        self.client.remove_object(self.bucket_name, name)
+
+    @translate_errors
+    def remove_many(self, names: list[str]) -> dict[str, str]:
+        errors = self.client.remove_objects(self.bucket_name, [DeleteObject(name) for name in names])
+        return {error.name: error.message for error in errors}
+
+    @translate_errors
+    def list(self, start_after: Optional[str], limit: int) -> list[ObjectInfo]:
+        objects = self.client.list_objects(self.bucket_name, recursive=True, start_after=start_after)
+        return [ObjectInfo(name=obj.object_name, last_modified=obj.last_modified)
+                for obj in itertools.islice(objects, limit)]
+
+    @translate_errors
+    def presign_get(self, name: str, expires: timedelta = timedelta(days=7)) -> str:
+        return self.client.presigned_get_object(bucket_name=self.bucket_name, object_name=name, expires=expires)
+
+    @translate_errors
+    def presign_put(self, name: str, expires: timedelta = timedelta(days=7)) -> str:
+        return self.client.presigned_put_object(bucket_name=self.bucket_name, object_name=name, expires=expires)
@@ -1,39 +1,395 @@
 import io
-from minio.error import S3Error
+import time
+import hashlib
+import asyncio
+from collections import OrderedDict
+from datetime import timedelta
+from typing import AsyncIterator, Optional, Sequence
 from fastapi import HTTPException
 
-from private_api.config import client, bucket_name
+from private_api.config import (
+    storage, stream_chunk_size, max_upload_size, presign_expires, presign_refresh_margin, presign_miss_ttl,
+    presign_cache_max_size, upload_url_expires, remove_batch_size, storage_executor, upload_executor, derived_prefix,
+    derivative_sizes, derivative_quality, get_derivative_executor
+)
+from private_api.derivatives import DERIVATIVE_CONTENT_TYPE, derived_name, render_derivatives
+from private_api.metrics import DERIVATIVE_LATENCY, UPLOAD_BYTES
+from private_api.storage.base import StorageError, ObjectNotFound, InvalidObjectName, ObjectReader
+
+
+class StreamReader:
+    """File-like wrapper that lets a synchronous storage backend read an async byte stream.
+
+    `read` is called from a worker thread and pulls the next chunk from the event loop,
+    so only the current chunk (and the backend's own part buffer) is ever held in memory.
+    A stream longer than `max_size` fails with 413 as soon as it crosses the limit.
+    """
+
+    def __init__(self, chunks: AsyncIterator[bytes], loop: asyncio.AbstractEventLoop, max_size: Optional[int] = None):
+        self._chunks = chunks.__aiter__()
+        self._loop = loop
+        self._buffer = b""
+        self._eof = False
+        self.max_size = max_size
+        self.size = 0
+        self.digest = hashlib.sha256()
+
+    async def _next_chunk(self) -> Optional[bytes]:
+        return await anext(self._chunks, None)
+
+    def read(self, size: int = -1) -> bytes:
+        while not self._buffer and not self._eof:
+            chunk = asyncio.run_coroutine_threadsafe(self._next_chunk(), self._loop).result()
+            if chunk is None:
+                self._eof = True
+            else:
+                self._buffer = chunk
+                self.size += len(chunk)
+                if self.max_size is not None and self.size > self.max_size:
+                    raise HTTPException(status_code=413, detail=f"Object is larger than {self.max_size} bytes")
+                self.digest.update(chunk)
+                UPLOAD_BYTES.inc(len(chunk))
+
+        if size < 0 or size >= len(self._buffer):
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+class PresignCache:
+    """LRU of presigned GET URLs, kept until `refresh_margin` seconds before they expire.
+
+    Objects found missing are remembered for `miss_ttl` seconds as `MISSING`. At most `max_size`
+    entries are kept, the least recently used are dropped first.
+    """
+
+    MISSING = ""
+
+    def __init__(self, expires: int, refresh_margin: int, miss_ttl: int = 60, max_size: int = 100_000):
+        self.expires = expires
+        self.refresh_margin = refresh_margin
+        self.miss_ttl = miss_ttl
+        self.max_size = max_size
+        self._urls: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+    def get(self, filename: str) -> Optional[str]:
+        """The cached URL, `MISSING` for an object known not to exist, or `None` when nothing is cached."""
+        entry = self._urls.get(filename)
+        if entry is None:
+            return None
+
+        valid_until, url = entry
+        if valid_until <= time.monotonic():
+            del self._urls[filename]
+            return None
+
+        self._urls.move_to_end(filename)
+        return url
+
+    def _store(self, filename: str, valid_until: float, url: str):
+        if self.max_size <= 0:
+            return
+
+        self._urls[filename] = (valid_until, url)
+        self._urls.move_to_end(filename)
+        while len(self._urls) > self.max_size:
+            self._urls.popitem(last=False)
+
+    def set(self, filename: str, url: str):
+        self._store(filename, time.monotonic() + self.expires - self.refresh_margin, url)
+
+    def set_missing(self, filename: str):
+        self._store(filename, time.monotonic() + self.miss_ttl, self.MISSING)
+
+    def __len__(self) -> int:
+        return len(self._urls)
+
+    def discard(self, filename: str):
+        self._urls.pop(filename, None)
+
+    def clear(self):
+        self._urls.clear()
+
+
+presign_cache = PresignCache(
+    expires=presign_expires, refresh_margin=presign_refresh_margin, miss_ttl=presign_miss_ttl,
+    max_size=presign_cache_max_size
+)
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[tuple[int, int]]:
+    """Turn a single-range `Range` header into inclusive `(start, end)` offsets.
+
+    Headers this service does not support (other units, several ranges, bad syntax) are ignored
+    and the whole object is served, as RFC 9110 allows. Unsatisfiable ranges raise 416.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            start = size - int(last)
+            end = size - 1
+    except ValueError:
+        return None
+
+    if first and last and end < start:
+        return None
+    if start >= size or (not first and int(last) == 0):
+        raise HTTPException(status_code=416, detail="Requested range not satisfiable",
+                            headers={"Content-Range": f"bytes */{size}"})
+    return max(start, 0), min(end, size - 1)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
 
 
 class MinioUtils:
     @classmethod
     async def upload_file(cls, filename: str, file_data: bytes) -> str:
+        UPLOAD_BYTES.inc(len(file_data))
         try:
-            client.put_object(
-                bucket_name=bucket_name,
-                object_name=filename,
-                data=io.BytesIO(file_data),
-                length=len(file_data),
-                content_type="application/octet-stream"
-            )
-            image_url = client.presigned_get_object(
-                bucket_name=bucket_name,
-                object_name=filename
-            )
+            await storage_executor.run(storage.put, filename, io.BytesIO(file_data), len(file_data))
+            image_url = await storage_executor.run(storage.presign_get, filename)
             return image_url
 
-        except S3Error as err:
-            raise HTTPException(status_code=500, detail=f"Error while working with MinIO: {str(err)}")
+        except InvalidObjectName as err:
+            raise HTTPException(status_code=400, detail=str(err))
+        except StorageError as err:
+            raise HTTPException(status_code=500, detail=f"Error while working with storage: {str(err)}")
+        except Exception as err:
+            raise HTTPException(status_code=500, detail=f"Internal server error: {str(err)}")
+
+    @classmethod
+    async def upload_stream(cls, filename: str, chunks: AsyncIterator[bytes],
+                            content_type: Optional[str] = None, sha256: Optional[str] = None) -> str:
+        try:
+            reader = StreamReader(chunks, asyncio.get_running_loop(), max_size=max_upload_size)
+            await upload_executor.run(storage.put, filename, reader, -1, content_type)
+            if sha256 and reader.digest.hexdigest() != sha256:
+                await storage_executor.run(storage.remove, filename)
+                raise HTTPException(status_code=400, detail="Uploaded data does not match its sha256 checksum")
+
+            image_url = await storage_executor.run(storage.presign_get, filename)
+            return image_url
+
+        except HTTPException:
+            raise
+        except InvalidObjectName as err:
+            raise HTTPException(status_code=400, detail=str(err))
+        except StorageError as err:
+            raise HTTPException(status_code=500, detail=f"Error while working with storage: {str(err)}")
+        except Exception as err:
+            raise HTTPException(status_code=500, detail=f"Internal server error: {str(err)}")
+
+    @classmethod
+    def _sign(cls, filenames: list[str]) -> dict[str, str]:
+        return {filename: storage.presign_get(filename, timedelta(seconds=presign_expires)) for filename in filenames}
+
+    @classmethod
+    def _exists(cls, filename: str) -> bool:
+        try:
+            storage.stat(filename)
+        except ObjectNotFound:
+            return False
+        return True
+
+    @classmethod
+    async def presign_files(cls, filenames: list[str], existing_only: Sequence[str] = ()) -> dict[str, str]:
+        """Sign `filenames`, and those of `existing_only` that exist; missing ones are left out of the result."""
+        check = frozenset(existing_only).difference(filenames)
+        urls = {}
+        missing = []
+        for filename in dict.fromkeys([*filenames, *existing_only]):
+            url = presign_cache.get(filename)
+            if url is None or (url == presign_cache.MISSING and filename not in check):
+                missing.append(filename)
+            elif url != presign_cache.MISSING:
+                urls[filename] = url
+
+        if not missing:
+            return urls
+
+        try:
+            # One stat per unknown object, run side by side rather than one after another
+            checked = [filename for filename in missing if filename in check]
+            exists = await asyncio.gather(*(storage_executor.run(cls._exists, filename) for filename in checked))
+            absent = {filename for filename, found in zip(checked, exists) if not found}
+            signed = await storage_executor.run(cls._sign, [filename for filename in missing if filename not in absent])
+
+        except StorageError as err:
+            raise HTTPException(status_code=500, detail=f"Error while working with storage: {str(err)}")
+        except Exception as err:
+            raise HTTPException(status_code=500, detail=f"Internal server error: {str(err)}")
+
+        for filename in missing:
+            if filename in signed:
+                presign_cache.set(filename, signed[filename])
+            else:
+                presign_cache.set_missing(filename)
+        urls.update(signed)
+        return urls
+
+    @classmethod
+    async def presign_upload(cls, filename: str) -> str:
+        try:
+            return await storage_executor.run(storage.presign_put, filename, timedelta(seconds=upload_url_expires))
+
+        except StorageError as err:
+            raise HTTPException(status_code=500, detail=f"Error while working with storage: {str(err)}")
+        except Exception as err:
+            raise HTTPException(status_code=500, detail=f"Internal server error: {str(err)}")
+
+    @classmethod
+    def verify_url(cls, method: str, filename: str, expires_at: int, signature: str) -> bool:
+        return storage.verify_url(method, filename, expires_at, signature)
+
+    @classmethod
+    async def stat_file(cls, filename: str) -> dict:
+        try:
+            stat = await storage_executor.run(storage.stat, filename)
+            return {
+                "size": stat.size,
+                "content_type": stat.content_type,
+                "etag": stat.etag,
+                "last_modified": stat.last_modified.isoformat() if stat.last_modified else None
+            }
+
+        except ObjectNotFound:
+            raise HTTPException(status_code=404, detail="Object not found")
+        except InvalidObjectName as err:
+            raise HTTPException(status_code=400, detail=str(err))
+        except StorageError as err:
+            raise HTTPException(status_code=500, detail=f"Error while working with storage: {str(err)}")
+        except Exception as err:
+            raise HTTPException(status_code=500, detail=f"Internal server error: {str(err)}")
+
+    @classmethod
+    async def _iter_reader(cls, reader: ObjectReader) -> AsyncIterator[bytes]:
+        try:
+            while (chunk := await storage_executor.run(next, reader, None)) is not None:
+                yield chunk
+        finally:
+            reader.close()
+
+    @classmethod
+    async def open_file(cls, filename: str, offset: int = 0, length: int = 0) -> AsyncIterator[bytes]:
+        """Open `length` bytes of the object from `offset` (the whole rest when `length` is 0).
+
+        The returned iterator reads one `stream_chunk_size` chunk per executor call, so an object is never
+        held in memory. The object is released once the iterator is exhausted or closed.
+        """
+        try:
+            reader = await storage_executor.run(storage.get, filename, offset, length, stream_chunk_size)
+            return cls._iter_reader(reader)
+
+        except ObjectNotFound:
+            raise HTTPException(status_code=404, detail="Object not found")
+        except InvalidObjectName as err:
+            raise HTTPException(status_code=400, detail=str(err))
+        except StorageError as err:
+            raise HTTPException(status_code=500, detail=f"Error while working with storage: {str(err)}")
         except Exception as err:
             raise HTTPException(status_code=500, detail=f"Internal server error: {str(err)}")
 
     @classmethod
     async def remove_file(cls, filename: str):
         try:
-            client.remove_object(bucket_name, filename)
+            await storage_executor.run(storage.remove, filename)
+            presign_cache.discard(filename)
+            await cls._remove_derivatives([filename])
             return {"status": "success"}
 
-        except S3Error as err:
-            raise HTTPException(status_code=500, detail=f"Error while working with MinIO: {str(err)}")
+        except StorageError as err:
+            raise HTTPException(status_code=500, detail=f"Error while working with storage: {str(err)}")
+        except Exception as err:
+            raise HTTPException(status_code=500, detail=f"Internal server error: {str(err)}")
+
+    @classmethod
+    def derived_names(cls, filename: str) -> list[str]:
+        return [derived_name(derived_prefix, derivative, filename) for derivative in derivative_sizes]
+
+    @classmethod
+    async def create_derivatives(cls, filename: str) -> list[str]:
+        """Render every derivative of `filename` on the process pool and store them next to it."""
+        try:
+            data = await storage_executor.run(storage.read, filename)
+            with DERIVATIVE_LATENCY.time():
+                rendered = await asyncio.get_running_loop().run_in_executor(
+                    get_derivative_executor(), render_derivatives, data, derivative_sizes, derivative_quality
+                )
+
+            names = {derivative: derived_name(derived_prefix, derivative, filename) for derivative in rendered}
+            await asyncio.gather(*(
+                storage_executor.run(
+                    storage.put, names[derivative], io.BytesIO(payload), len(payload), DERIVATIVE_CONTENT_TYPE
+                )
+                for derivative, payload in rendered.items()
+            ))
+            for name in names.values():
+                presign_cache.discard(name)
+            return list(names.values())
+
+        except StorageError as err:
+            raise HTTPException(status_code=500, detail=f"Error while working with storage: {str(err)}")
+        except Exception as err:
+            raise HTTPException(status_code=500, detail=f"Internal server error: {str(err)}")
+
+    @classmethod
+    async def _remove_derivatives(cls, filenames: list[str]):
+        derived = [name for filename in filenames for name in cls.derived_names(filename)]
+        try:
+            errors = await storage_executor.run(storage.remove_many, derived)
+        except Exception as err:
+            print(f"Failed to remove derivatives: {err}")
+            return
+
+        for name in derived:
+            presign_cache.discard(name)
+        for name, message in errors.items():
+            print(f"Failed to remove derivative {name}: {message}")
+
+    @classmethod
+    async def remove_files(cls, filenames: list[str]) -> dict:
+        filenames = list(dict.fromkeys(filenames))
+        try:
+            batches = [filenames[start:start + remove_batch_size]
+                       for start in range(0, len(filenames), remove_batch_size)]
+            results = await asyncio.gather(*(storage_executor.run(storage.remove_many, batch) for batch in batches))
+
+        except StorageError as err:
+            raise HTTPException(status_code=500, detail=f"Error while working with storage: {str(err)}")
+        except Exception as err:
+            raise HTTPException(status_code=500, detail=f"Internal server error: {str(err)}")
+
+        errors = {name: message for result in results for name, message in result.items()}
+        for filename in filenames:
+            if filename not in errors:
+                presign_cache.discard(filename)
+        await cls._remove_derivatives([filename for filename in filenames if filename not in errors])
+
+        return {
+            "deleted": [filename for filename in filenames if filename not in errors],
+            "errors": errors
+        }
+
+    @classmethod
+    async def list_files(cls, start_after: Optional[str] = None, limit: int = 1000) -> list[dict]:
+        try:
+            objects = await storage_executor.run(storage.list, start_after, limit)
+            return [{"name": obj.name, "last_modified": obj.last_modified.isoformat()} for obj in objects]
+
+        except StorageError as err:
+            raise HTTPException(status_code=500, detail=f"Error while working with storage: {str(err)}")
         except Exception as err:
             raise HTTPException(status_code=500, detail=f"Internal server error: {str(err)}")
@@ -0,0 +1,85 @@
+"""Warm-up after startup and the `/healthz` and `/readyz` probes.
+
+The bucket check no longer blocks the event loop at startup: it runs on the storage executor, which
+also opens the first storage connection, while the derivative worker processes are spawned (and
+import Pillow) ahead of the first upload. `/readyz` reports `503` until all of that is done. Storage
+that is not reachable yet (MinIO still booting) is retried with backoff instead of failing the warm-up.
+"""
+import asyncio
+import time
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from private_api.config import (
+    create_bucket, storage_executor, derivatives_enabled, get_derivative_executor, derivative_workers,
+    warmup_retry_base, warmup_retry_max
+)
+from private_api.derivatives import derivatives_available
+
+
+class Readiness:
+    def __init__(self):
+        self.ready = False
+        self.status = "starting"
+
+    def set_ready(self):
+        self.ready = True
+        self.status = "ready"
+
+    def set_not_ready(self, status: str):
+        self.ready = False
+        self.status = status
+
+
+readiness = Readiness()
+
+
+async def warm_up_derivative_workers(workers: int = derivative_workers):
+    """Keep `workers` tasks in flight at once, so the pool starts every worker process."""
+    loop, executor = asyncio.get_running_loop(), get_derivative_executor()
+    await asyncio.gather(*(loop.run_in_executor(executor, derivatives_available) for _ in range(workers)))
+
+
+async def ensure_bucket(base: float = warmup_retry_base, maximum: float = warmup_retry_max):
+    """Create the bucket, retrying any error with exponential backoff until it succeeds."""
+    attempts = 0
+    while True:
+        try:
+            await storage_executor.run(create_bucket)
+            print("Bucket has been created")
+            return
+
+        except Exception as err:
+            attempts += 1
+            delay = min(base * 2 ** (attempts - 1), maximum)
+            readiness.set_not_ready("waiting for storage")
+            print(f"Something went wrong while bucket creating (attempt {attempts}), retrying in {delay:g}s: {err}")
+            await asyncio.sleep(delay)
+
+
+async def warm_up():
+    started_at = time.perf_counter()
+
+    await ensure_bucket()
+
+    if derivatives_enabled and derivatives_available():
+        try:
+            await warm_up_derivative_workers()
+        except Exception as err:
+            print(f"Derivative workers warm-up failed: {err}")
+
+    readiness.set_ready()
+    print(f"Warm-up finished in {time.perf_counter() - started_at:.2f}s")
+
+
+router = APIRouter(tags=["Health"])
+
+
+@router.get("/healthz")
+async def healthz() -> dict:
+    return {"status": "ok"}
+
+
+@router.get("/readyz")
+async def readyz() -> JSONResponse:
+    return JSONResponse({"status": readiness.status}, status_code=200 if readiness.ready else 503)
@@ -0,0 +1,112 @@
+import re
+from typing import Optional
+from fastapi import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from public_api.metrics import UPLOAD_BYTES_IN_FLIGHT, UPLOADS_IN_FLIGHT, UPLOADS_REJECTED
+from public_api.settings import UPLOAD_BUDGET_BYTES, UPLOAD_MAX_CONCURRENCY, UPLOAD_MAX_REQUEST_SIZE, UPLOAD_RETRY_AFTER
+
+
+UPLOAD_ROUTES = (
+    ("POST", re.compile(r"/memes/?")),
+    ("POST", re.compile(r"/memes/batch/?")),
+    ("PUT", re.compile(r"/memes/[^/]+/?")),
+)
+
+
+class UploadBudget:
+    """Bytes and uploads currently admitted. Everything runs on the event loop, so no lock is needed."""
+
+    def __init__(self, max_bytes: int, max_uploads: int):
+        self.max_bytes = max_bytes
+        self.max_uploads = max_uploads
+        self.bytes = 0
+        self.uploads = 0
+
+    def try_acquire(self, size: int) -> bool:
+        if self.uploads >= self.max_uploads or self.bytes + size > self.max_bytes:
+            return False
+        self.bytes += size
+        self.uploads += 1
+        return True
+
+    def release(self, size: int):
+        self.bytes -= size
+        self.uploads -= 1
+
+
+upload_budget = UploadBudget(max_bytes=UPLOAD_BUDGET_BYTES, max_uploads=UPLOAD_MAX_CONCURRENCY)
+UPLOAD_BYTES_IN_FLIGHT.set_function(lambda: upload_budget.bytes)
+UPLOADS_IN_FLIGHT.set_function(lambda: upload_budget.uploads)
+
+
+class AdmissionMiddleware:
+    """Admits an upload only if its size fits into the in-flight budget, before any of its body is read.
+
+    A request reserves its `Content-Length`, or `max_request_size` when it has none, and is refused with
+    `429` and `Retry-After` instead of waiting when the budget or the upload slots are used up. Bodies
+    larger than `max_request_size` get a `413`, up front when declared and as soon as the limit is
+    crossed otherwise.
+    """
+
+    def __init__(self, app: ASGIApp, budget: UploadBudget = upload_budget,
+                 max_request_size: int = UPLOAD_MAX_REQUEST_SIZE, retry_after: int = UPLOAD_RETRY_AFTER,
+                 routes: tuple[tuple[str, re.Pattern], ...] = UPLOAD_ROUTES):
+        self.app = app
+        self.budget = budget
+        self.max_request_size = max_request_size
+        self.retry_after = retry_after
+        self.routes = routes
+
+    def _is_upload(self, scope: Scope) -> bool:
+        return any(scope["method"] == method and pattern.fullmatch(scope["path"]) for method, pattern in self.routes)
+
+    @staticmethod
+    def _content_length(scope: Scope) -> Optional[int]:
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                try:
+                    return int(value)
+                except ValueError:
+                    return None
+        return None
+
+    async def _reject(self, scope: Scope, receive: Receive, send: Send, status_code: int, reason: str, detail: str):
+        UPLOADS_REJECTED.labels(reason=reason).inc()
+        headers = {"Retry-After": str(self.retry_after)} if status_code == 429 else None
+        await JSONResponse({"detail": detail}, status_code=status_code, headers=headers)(scope, receive, send)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self._is_upload(scope):
+            await self.app(scope, receive, send)
+            return
+
+        content_length = self._content_length(scope)
+        if content_length is not None and content_length > self.max_request_size:
+            await self._reject(scope, receive, send, 413, "too_large",
+                               f"Request body is larger than {self.max_request_size} bytes")
+            return
+
+        reserved = content_length if content_length is not None else self.max_request_size
+        if not self.budget.try_acquire(reserved):
+            await self._reject(scope, receive, send, 429, "busy", "Too many uploads in progress, retry later")
+            return
+
+        received = 0
+
+        async def receive_wrapper() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_request_size:
+                    UPLOADS_REJECTED.labels(reason="too_large").inc()
+                    raise HTTPException(status_code=413,
+                                        detail=f"Request body is larger than {self.max_request_size} bytes")
+            return message
+
+        try:
+            await self.app(scope, receive_wrapper, send)
+        finally:
+            self.budget.release(reserved)
@@ -1,8 +1,20 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
 
+from public_api.admission import AdmissionMiddleware
 from public_api.database.config import create_database, create_tables, delete_tables
+from public_api.database.readers import meme_reader
+from public_api.database.routing import ReadYourWritesMiddleware, replica_router
+from public_api.deletions import run_worker as run_deletion_worker
+from public_api.metrics import MetricsMiddleware, metrics
+from public_api.reconcile import run_periodically
+from public_api.repository import MemeRepository
 from public_api.routes import router as memes_router
+from public_api.thumbnails import run_worker as run_thumbnail_worker
+from public_api.settings import RECONCILE_INTERVAL, DELETION_POLL_INTERVAL, THUMBNAIL_POLL_INTERVAL, DERIVATIVES_ENABLED
+from public_api.utils import create_http_client
+from public_api.warmup import readiness, warm_up, router as health_router
 
 
 @asynccontextmanager
@@ -10,11 +22,34 @@ async def lifespan(app: FastAPI):
     await create_database()
     await create_tables()
     print("Tables have been created")
+    MemeRepository.http_client = create_http_client()
+    background_tasks = [asyncio.create_task(warm_up(MemeRepository.http_client))]
+    if RECONCILE_INTERVAL > 0:
+        background_tasks.append(asyncio.create_task(run_periodically(MemeRepository.http_client)))
+    if DELETION_POLL_INTERVAL > 0:
+        background_tasks.append(asyncio.create_task(run_deletion_worker(MemeRepository.http_client)))
+    if DERIVATIVES_ENABLED and THUMBNAIL_POLL_INTERVAL > 0:
+        background_tasks.append(asyncio.create_task(run_thumbnail_worker(MemeRepository.http_client)))
     yield
+    readiness.set_not_ready("shutting down")
+    for task in background_tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    await MemeRepository.http_client.aclose()
+    MemeRepository.http_client = None
+    if meme_reader is not None:
+        await meme_reader.close()
+    await replica_router.close()
     await delete_tables()
     print("Tables have been deleted")
 
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(AdmissionMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_route("/metrics", metrics, include_in_schema=False)
 
+app.include_router(health_router)
 app.include_router(memes_router)
@@ -0,0 +1,175 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Optional
+
+from public_api.settings import MEME_CACHE_MAX_SIZE, MEME_CACHE_TTL
+
+
+class CacheBackend(ABC):
+    """Storage interface for `MemeCache`.
+
+    Methods are async so a backend shared across workers (e.g. Redis) can be plugged in
+    without touching the callers.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: Any):
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    async def get_counter(self, key: str) -> int:
+        ...
+
+    @abstractmethod
+    async def incr(self, key: str) -> int:
+        ...
+
+    @abstractmethod
+    async def clear(self):
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+
+class LRUCacheBackend(CacheBackend):
+    """In-process LRU with a per-entry TTL. Counters are kept apart so they are never evicted."""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._counters: dict[str, int] = {}
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any):
+        if self.max_size <= 0:
+            return
+
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    async def get_counter(self, key: str) -> int:
+        return self._counters.get(key, 0)
+
+    async def incr(self, key: str) -> int:
+        self._counters[key] = self._counters.get(key, 0) + 1
+        return self._counters[key]
+
+    async def clear(self):
+        self._entries.clear()
+        self._counters.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class MemeCache:
+    """Read-through cache for meme metadata.
+
+    Single memes are keyed by id and dropped on write. List pages and the exact count
+    are keyed by a generation number that every write bumps, so stale pages are never
+    read again and simply age out of the backend. The estimated count only expires.
+    """
+
+    GENERATION_KEY = "memes:generation"
+    ESTIMATED_COUNT_KEY = "memes:count:estimated"
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    async def _get(self, key: str) -> Optional[Any]:
+        value = await self.backend.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    @staticmethod
+    def meme_key(meme_id: int) -> str:
+        return f"meme:{meme_id}"
+
+    async def page_key(self, offset: int, limit: int, after_id: Optional[int]) -> str:
+        generation = await self.backend.get_counter(self.GENERATION_KEY)
+        return f"memes:{generation}:{offset}:{limit}:{after_id}"
+
+    async def count_key(self, exact: bool) -> str:
+        if not exact:
+            return self.ESTIMATED_COUNT_KEY
+        generation = await self.backend.get_counter(self.GENERATION_KEY)
+        return f"memes:{generation}:count"
+
+    async def get_meme(self, meme_id: int) -> Optional[Any]:
+        return await self._get(self.meme_key(meme_id))
+
+    async def set_meme(self, meme_id: int, meme: Any):
+        await self.backend.set(self.meme_key(meme_id), meme)
+
+    async def get_page(self, key: str) -> Optional[Any]:
+        return await self._get(key)
+
+    async def set_page(self, key: str, memes: Any):
+        await self.backend.set(key, memes)
+
+    async def get_count(self, key: str) -> Optional[int]:
+        return await self._get(key)
+
+    async def set_count(self, key: str, count: int):
+        await self.backend.set(key, count)
+
+    async def invalidate_lists(self):
+        await self.backend.incr(self.GENERATION_KEY)
+
+    async def invalidate_meme(self, meme_id: int):
+        await self.backend.delete(self.meme_key(meme_id))
+        await self.invalidate_lists()
+
+    async def invalidate_memes(self, meme_ids: list[int]):
+        for meme_id in meme_ids:
+            await self.backend.delete(self.meme_key(meme_id))
+        await self.invalidate_lists()
+
+    async def clear(self):
+        await self.backend.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.backend)
+        }
+
+
+meme_cache = MemeCache(LRUCacheBackend(max_size=MEME_CACHE_MAX_SIZE, ttl=MEME_CACHE_TTL))
@@ -1,11 +1,14 @@
 import asyncpg
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
-from public_api.settings import DB_URL, POSTGRES_USER, POSTGRES_PASSWORD, POSTGRES_HOST, POSTGRES_PORT, POSTGRES_NAME
+from public_api.settings import (
+    DB_URL, DB_POOL_SIZE, POSTGRES_USER, POSTGRES_PASSWORD, POSTGRES_HOST, POSTGRES_PORT, POSTGRES_NAME
+)
 from public_api.database.models import Model
 
 
-engine = create_async_engine(DB_URL, pool_size=50, max_overflow=0)
+engine = create_async_engine(DB_URL, pool_size=DB_POOL_SIZE, max_overflow=0)
 new_session = async_sessionmaker(engine, expire_on_commit=False)
 
 
@@ -28,6 +31,7 @@ async def create_database():
 
 async def create_tables():
     async with engine.begin() as conn:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
         await conn.run_sync(Model.metadata.create_all)
 
 
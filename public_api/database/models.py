@@ -1,14 +1,25 @@
-from sqlalchemy import DateTime
+from typing import Optional
+from sqlalchemy import DateTime, Computed, Index, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 from datetime import datetime
 
 
+SEARCH_CONFIG = "simple"
+
+
 class Model(DeclarativeBase):
     pass
 
 
 class Memes(Model):
     __tablename__ = "memes"
+    __table_args__ = (
+        Index("ix_memes_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_memes_meme_name_trgm", "meme_name", postgresql_using="gin",
+              postgresql_ops={"meme_name": "gin_trgm_ops"}),
+        Index("ix_memes_thumbnail_pending", "date_updated", postgresql_where=text("has_thumbnail IS NULL")),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     meme_name: Mapped[str] = mapped_column(index=True, unique=True, nullable=False)
@@ -18,6 +29,17 @@ class Memes(Model):
     date_added: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
     date_updated: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow,
                                                    nullable=False)
+    # Whether the private service has rendered the image's thumbnail; `None` until `public_api.thumbnails` checks
+    has_thumbnail: Mapped[Optional[bool]] = mapped_column(nullable=True)
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(meme_name, '')), 'A') || "
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(text, '')), 'B')",
+            persisted=True
+        ),
+        deferred=True
+    )
 
     def __repr__(self):
         return (
@@ -25,3 +47,47 @@ class Memes(Model):
             f"image_url='{self.image_url}', text='{self.text}...', date_added='{self.date_added}', "
             f"date_updated='{self.date_updated}')>"
         )
+
+
+class MemeObjects(Model):
+    __tablename__ = "meme_objects"
+
+    hash: Mapped[str] = mapped_column(primary_key=True)
+    refcount: Mapped[int] = mapped_column(default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<MemeObjects(hash='{self.hash}', refcount={self.refcount})>"
+
+
+class MemeUploads(Model):
+    __tablename__ = "meme_uploads"
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    meme_name: Mapped[str] = mapped_column(nullable=False)
+    filename: Mapped[str] = mapped_column(nullable=False)
+    text: Mapped[str] = mapped_column(nullable=False)
+    date_added: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return (
+            f"<MemeUploads(id={self.id}, meme_name='{self.meme_name}', filename='{self.filename}', "
+            f"text='{self.text}...', date_added='{self.date_added}')>"
+        )
+
+
+class ObjectDeletions(Model):
+    """Objects no meme references any more, waiting to be removed from storage by the deletion worker."""
+    __tablename__ = "object_deletions"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    filename: Mapped[str] = mapped_column(unique=True, nullable=False)
+    attempts: Mapped[int] = mapped_column(default=0, nullable=False)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True, nullable=False)
+    last_error: Mapped[Optional[str]] = mapped_column(nullable=True)
+    date_added: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return (
+            f"<ObjectDeletions(id={self.id}, filename='{self.filename}', attempts={self.attempts}, "
+            f"next_attempt_at='{self.next_attempt_at}')>"
+        )
@@ -0,0 +1,104 @@
+"""Read path for the hot read endpoints that goes straight to an asyncpg pool.
+
+`GET /memes` and `GET /memes/{id}` are single-table reads whose rows are returned as plain dicts, so
+SQLAlchemy's session, statement compilation and result wrapping are pure overhead for them. With
+`READ_BACKEND=asyncpg` the repository reads them through `AsyncpgMemeReader` instead: the SQL is written
+once, asyncpg prepares it on first use and keeps it in each connection's statement cache, and records
+are turned into dicts directly. Everything else keeps using the SQLAlchemy engine.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+import asyncpg
+from sqlalchemy.engine import make_url
+
+from public_api.metrics import DB_SESSION_LATENCY, DB_SESSIONS_IN_FLIGHT
+from public_api.settings import DB_URL, READ_BACKEND, READ_POOL_MIN_SIZE, READ_POOL_MAX_SIZE
+
+
+# Everything a read response needs, in response order (`filename` and `has_thumbnail` become URLs)
+MEME_FIELDS = (
+    "id", "meme_name", "filename", "image_url", "text", "date_added", "date_updated", "has_thumbnail"
+)
+
+SELECT_MEMES = f"SELECT {', '.join(MEME_FIELDS)} FROM memes"
+PAGE_QUERY = f"{SELECT_MEMES} ORDER BY id LIMIT $1 OFFSET $2"
+CURSOR_PAGE_QUERY = f"{SELECT_MEMES} WHERE id > $1 ORDER BY id LIMIT $2"
+MEME_QUERY = f"{SELECT_MEMES} WHERE id = $1"
+
+
+def asyncpg_dsn(db_url: str) -> str:
+    """Turn a SQLAlchemy URL (`postgresql+asyncpg://...`) into a DSN asyncpg accepts."""
+    return make_url(db_url).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+class AsyncpgMemeReader:
+    def __init__(self, dsn: str, min_size: int, max_size: int):
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self._pool: Optional[asyncpg.Pool] = None
+        self._lock = asyncio.Lock()
+
+    async def _get_pool(self) -> asyncpg.Pool:
+        if self._pool is None:
+            async with self._lock:
+                if self._pool is None:
+                    self._pool = await asyncpg.create_pool(self.dsn, min_size=self.min_size, max_size=self.max_size)
+        return self._pool
+
+    @asynccontextmanager
+    async def _connection(self, operation: str) -> AsyncIterator[asyncpg.Connection]:
+        pool = await self._get_pool()
+        with DB_SESSIONS_IN_FLIGHT.track_inprogress(), DB_SESSION_LATENCY.labels(operation=operation).time():
+            async with pool.acquire() as connection:
+                yield connection
+
+    async def get_page(self, offset: int, limit: int, after_id: Optional[int] = None) -> list[dict]:
+        async with self._connection("get_memes") as connection:
+            if after_id is not None:
+                records = await connection.fetch(CURSOR_PAGE_QUERY, after_id, limit)
+            else:
+                records = await connection.fetch(PAGE_QUERY, limit, offset)
+        return [dict(record) for record in records]
+
+    async def get_meme(self, meme_id: int) -> Optional[dict]:
+        async with self._connection("load_meme") as connection:
+            record = await connection.fetchrow(MEME_QUERY, meme_id)
+        return dict(record) if record is not None else None
+
+    async def warm_up(self, connections: int):
+        """Run each query once on up to `connections` pool connections, filling their statement caches.
+
+        `Connection.prepare` would bypass the cache that `fetch` uses, so the queries are run instead.
+        """
+        async def run_queries(connection: asyncpg.Connection):
+            await connection.fetch(PAGE_QUERY, 0, 0)
+            await connection.fetch(CURSOR_PAGE_QUERY, 0, 0)
+            await connection.fetchrow(MEME_QUERY, 0)
+
+        pool = await self._get_pool()
+        acquired = [await pool.acquire() for _ in range(min(connections, self.max_size))]
+        try:
+            await asyncio.gather(*(run_queries(connection) for connection in acquired))
+        finally:
+            for connection in acquired:
+                await pool.release(connection)
+
+    async def close(self):
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+
+def create_reader(backend: str, db_url: str = DB_URL) -> Optional[AsyncpgMemeReader]:
+    """The fast reader of `db_url` for `backend`, or `None` when reads should go through SQLAlchemy."""
+    if backend == "sqlalchemy":
+        return None
+    if backend == "asyncpg":
+        return AsyncpgMemeReader(asyncpg_dsn(db_url), min_size=READ_POOL_MIN_SIZE, max_size=READ_POOL_MAX_SIZE)
+
+    raise ValueError(f"Unknown READ_BACKEND {backend!r}, expected 'sqlalchemy' or 'asyncpg'")
+
+
+meme_reader = create_reader(READ_BACKEND)
@@ -0,0 +1,135 @@
+"""Spread reads over read replicas while writes stay on the primary engine from `database.config`.
+
+Replicas listed in `DB_REPLICA_URLS` are used round-robin. A replica that fails to connect is ejected for
+`REPLICA_EJECT_SECONDS` and the read is retried on the primary; once the time is up it is simply tried again.
+
+Replicas lag behind the primary, so with `READ_YOUR_WRITES_SECONDS` set, a client's successful write stamps
+a cookie and that client's reads go to the primary (past the cache) until the window is over.
+"""
+import asyncio
+import time
+from contextvars import ContextVar
+from typing import Optional
+import asyncpg
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from public_api.database.readers import AsyncpgMemeReader, create_reader
+from public_api.metrics import DB_REPLICA_EJECTIONS
+from public_api.settings import (
+    DB_REPLICA_URLS, DB_POOL_SIZE, READ_BACKEND, REPLICA_EJECT_SECONDS, READ_YOUR_WRITES_SECONDS
+)
+
+
+CONNECTION_ERRORS = (
+    OSError, asyncio.TimeoutError, asyncpg.PostgresConnectionError, asyncpg.InterfaceError,
+    asyncpg.OperatorInterventionError
+)
+
+
+def is_connection_error(err: Exception) -> bool:
+    """Whether `err` means the database could not be reached, as opposed to a failed query."""
+    if isinstance(err, DBAPIError):
+        return err.connection_invalidated or isinstance(err, (OperationalError, InterfaceError))
+    return isinstance(err, CONNECTION_ERRORS)
+
+
+class Replica:
+    def __init__(self, name: str, engine: AsyncEngine, reader: Optional[AsyncpgMemeReader] = None):
+        self.name = name
+        self.engine = engine
+        self.new_session = async_sessionmaker(engine, expire_on_commit=False)
+        self.reader = reader
+        self.ejected_until = 0.0
+
+
+class ReplicaRouter:
+    def __init__(self, replicas: list[Replica], eject_seconds: float):
+        self.replicas = replicas
+        self.eject_seconds = eject_seconds
+        self._next = 0
+
+    def pick(self) -> Optional[Replica]:
+        """The next replica in rotation that is not ejected, or `None` to read from the primary."""
+        now = time.monotonic()
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[self._next]
+            self._next = (self._next + 1) % len(self.replicas)
+            if replica.ejected_until <= now:
+                return replica
+        return None
+
+    def eject(self, replica: Replica, err: Exception):
+        replica.ejected_until = time.monotonic() + self.eject_seconds
+        DB_REPLICA_EJECTIONS.labels(replica=replica.name).inc()
+        print(f"Replica {replica.name} is unreachable, reading from the others for {self.eject_seconds}s: {err}")
+
+    async def close(self):
+        for replica in self.replicas:
+            if replica.reader is not None:
+                await replica.reader.close()
+            await replica.engine.dispose()
+
+
+def create_replica(db_url: str) -> Replica:
+    return Replica(
+        name=make_url(db_url).render_as_string(hide_password=True),
+        engine=create_async_engine(db_url, pool_size=DB_POOL_SIZE, max_overflow=0),
+        reader=create_reader(READ_BACKEND, db_url)
+    )
+
+
+replica_router = ReplicaRouter([create_replica(url) for url in DB_REPLICA_URLS], eject_seconds=REPLICA_EJECT_SECONDS)
+
+
+# Until when (unix time) the current request's reads must see the primary
+primary_reads_until: ContextVar[float] = ContextVar("primary_reads_until", default=0.0)
+
+
+def reading_own_writes() -> bool:
+    return primary_reads_until.get() > time.time()
+
+
+LAST_WRITE_COOKIE = "memes_last_write"
+WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+
+class ReadYourWritesMiddleware:
+    """Sends a client's reads to the primary for `window` seconds after its own successful write.
+
+    The time of the write travels in a cookie, so the window holds whichever instance serves the next request.
+    """
+
+    def __init__(self, app: ASGIApp, window: float = READ_YOUR_WRITES_SECONDS):
+        self.app = app
+        self.window = window
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or self.window <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            last_write = float(HTTPConnection(scope).cookies.get(LAST_WRITE_COOKIE, 0))
+        except ValueError:
+            last_write = 0.0
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start" and 200 <= message["status"] < 300:
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Set-Cookie",
+                    f"{LAST_WRITE_COOKIE}={time.time():.3f}; Max-Age={int(self.window) + 1}; Path=/; "
+                    f"HttpOnly; SameSite=Lax"
+                )
+            await send(message)
+
+        token = primary_reads_until.set(last_write + self.window)
+        try:
+            await self.app(scope, receive, send_wrapper if scope["method"] in WRITE_METHODS else send)
+        finally:
+            primary_reads_until.reset(token)
@@ -0,0 +1,97 @@
+"""Remove objects queued in the `object_deletions` outbox from storage.
+
+Requests never wait on storage to delete an image: the transaction that drops the last reference
+also queues the object (`MemeRepository._drop_references`). This worker claims due rows in batches,
+removes them with one bulk call to the private service, and reschedules failures with exponential
+backoff. Claimed rows stay locked until the batch is settled, so a create that takes a new reference
+on the same content (and cancels its pending deletion) waits for the removal instead of losing its object.
+"""
+import asyncio
+from datetime import datetime, timedelta
+import httpx
+from fastapi import HTTPException
+from sqlalchemy import select, delete, update, any_, bindparam, Integer
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from public_api.database.config import new_session
+from public_api.database.models import ObjectDeletions
+from public_api.metrics import OBJECT_DELETIONS
+from public_api.settings import (
+    PRIVATE_SERVICE_URL, DELETION_POLL_INTERVAL, DELETION_BATCH_SIZE, DELETION_RETRY_BASE, DELETION_RETRY_MAX
+)
+from public_api.utils import delete_objects
+
+
+def retry_delay(attempts: int, base: float = DELETION_RETRY_BASE, maximum: float = DELETION_RETRY_MAX) -> float:
+    return min(base * 2 ** (attempts - 1), maximum)
+
+
+async def drain_batch(client: httpx.AsyncClient, batch_size: int = DELETION_BATCH_SIZE) -> dict:
+    """Settle one batch of due deletions and return how many were removed and how many failed."""
+    report = {"claimed": 0, "deleted": 0, "failed": 0}
+
+    async with new_session() as session:
+        async with session.begin():
+            result = await session.execute(
+                select(ObjectDeletions.id, ObjectDeletions.filename, ObjectDeletions.attempts)
+                .where(ObjectDeletions.next_attempt_at <= datetime.utcnow())
+                .order_by(ObjectDeletions.next_attempt_at)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            rows = result.all()
+            if not rows:
+                return report
+            report["claimed"] = len(rows)
+
+            try:
+                removed = await delete_objects(
+                    client=client,
+                    url=f"{PRIVATE_SERVICE_URL}/delete",
+                    filenames=[row.filename for row in rows]
+                )
+                errors = removed["errors"]
+            except Exception as err:
+                detail = err.detail if isinstance(err, HTTPException) else str(err)
+                errors = {row.filename: detail for row in rows}
+
+            done = [row.id for row in rows if row.filename not in errors]
+            if done:
+                await session.execute(
+                    delete(ObjectDeletions).where(ObjectDeletions.id == any_(bindparam("done", done, ARRAY(Integer))))
+                )
+
+            now = datetime.utcnow()
+            failed = [
+                {
+                    "id": row.id,
+                    "attempts": row.attempts + 1,
+                    "next_attempt_at": now + timedelta(seconds=retry_delay(row.attempts + 1)),
+                    "last_error": errors[row.filename]
+                }
+                for row in rows if row.filename in errors
+            ]
+            if failed:
+                await session.execute(update(ObjectDeletions), failed)
+
+    report["deleted"] = len(done)
+    report["failed"] = len(failed)
+    OBJECT_DELETIONS.labels(result="deleted").inc(len(done))
+    OBJECT_DELETIONS.labels(result="failed").inc(len(failed))
+    return report
+
+
+async def run_worker(client: httpx.AsyncClient, interval: float = DELETION_POLL_INTERVAL,
+                     batch_size: int = DELETION_BATCH_SIZE):
+    """Drain full batches back to back and poll every `interval` seconds once the queue is empty."""
+    while True:
+        try:
+            report = await drain_batch(client, batch_size)
+            if report["failed"]:
+                print(f"Failed to remove {report['failed']} objects, retrying later")
+        except Exception as err:
+            print(f"Object deletion failed: {err}")
+            report = {"claimed": 0}
+
+        if report["claimed"] < batch_size:
+            await asyncio.sleep(interval)
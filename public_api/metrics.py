@@ -0,0 +1,96 @@
+import functools
+import time
+from prometheus_client import (
+    CollectorRegistry, Counter, Gauge, Histogram, ProcessCollector, PlatformCollector, GCCollector,
+    CONTENT_TYPE_LATEST, generate_latest
+)
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+registry = CollectorRegistry()
+ProcessCollector(registry=registry)
+PlatformCollector(registry=registry)
+GCCollector(registry=registry)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Time spent handling HTTP requests", ["method", "route", "status"],
+    registry=registry
+)
+REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests being handled", registry=registry)
+
+DB_SESSION_LATENCY = Histogram(
+    "db_session_duration_seconds", "Time spent inside a database session", ["operation"], registry=registry
+)
+DB_SESSIONS_IN_FLIGHT = Gauge("db_sessions_in_flight", "Open database sessions", registry=registry)
+DB_READS = Counter("db_reads", "Read queries by the database they were sent to", ["target"], registry=registry)
+DB_REPLICA_EJECTIONS = Counter(
+    "db_replica_ejections", "Times a read replica was taken out of rotation", ["replica"], registry=registry
+)
+
+PRIVATE_API_LATENCY = Histogram(
+    "private_api_request_duration_seconds", "Time spent on calls to the private service", ["operation"],
+    registry=registry
+)
+PRIVATE_API_IN_FLIGHT = Gauge("private_api_requests_in_flight", "Calls to the private service", registry=registry)
+
+UPLOAD_BYTES = Counter("upload_bytes", "Image bytes streamed to the private service", registry=registry)
+UPLOAD_BYTES_IN_FLIGHT = Gauge(
+    "upload_bytes_in_flight", "Request bytes reserved by the uploads being handled", registry=registry
+)
+UPLOADS_IN_FLIGHT = Gauge("uploads_in_flight", "Uploads being handled", registry=registry)
+UPLOADS_REJECTED = Counter("uploads_rejected", "Uploads refused by admission control", ["reason"], registry=registry)
+
+OBJECT_DELETIONS = Counter(
+    "object_deletions", "Objects the deletion worker tried to remove from storage", ["result"], registry=registry
+)
+
+
+def timed_private_call(func):
+    """Time an async call to the private service, labelled by the function name."""
+    latency = PRIVATE_API_LATENCY.labels(operation=func.__name__)
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        with PRIVATE_API_IN_FLIGHT.track_inprogress(), latency.time():
+            return await func(*args, **kwargs)
+
+    return wrapper
+
+
+class MetricsMiddleware:
+    """Records latency by route template (not raw path, to keep label cardinality bounded) and status."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            route = scope.get("route")
+            REQUEST_LATENCY.labels(
+                method=scope["method"],
+                route=route.path if route is not None else "unmatched",
+                status=status
+            ).observe(time.perf_counter() - start)
+
+
+async def metrics(request: Request) -> Response:
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,156 @@
+"""Find bucket objects that no meme references and delete them.
+
+Both sides are streamed in byte order (S3 listing order, `COLLATE "C"` on the database side)
+and merge-diffed, so neither the bucket listing nor the filename table is ever held in memory.
+
+Direct upload reservations only count as references while their upload URL may still be used
+(`UPLOAD_URL_EXPIRES` plus the grace period); older ones are abandoned, so their rows are swept
+and their objects become orphans.
+
+Run once from the command line with `python -m public_api.reconcile [--dry-run]`, or let
+the public service run it every `RECONCILE_INTERVAL` seconds.
+"""
+import argparse
+import asyncio
+import json
+from contextlib import aclosing
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator
+import httpx
+from sqlalchemy import select, union, delete
+
+from public_api.database.config import engine, new_session
+from public_api.database.models import Memes, MemeUploads
+from public_api.settings import (
+    PRIVATE_SERVICE_URL, RECONCILE_INTERVAL, RECONCILE_GRACE_PERIOD, RECONCILE_BATCH_SIZE, RECONCILE_DRY_RUN,
+    DERIVED_PREFIX, UPLOAD_URL_EXPIRES
+)
+from public_api.utils import create_http_client, list_objects, delete_objects
+
+
+MISSING_SAMPLE_SIZE = 100
+
+
+async def iter_referenced_filenames(batch_size: int, uploads_after: datetime) -> AsyncIterator[str]:
+    referenced = union(
+        select(Memes.filename),
+        select(MemeUploads.filename).where(MemeUploads.date_added > uploads_after)
+    ).subquery()
+    query = select(referenced.c.filename).order_by(referenced.c.filename.collate("C"))
+
+    async with new_session() as session:
+        result = await session.stream(query.execution_options(yield_per=batch_size))
+        async for filename in result.scalars():
+            yield filename
+
+
+async def sweep_stale_uploads(uploads_after: datetime) -> int:
+    """Delete the upload reservations made before `uploads_after`, returning how many there were."""
+    async with new_session() as session:
+        async with session.begin():
+            result = await session.execute(delete(MemeUploads).where(MemeUploads.date_added <= uploads_after))
+    return result.rowcount
+
+
+async def iter_stored_objects(client: httpx.AsyncClient, batch_size: int) -> AsyncIterator[dict]:
+    start_after = None
+    while True:
+        batch = await list_objects(
+            client=client,
+            url=f"{PRIVATE_SERVICE_URL}/objects",
+            start_after=start_after,
+            limit=batch_size
+        )
+        for stored_object in batch:
+            # Derivatives are removed by the private service together with their source image
+            if not stored_object["name"].startswith(f"{DERIVED_PREFIX}/"):
+                yield stored_object
+
+        if len(batch) < batch_size:
+            return
+        start_after = batch[-1]["name"]
+
+
+async def reconcile(client: httpx.AsyncClient, dry_run: bool = RECONCILE_DRY_RUN,
+                    grace_period: float = RECONCILE_GRACE_PERIOD, batch_size: int = RECONCILE_BATCH_SIZE) -> dict:
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=grace_period)
+    # `MemeUploads.date_added` is naive UTC
+    uploads_after = datetime.utcnow() - timedelta(seconds=UPLOAD_URL_EXPIRES + grace_period)
+    report = {
+        "objects": 0, "orphans": 0, "recent": 0, "deleted": 0, "missing": 0, "missing_sample": [], "errors": {},
+        "stale_uploads": 0
+    }
+    orphans = []
+
+    if not dry_run:
+        report["stale_uploads"] = await sweep_stale_uploads(uploads_after)
+
+    async def flush():
+        filenames = orphans.copy()
+        orphans.clear()
+        if filenames and not dry_run:
+            removed = await delete_objects(client=client, url=f"{PRIVATE_SERVICE_URL}/delete", filenames=filenames)
+            report["deleted"] += len(removed["deleted"])
+            report["errors"].update(removed["errors"])
+
+    async with aclosing(iter_stored_objects(client, batch_size)) as stored_objects, \
+            aclosing(iter_referenced_filenames(batch_size, uploads_after)) as references:
+        stored_object = await anext(stored_objects, None)
+        reference = await anext(references, None)
+
+        while stored_object is not None or reference is not None:
+            if reference is None or (stored_object is not None and stored_object["name"] < reference):
+                report["objects"] += 1
+                if datetime.fromisoformat(stored_object["last_modified"]) > cutoff:
+                    report["recent"] += 1
+                else:
+                    report["orphans"] += 1
+                    orphans.append(stored_object["name"])
+                    if len(orphans) >= batch_size:
+                        await flush()
+                stored_object = await anext(stored_objects, None)
+
+            elif stored_object is None or reference < stored_object["name"]:
+                report["missing"] += 1
+                if len(report["missing_sample"]) < MISSING_SAMPLE_SIZE:
+                    report["missing_sample"].append(reference)
+                reference = await anext(references, None)
+
+            else:
+                report["objects"] += 1
+                stored_object = await anext(stored_objects, None)
+                reference = await anext(references, None)
+
+        await flush()
+
+    return report
+
+
+async def run_periodically(client: httpx.AsyncClient, interval: float = RECONCILE_INTERVAL):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            report = await reconcile(client)
+            print(
+                f"Reconciliation finished: {report['objects']} objects, {report['orphans']} orphans, "
+                f"{report['deleted']} deleted, {report['missing']} missing"
+            )
+        except Exception as err:
+            print(f"Reconciliation failed: {err}")
+
+
+async def main(dry_run: bool, grace_period: float):
+    async with create_http_client() as client:
+        report = await reconcile(client, dry_run=dry_run, grace_period=grace_period)
+    await engine.dispose()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Delete bucket objects that no meme references")
+    parser.add_argument("--dry-run", action="store_true", help="only report orphans, do not delete them")
+    parser.add_argument("--grace-period", type=float, default=RECONCILE_GRACE_PERIOD,
+                        help="skip objects modified less than this many seconds ago")
+    args = parser.parse_args()
+
+    asyncio.run(main(dry_run=args.dry_run or RECONCILE_DRY_RUN, grace_period=args.grace_period))
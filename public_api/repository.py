@@ -1,35 +1,340 @@
-from typing import Optional
-from sqlalchemy import select
+import asyncio
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Optional, TypeVar
+from urllib.parse import quote
+import httpx
+from sqlalchemy import select, delete, update, func, bindparam, any_, or_, and_, literal_column, text, Integer, String
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, UploadFile
 
+from public_api.cache import meme_cache
 from public_api.database.config import new_session
-from public_api.database.models import Memes
-from public_api.schemas import MemeId, MemeBase, MemeFull, MemeDelete
-from public_api.utils import get_image_url, delete_object
-from public_api.settings import PRIVATE_SERVICE_URL
+from public_api.database.models import Memes, MemeObjects, MemeUploads, ObjectDeletions, SEARCH_CONFIG
+from public_api.database.readers import MEME_FIELDS, meme_reader
+from public_api.database.routing import Replica, replica_router, reading_own_writes, is_connection_error
+from public_api.metrics import DB_SESSION_LATENCY, DB_SESSIONS_IN_FLIGHT, DB_READS
+from public_api.schemas import (
+    MemeId, MemeBase, MemeFull, MemeDelete, UploadReserve, UploadTicket, BatchItemResult, BulkDeleteResult
+)
+from public_api.utils import (
+    get_image_url, presign_images, reserve_object, verify_object, stat_object, hash_upload, thumbnail_name,
+    open_object
+)
+from public_api.settings import PRIVATE_SERVICE_URL, BATCH_UPLOAD_CONCURRENCY, UPLOAD_MAX_FILE_SIZE, DERIVATIVES_ENABLED
+
+
+@asynccontextmanager
+async def db_session(operation: str, replica: Optional[Replica] = None) -> AsyncIterator[AsyncSession]:
+    with DB_SESSIONS_IN_FLIGHT.track_inprogress(), DB_SESSION_LATENCY.labels(operation=operation).time():
+        async with (replica.new_session if replica is not None else new_session)() as session:
+            yield session
+
+
+T = TypeVar("T")
+
+
+async def routed_read(read: Callable[[Optional[Replica]], Awaitable[T]]) -> T:
+    """Run `read` on the next healthy replica, or on the primary (`None`) if there is none or it is unreachable.
+
+    Clients inside their read-your-writes window always read from the primary.
+    """
+    replica = None if reading_own_writes() else replica_router.pick()
+    if replica is not None:
+        try:
+            result = await read(replica)
+            DB_READS.labels(target="replica").inc()
+            return result
+        except Exception as err:
+            if not is_connection_error(err):
+                raise
+            replica_router.eject(replica, err)
+
+    result = await read(None)
+    DB_READS.labels(target="primary").inc()
+    return result
+
+
+# Everything a read response needs; the deferred `search_vector` is never loaded.
+MEME_COLUMNS = tuple(getattr(Memes, field) for field in MEME_FIELDS)
+
+# Row density from the last ANALYZE times the table's current size, as the planner estimates it.
+# NULL until the table has been analyzed (or vacuumed) at least once.
+ESTIMATED_COUNT = text(
+    "SELECT CASE WHEN reltuples < 0 OR relpages = 0 THEN NULL "
+    "ELSE (reltuples / relpages * (pg_relation_size(oid) / current_setting('block_size')::int))::bigint END "
+    "FROM pg_class WHERE oid = CAST(:table_name AS regclass)"
+).bindparams(table_name=Memes.__tablename__)
 
 
 class MemeRepository:
+    http_client: Optional[httpx.AsyncClient] = None
+
     @classmethod
-    async def create_meme(cls, image: UploadFile, meme_data: MemeBase) -> MemeId:
+    async def _store_image(cls, image: UploadFile) -> tuple[str, str]:
+        """Take a reference on the image's content-addressed object, uploading it only if it is new.
+
+        Returns the object name (the sha256 of the content) and its URL.
+        """
+        if image.size is not None and image.size > UPLOAD_MAX_FILE_SIZE:
+            raise HTTPException(status_code=413, detail=f"Image is larger than {UPLOAD_MAX_FILE_SIZE} bytes")
+
+        filename = await hash_upload(image)
+
+        async with db_session("store_image") as session:
+            async with session.begin():
+                result = await session.execute(
+                    insert(MemeObjects)
+                    .values(hash=filename, refcount=1)
+                    .on_conflict_do_update(
+                        index_elements=[MemeObjects.hash],
+                        set_={"refcount": MemeObjects.refcount + 1}
+                    )
+                    .returning(MemeObjects.refcount)
+                )
+                refcount = result.scalar_one()
+                # Waits for the deletion worker if it is removing this very object right now
+                await session.execute(delete(ObjectDeletions).where(ObjectDeletions.filename == filename))
+
         try:
-            filename = image.filename
+            if refcount > 1:
+                stored_object = await stat_object(
+                    client=cls.http_client,
+                    url=f"{PRIVATE_SERVICE_URL}/objects/{quote(filename, safe='')}"
+                )
+                if stored_object is not None:
+                    return filename, stored_object["image_url"]
 
             image_url = await get_image_url(
+                client=cls.http_client,
                 url=PRIVATE_SERVICE_URL,
                 image=image,
-                filename=filename
+                filename=filename,
+                sha256=filename
+            )
+            return filename, image_url
+
+        except Exception:
+            await cls._release_image(filename)
+            raise
+
+    @classmethod
+    async def _drop_references(cls, session: AsyncSession, filenames: list[str]) -> list[str]:
+        """Drop one reference per entry in `filenames` and return the objects nobody references any more.
+
+        Released objects are queued in `ObjectDeletions` within the same transaction; the deletion worker
+        removes them from storage. Objects without a `MemeObjects` row predate content addressing and
+        have a single owner.
+        """
+        counts = Counter(filenames)
+        if not counts:
+            return []
+
+        dropped = select(
+            func.unnest(bindparam("hashes", list(counts), type_=ARRAY(String))).label("hash"),
+            func.unnest(bindparam("counts", list(counts.values()), type_=ARRAY(Integer))).label("count")
+        ).subquery()
+        result = await session.execute(
+            update(MemeObjects)
+            .where(MemeObjects.hash == dropped.c.hash)
+            .values(refcount=MemeObjects.refcount - dropped.c.count)
+            .returning(MemeObjects.hash, MemeObjects.refcount)
+        )
+        refcounts = dict(result.all())
+
+        released = [filename for filename in counts if refcounts.get(filename, 0) <= 0]
+        if released:
+            await session.execute(
+                delete(MemeObjects).where(MemeObjects.hash == any_(bindparam("released", released, ARRAY(String))))
+            )
+            await session.execute(
+                insert(ObjectDeletions)
+                .values([{"filename": filename} for filename in released])
+                .on_conflict_do_nothing(index_elements=[ObjectDeletions.filename])
+            )
+        return released
+
+    @classmethod
+    async def _drop_reference(cls, session: AsyncSession, filename: str) -> bool:
+        return filename in await cls._drop_references(session, [filename])
+
+    @classmethod
+    async def _release_image(cls, filename: str):
+        async with db_session("release_image") as session:
+            async with session.begin():
+                await cls._drop_reference(session, filename)
+
+    @classmethod
+    async def create_meme(cls, image: UploadFile, meme_data: MemeBase) -> MemeId:
+        try:
+            filename, image_url = await cls._store_image(image)
+
+            try:
+                async with db_session("create_meme") as session:
+                    async with session.begin():
+                        new_meme = Memes(
+                            meme_name=meme_data.meme_name,
+                            filename=filename,
+                            text=meme_data.text,
+                            image_url=image_url
+                        )
+                        session.add(new_meme)
+            except Exception:
+                await cls._release_image(filename)
+                raise
+
+            await meme_cache.invalidate_lists()
+
+            return MemeId(
+                id=new_meme.id,
+                meme_name=new_meme.meme_name,
+                image_url=new_meme.image_url,
+                text=new_meme.text
+            )
+
+        except HTTPException:
+            raise
+        except Exception as err:
+            raise HTTPException(status_code=500, detail="Meme creation error")
+
+    @classmethod
+    async def _release_images(cls, filenames: list[str]):
+        results = await asyncio.gather(*(cls._release_image(filename) for filename in filenames),
+                                       return_exceptions=True)
+        for filename, result in zip(filenames, results):
+            if isinstance(result, Exception):
+                print(f"Failed to release the image '{filename}': {result}")
+
+    @classmethod
+    async def create_memes(cls, items: list[tuple[UploadFile, MemeBase]]) -> list[BatchItemResult]:
+        semaphore = asyncio.Semaphore(BATCH_UPLOAD_CONCURRENCY)
+
+        async def store(image: UploadFile) -> tuple[str, str]:
+            async with semaphore:
+                return await cls._store_image(image)
+
+        stored = await asyncio.gather(*(store(image) for image, _ in items), return_exceptions=True)
+
+        results: list[Optional[BatchItemResult]] = [None] * len(items)
+        rows: dict[str, tuple[int, dict]] = {}
+        unused_filenames = []
+
+        for index, ((_, meme_data), outcome) in enumerate(zip(items, stored)):
+            if isinstance(outcome, Exception):
+                client_error = isinstance(outcome, HTTPException) and outcome.status_code < 500
+                detail = outcome.detail if client_error else "Image upload error"
+                results[index] = BatchItemResult(index=index, status="failed", detail=detail)
+                continue
+
+            filename, image_url = outcome
+            if meme_data.meme_name in rows:
+                results[index] = BatchItemResult(index=index, status="failed", detail="Duplicate meme_name in batch")
+                unused_filenames.append(filename)
+                continue
+
+            rows[meme_data.meme_name] = (index, {
+                "meme_name": meme_data.meme_name,
+                "filename": filename,
+                "text": meme_data.text,
+                "image_url": image_url
+            })
+
+        inserted = {}
+        insert_error = None
+        if rows:
+            try:
+                async with db_session("create_memes") as session:
+                    async with session.begin():
+                        result = await session.execute(
+                            insert(Memes)
+                            .values([row for _, row in rows.values()])
+                            .on_conflict_do_nothing(index_elements=[Memes.meme_name])
+                            .returning(Memes.id, Memes.meme_name, Memes.image_url, Memes.text)
+                        )
+                        inserted = {row.meme_name: row for row in result}
+            except Exception as err:
+                insert_error = "Meme creation error"
+
+        for meme_name, (index, row) in rows.items():
+            created = inserted.get(meme_name)
+            if created is None:
+                results[index] = BatchItemResult(index=index, status="failed",
+                                                 detail=insert_error or "Meme name already exists")
+                unused_filenames.append(row["filename"])
+            else:
+                results[index] = BatchItemResult(index=index, status="created", meme=MemeId(
+                    id=created.id,
+                    meme_name=created.meme_name,
+                    image_url=created.image_url,
+                    text=created.text
+                ))
+
+        await cls._release_images(unused_filenames)
+        if inserted:
+            await meme_cache.invalidate_lists()
+
+        return results
+
+    @classmethod
+    async def reserve_upload(cls, upload_data: UploadReserve) -> UploadTicket:
+        try:
+            reservation = await reserve_object(
+                client=cls.http_client,
+                url=f"{PRIVATE_SERVICE_URL}/uploads",
+                filename=upload_data.filename
+            )
+
+            async with db_session("reserve_upload") as session:
+                async with session.begin():
+                    upload = MemeUploads(
+                        meme_name=upload_data.meme_name,
+                        filename=reservation["object_name"],
+                        text=upload_data.text
+                    )
+                    session.add(upload)
+
+            return UploadTicket(upload_id=upload.id, upload_url=reservation["upload_url"])
+
+        except Exception as err:
+            raise HTTPException(status_code=500, detail="Upload reservation error")
+
+    @classmethod
+    async def complete_upload(cls, upload_id: int) -> MemeId:
+        async with db_session("complete_upload") as session:
+            upload = await session.get(MemeUploads, upload_id)
+        if not upload:
+            raise HTTPException(status_code=404, detail="Upload not found")
+
+        try:
+            stored_object = await verify_object(
+                client=cls.http_client,
+                url=f"{PRIVATE_SERVICE_URL}/uploads/complete",
+                object_name=upload.filename
             )
+        except HTTPException as err:
+            if err.status_code == 400:
+                async with db_session("complete_upload") as session:
+                    async with session.begin():
+                        await session.execute(delete(MemeUploads).where(MemeUploads.id == upload_id))
+            raise
 
-            async with new_session() as session:
+        try:
+            async with db_session("complete_upload") as session:
                 async with session.begin():
+                    if not await session.get(MemeUploads, upload_id, with_for_update=True):
+                        raise HTTPException(status_code=404, detail="Upload not found")
+
                     new_meme = Memes(
-                        meme_name=meme_data.meme_name,
-                        filename=filename,
-                        text=meme_data.text,
-                        image_url=image_url
+                        meme_name=upload.meme_name,
+                        filename=upload.filename,
+                        text=upload.text,
+                        image_url=stored_object["image_url"]
                     )
                     session.add(new_meme)
+                    await session.execute(delete(MemeUploads).where(MemeUploads.id == upload_id))
+
+            await meme_cache.invalidate_lists()
 
             return MemeId(
                 id=new_meme.id,
@@ -38,93 +343,301 @@ class MemeRepository:
                 text=new_meme.text
             )
 
+        except HTTPException:
+            raise
         except Exception as err:
             raise HTTPException(status_code=500, detail="Meme creation error")
 
+    @staticmethod
+    def _has_thumbnail(meme: dict) -> bool:
+        return bool(meme["filename"] and meme.get("has_thumbnail"))
+
     @classmethod
-    async def get_memes(cls, offset: int, limit: int) -> list[MemeFull]:
-        async with new_session() as session:
-            try:
-                query = select(Memes).offset(offset).limit(limit)
-                result = await session.execute(query)
-                meme_models = result.scalars().all()
-                return [MemeFull.from_orm(meme_model) for meme_model in meme_models]
+    async def _with_fresh_urls(cls, memes: list[dict]) -> list[dict]:
+        """Turn stored rows into response dicts with freshly signed image and thumbnail URLs.
 
+        Both URLs are signed in one call. `thumbnail_url` is only set for rows whose thumbnail is known to
+        exist (`has_thumbnail`, kept by `public_api.thumbnails`), and is `None` with derivatives disabled.
+        If signing fails, the stored URLs are served.
+        """
+        filenames = [meme["filename"] for meme in memes if meme["filename"]]
+        if DERIVATIVES_ENABLED:
+            filenames += [thumbnail_name(meme["filename"]) for meme in memes if cls._has_thumbnail(meme)]
+        urls = {}
+        if filenames:
+            try:
+                urls = await presign_images(
+                    client=cls.http_client,
+                    url=f"{PRIVATE_SERVICE_URL}/presign",
+                    filenames=filenames
+                )
             except Exception as err:
-                raise HTTPException(status_code=500, detail="Error getting the list of memes")
+                print(f"Failed to refresh image urls, serving stored ones: {err}")
+
+        results = []
+        for meme in memes:
+            result = {key: value for key, value in meme.items() if key not in ("filename", "has_thumbnail")}
+            result["image_url"] = urls.get(meme["filename"], meme["image_url"])
+            result["thumbnail_url"] = urls.get(thumbnail_name(meme["filename"])) if cls._has_thumbnail(meme) else None
+            results.append(result)
+        return results
 
     @classmethod
-    async def get_meme(cls, meme_id: int) -> MemeFull:
-        async with new_session() as session:
-            try:
-                meme = await session.get(Memes, meme_id)
-                if not meme:
-                    raise HTTPException(status_code=404, detail="Meme not found")
-                return meme
+    async def _fetch_page(cls, offset: int, limit: int, after_id: Optional[int],
+                          replica: Optional[Replica] = None) -> list[dict]:
+        reader = replica.reader if replica is not None else meme_reader
+        if reader is not None:
+            return await reader.get_page(offset, limit, after_id)
 
-            except HTTPException:
-                raise
-            except Exception as err:
-                raise HTTPException(status_code=500, detail="Meme retrieval error")
+        async with db_session("get_memes", replica) as session:
+            query = select(*MEME_COLUMNS).order_by(Memes.id)
+            if after_id is not None:
+                query = query.where(Memes.id > after_id).limit(limit)
+            else:
+                query = query.offset(offset).limit(limit)
+            result = await session.execute(query)
+            return [dict(row) for row in result.mappings()]
+
+    @classmethod
+    async def get_memes(cls, offset: int, limit: int, after_id: Optional[int] = None) -> list[dict]:
+        """Return a page of memes as plain dicts, ready to be rendered without another round of validation."""
+        cache_key = await meme_cache.page_key(offset, limit, after_id)
+        # The cache may hold a page read from a replica that had not caught up with this client's write yet
+        cached_memes = None if reading_own_writes() else await meme_cache.get_page(cache_key)
+        if cached_memes is not None:
+            return await cls._with_fresh_urls(cached_memes)
+
+        try:
+            memes = await routed_read(lambda replica: cls._fetch_page(offset, limit, after_id, replica))
+        except Exception as err:
+            raise HTTPException(status_code=500, detail="Error getting the list of memes")
+
+        await meme_cache.set_page(cache_key, memes)
+        return await cls._with_fresh_urls(memes)
+
+    @classmethod
+    async def count_memes(cls, exact: bool = False) -> int:
+        """Return the number of memes, estimated from table statistics unless `exact` is set.
+
+        The estimate costs a catalog lookup instead of a scan and is cached until it expires; it falls back to
+        `COUNT(*)` while the table has no statistics yet. Exact counts are cached until the next write.
+        """
+        cache_key = await meme_cache.count_key(exact)
+        count = None if reading_own_writes() else await meme_cache.get_count(cache_key)
+        if count is not None:
+            return count
+
+        async def count_rows(replica: Optional[Replica]) -> int:
+            async with db_session("count_memes", replica) as session:
+                estimated = await session.scalar(ESTIMATED_COUNT) if not exact else None
+                if estimated is not None:
+                    return estimated
+                return await session.scalar(select(func.count()).select_from(Memes))
+
+        try:
+            count = await routed_read(count_rows)
+        except Exception as err:
+            raise HTTPException(status_code=500, detail="Error counting memes")
+
+        await meme_cache.set_count(cache_key, count)
+        return count
+
+    @classmethod
+    async def search_memes(cls, query: str, limit: int, after: Optional[tuple[float, int]] = None) -> list[dict]:
+        """Rank memes by full-text match on name and text, or by trigram similarity / prefix of the name.
+
+        Every branch of the filter is served by a GIN index (`search_vector`, `meme_name gin_trgm_ops`),
+        so only matching rows are ranked. Pages are keyed by `(rank, id)` of the last row.
+        """
+        ts_query = func.websearch_to_tsquery(literal_column(f"'{SEARCH_CONFIG}'::regconfig"), query)
+        prefix = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        rank = func.greatest(
+            func.ts_rank_cd(Memes.search_vector, ts_query),
+            func.similarity(Memes.meme_name, query)
+        )
+
+        statement = (
+            select(*MEME_COLUMNS, rank.label("rank"))
+            .where(or_(
+                Memes.search_vector.op("@@")(ts_query),
+                Memes.meme_name.op("%")(query),
+                Memes.meme_name.ilike(prefix, escape="\\")
+            ))
+            .order_by(rank.desc(), Memes.id)
+            .limit(limit)
+        )
+        if after is not None:
+            after_rank, after_id = after
+            statement = statement.where(or_(rank < after_rank, and_(rank == after_rank, Memes.id > after_id)))
+
+        async def search(replica: Optional[Replica]) -> list[dict]:
+            async with db_session("search_memes", replica) as session:
+                result = await session.execute(statement)
+                return [dict(row) for row in result.mappings()]
+
+        try:
+            memes = await routed_read(search)
+        except Exception as err:
+            raise HTTPException(status_code=500, detail="Meme search error")
+
+        return await cls._with_fresh_urls(memes)
+
+    @classmethod
+    async def _fetch_meme(cls, meme_id: int, replica: Optional[Replica] = None) -> Optional[dict]:
+        reader = replica.reader if replica is not None else meme_reader
+        if reader is not None:
+            return await reader.get_meme(meme_id)
+
+        async with db_session("load_meme", replica) as session:
+            result = await session.execute(select(*MEME_COLUMNS).where(Memes.id == meme_id))
+            meme = result.mappings().one_or_none()
+            return dict(meme) if meme is not None else None
+
+    @classmethod
+    async def _load_meme(cls, meme_id: int) -> dict:
+        cached_meme = None if reading_own_writes() else await meme_cache.get_meme(meme_id)
+        if cached_meme is not None:
+            return cached_meme
+
+        try:
+            meme = await routed_read(lambda replica: cls._fetch_meme(meme_id, replica))
+        except Exception as err:
+            raise HTTPException(status_code=500, detail="Meme retrieval error")
+        if meme is None:
+            raise HTTPException(status_code=404, detail="Meme not found")
+
+        await meme_cache.set_meme(meme_id, meme)
+        return meme
+
+    @classmethod
+    async def get_meme(cls, meme_id: int) -> dict:
+        meme = await cls._load_meme(meme_id)
+        return (await cls._with_fresh_urls([meme]))[0]
+
+    @classmethod
+    async def get_image_name(cls, meme_id: int) -> str:
+        """Object name of the meme's current picture; it changes whenever the picture does."""
+        return (await cls._load_meme(meme_id))["filename"]
+
+    @classmethod
+    async def open_image(cls, filename: str, headers: dict[str, str]) -> httpx.Response:
+        return await open_object(
+            client=cls.http_client,
+            url=f"{PRIVATE_SERVICE_URL}/objects/{quote(filename, safe='')}/content",
+            headers=headers
+        )
 
     @classmethod
     async def update_meme(cls, meme_id: int, image: Optional[UploadFile], meme_data: MemeBase) -> MemeFull:
-        async with new_session() as session:
-            async with session.begin():
-                try:
-                    meme_model = await session.get(Memes, meme_id)
-                    if not meme_model:
-                        raise HTTPException(status_code=404, detail="Meme not found")
+        """Apply the update without holding a connection while a new image is uploaded.
 
-                    update_data = meme_data.dict(exclude_unset=True)
+        The current row is read in one short session and the image is stored with no connection held.
+        The update then only applies if `date_updated` is still what was read; if another update got in
+        between, the new image is released and the caller gets a 409.
+        """
+        changes = {key: value for key, value in meme_data.dict(exclude_unset=True).items() if value is not None}
+        conditions = [Memes.id == meme_id]
+        filename = old_filename = None
 
-                    if image is not None:
-                        filename = image.filename
-                        old_filename = meme_model.filename
+        try:
+            if image is not None:
+                async with db_session("update_meme") as session:
+                    result = await session.execute(
+                        select(Memes.filename, Memes.date_updated).where(Memes.id == meme_id)
+                    )
+                    current = result.mappings().one_or_none()
+                if current is None:
+                    raise HTTPException(status_code=404, detail="Meme not found")
 
-                        image_url = await get_image_url(
-                            url=PRIVATE_SERVICE_URL,
-                            image=image,
-                            filename=filename,
-                            old_filename=old_filename
-                        )
+                old_filename = current["filename"]
+                conditions.append(Memes.date_updated == current["date_updated"])
+                filename, image_url = await cls._store_image(image)
+                changes.update({"filename": filename, "image_url": image_url, "has_thumbnail": None})
 
-                        update_data.update({
-                                "filename": filename,
-                                "image_url": image_url
-                        })
+            async with db_session("update_meme") as session:
+                async with session.begin():
+                    result = await session.execute(
+                        update(Memes).where(*conditions).values(**changes).returning(*MEME_COLUMNS)
+                    )
+                    meme = result.mappings().one_or_none()
+                    if meme is None:
+                        exists = await session.scalar(select(Memes.id).where(Memes.id == meme_id))
+                        if exists is None:
+                            raise HTTPException(status_code=404, detail="Meme not found")
+                        raise HTTPException(status_code=409, detail="Meme was modified concurrently, retry the update")
 
-                    for key, value in update_data.items():
-                        if value is not None:
-                            setattr(meme_model, key, value)
+        except HTTPException:
+            if filename:
+                await cls._release_image(filename)
+            raise
+        except Exception as err:
+            if filename:
+                await cls._release_image(filename)
+            raise HTTPException(status_code=500, detail=f"Unexpected error: {err}")
 
-                    session.add(meme_model)
-                    await session.commit()
+        if old_filename:
+            try:
+                await cls._release_image(old_filename)
+            except Exception as err:
+                print(f"Failed to release the old image '{old_filename}': {err}")
 
-                    return MemeFull.from_orm(meme_model)
+        await meme_cache.invalidate_meme(meme_id)
 
-                except HTTPException as err:
-                    raise
-                except Exception as err:
-                    raise HTTPException(status_code=500, detail=f"Unexpected error: {err}")
+        return MemeFull.model_validate(dict(meme))
 
     @classmethod
     async def delete_meme(cls, meme_id: int) -> MemeDelete:
-        async with new_session() as session:
-            async with session.begin():
-                meme = await session.get(Memes, meme_id)
-                if not meme:
-                    raise HTTPException(status_code=404, detail="Meme not found")
+        """Delete the row and queue its image for removal in one short transaction.
+
+        Storage is not touched here: the deletion worker removes the image after the commit.
+        """
+        try:
+            async with db_session("delete_meme") as session:
+                async with session.begin():
+                    result = await session.execute(
+                        delete(Memes)
+                        .where(Memes.id == meme_id)
+                        .returning(Memes.id, Memes.meme_name, Memes.image_url, Memes.text, Memes.filename)
+                    )
+                    meme = result.mappings().one_or_none()
+                    if meme is None:
+                        raise HTTPException(status_code=404, detail="Meme not found")
+
+                    await cls._drop_reference(session, meme["filename"])
+
+        except HTTPException:
+            raise
+        except Exception as err:
+            raise HTTPException(status_code=500, detail="An unexpected error occurred while deleting the meme")
 
-                filename = meme.filename
+        await meme_cache.invalidate_meme(meme_id)
+
+        return MemeDelete(id=meme["id"], meme_name=meme["meme_name"], image_url=meme["image_url"], text=meme["text"])
+
+    @classmethod
+    async def delete_memes(cls, meme_ids: list[int]) -> list[BulkDeleteResult]:
+        meme_ids = list(dict.fromkeys(meme_ids))
+
+        try:
+            async with db_session("delete_memes") as session:
+                async with session.begin():
+                    result = await session.execute(
+                        delete(Memes)
+                        .where(Memes.id == any_(bindparam("ids", meme_ids, ARRAY(Integer))))
+                        .returning(Memes.id, Memes.filename)
+                    )
+                    deleted = dict(result.all())
+
+                    await cls._drop_references(session, list(deleted.values()))
+
+        except Exception as err:
+            raise HTTPException(status_code=500, detail="An unexpected error occurred while deleting the memes")
 
-                try:
-                    await delete_object(url=f"{PRIVATE_SERVICE_URL}/{filename}")
-                    await session.delete(meme)
-                    await session.commit()
-                    return meme
+        for meme_id in deleted:
+            await meme_cache.invalidate_meme(meme_id)
 
-                except HTTPException as err:
-                    raise HTTPException(status_code=500, detail=f"Meme deletion error: {err.detail}")
-                except Exception as err:
-                    raise HTTPException(status_code=500, detail="An unexpected error occurred while deleting the meme")
+        results = []
+        for meme_id in meme_ids:
+            status = "deleted" if meme_id in deleted else "not_found"
+            results.append(BulkDeleteResult(id=meme_id, status=status))
+        return results
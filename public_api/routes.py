@@ -1,7 +1,16 @@
-from fastapi import APIRouter, Query, UploadFile, File, Form
+from typing import Optional
+from fastapi import APIRouter, Query, UploadFile, File, Form, Request, HTTPException
+from fastapi.responses import StreamingResponse, ORJSONResponse, RedirectResponse
+from starlette.background import BackgroundTask
 
+from public_api.cache import meme_cache
 from public_api.repository import MemeRepository
-from public_api.schemas import MemeId, MemeBase, MemeFull, MemeDelete
+from public_api.schemas import (
+    MemeId, MemeBase, MemeFull, MemeDelete, UploadReserve, UploadTicket, BatchItemResult,
+    MemeIds, BulkDeleteResult, MemeSearchResult
+)
+from public_api.settings import BATCH_MAX_SIZE, IMAGE_CHUNK_SIZE, IMAGE_CACHE_CONTROL
+from public_api.utils import encode_cursor, decode_cursor, encode_search_cursor, decode_search_cursor
 
 
 router = APIRouter(
@@ -23,17 +32,116 @@ async def create_meme(
     return result
 
 
-@router.get("", response_model=list[MemeFull])
+@router.post("/batch", response_model=list[BatchItemResult])
+async def create_memes(
+        images: list[UploadFile] = File(...),
+        texts: list[str] = Form(...),
+        meme_names: list[str] = Form(...)
+) -> list[BatchItemResult]:
+    if not len(images) == len(texts) == len(meme_names):
+        raise HTTPException(status_code=400, detail="images, texts and meme_names must have the same length")
+    if len(images) > BATCH_MAX_SIZE:
+        raise HTTPException(status_code=400, detail=f"A batch can hold at most {BATCH_MAX_SIZE} memes")
+
+    items = [
+        (image, MemeBase(text=text, meme_name=meme_name))
+        for image, text, meme_name in zip(images, texts, meme_names)
+    ]
+    return await MemeRepository.create_memes(items=items)
+
+
+@router.post("/uploads", response_model=UploadTicket)
+async def reserve_upload(upload_data: UploadReserve) -> UploadTicket:
+    return await MemeRepository.reserve_upload(upload_data=upload_data)
+
+
+@router.post("/uploads/{upload_id}/complete", response_model=MemeId)
+async def complete_upload(upload_id: int) -> MemeId:
+    return await MemeRepository.complete_upload(upload_id=upload_id)
+
+
+# Read endpoints return `ORJSONResponse` directly: the repository already hands back plain dicts,
+# so FastAPI skips validating them against `response_model`, which is kept for the OpenAPI schema.
+@router.get("", response_model=list[MemeFull], response_class=ORJSONResponse)
 async def get_memes(
         limit: int = Query(default=5, lte=100),
-        offset: int = Query(default=0)
-) -> list[MemeFull]:
-    return await MemeRepository.get_memes(offset=offset, limit=limit)
+        offset: int = Query(default=0),
+        cursor: Optional[str] = Query(default=None),
+        exact: bool = Query(default=False)
+) -> ORJSONResponse:
+    after_id = decode_cursor(cursor) if cursor else None
+    memes = await MemeRepository.get_memes(offset=offset, limit=limit, after_id=after_id)
+
+    headers = {}
+    # Only the first page carries the total, and a failed count just leaves it out
+    if after_id is None and offset == 0:
+        try:
+            headers["X-Total-Count"] = str(await MemeRepository.count_memes(exact=exact))
+        except HTTPException as err:
+            print(f"Failed to count memes: {err.detail}")
+    if memes and len(memes) == limit:
+        headers["X-Next-Cursor"] = encode_cursor(memes[-1]["id"])
+
+    return ORJSONResponse(memes, headers=headers)
+
+
+@router.get("/search", response_model=list[MemeSearchResult], response_class=ORJSONResponse)
+async def search_memes(
+        q: str = Query(min_length=1, max_length=200),
+        limit: int = Query(default=20, gt=0, le=100),
+        cursor: Optional[str] = Query(default=None)
+) -> ORJSONResponse:
+    after = decode_search_cursor(cursor) if cursor else None
+    memes = await MemeRepository.search_memes(query=q, limit=limit, after=after)
+
+    headers = {}
+    if memes and len(memes) == limit:
+        headers["X-Next-Cursor"] = encode_search_cursor(memes[-1]["rank"], memes[-1]["id"])
 
+    return ORJSONResponse(memes, headers=headers)
 
-@router.get("/{meme_id}", response_model=MemeFull)
-async def get_meme(meme_id: int) -> MemeFull:
-    return await MemeRepository.get_meme(meme_id=meme_id)
+
+@router.get("/cache/stats")
+async def get_cache_stats() -> dict:
+    return meme_cache.stats()
+
+
+@router.get("/{meme_id}", response_model=MemeFull, response_class=ORJSONResponse)
+async def get_meme(meme_id: int) -> ORJSONResponse:
+    return ORJSONResponse(await MemeRepository.get_meme(meme_id=meme_id))
+
+
+FORWARDED_IMAGE_HEADERS = ("range", "if-none-match")
+PROXIED_IMAGE_HEADERS = (
+    "content-type", "content-length", "content-range", "accept-ranges", "etag", "last-modified"
+)
+CACHEABLE_IMAGE_STATUSES = (200, 206, 304)
+
+
+@router.get("/{meme_id}/image", response_model=None)
+async def get_meme_image(meme_id: int, request: Request,
+                         v: Optional[str] = None) -> StreamingResponse | RedirectResponse:
+    filename = await MemeRepository.get_image_name(meme_id=meme_id)
+    if v != filename:
+        # `?v=` names the picture's object, so the versioned URL can be cached for good; only this hop is revalidated
+        return RedirectResponse(
+            str(request.url.include_query_params(v=filename)), status_code=307, headers={"Cache-Control": "no-cache"}
+        )
+
+    headers = {name: request.headers[name] for name in FORWARDED_IMAGE_HEADERS if name in request.headers}
+    image = await MemeRepository.open_image(filename=filename, headers=headers)
+
+    response_headers = {name: image.headers[name] for name in PROXIED_IMAGE_HEADERS if name in image.headers}
+    # Errors (e.g. a `416`) must not be cached as the image
+    if image.status_code in CACHEABLE_IMAGE_STATUSES:
+        response_headers["Cache-Control"] = IMAGE_CACHE_CONTROL
+
+    return StreamingResponse(
+        image.aiter_raw(IMAGE_CHUNK_SIZE),
+        status_code=image.status_code,
+        headers=response_headers,
+        background=BackgroundTask(image.aclose)
+    )
 
 
 @router.put("/{meme_id}")
@@ -54,3 +162,8 @@ async def update_meme(
 @router.delete("/{meme_id}")
 async def delete_meme(meme_id: int) -> MemeDelete:
     return await MemeRepository.delete_meme(meme_id=meme_id)
+
+
+@router.delete("", response_model=list[BulkDeleteResult])
+async def delete_memes(meme_ids: MemeIds) -> list[BulkDeleteResult]:
+    return await MemeRepository.delete_memes(meme_ids=meme_ids.ids)
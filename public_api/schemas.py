@@ -1,6 +1,6 @@
 from typing import Optional
 import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class MemeBase(BaseModel):
@@ -17,9 +17,43 @@ class MemeId(MemeBase):
 
 
 class MemeFull(MemeId):
+    thumbnail_url: Optional[str] = None
     date_added: datetime.datetime
     date_updated: datetime.datetime
+    filename: Optional[str] = Field(default=None, exclude=True)
+
+
+class MemeSearchResult(MemeFull):
+    rank: Optional[float] = None
 
 
 class MemeDelete(MemeId):
     deleted: bool = True
+
+
+class UploadReserve(BaseModel):
+    meme_name: str
+    text: str
+    filename: str
+
+
+class UploadTicket(BaseModel):
+    upload_id: int
+    upload_url: str
+
+
+class BatchItemResult(BaseModel):
+    index: int
+    status: str
+    meme: Optional[MemeId] = None
+    detail: Optional[str] = None
+
+
+class MemeIds(BaseModel):
+    ids: list[int]
+
+
+class BulkDeleteResult(BaseModel):
+    id: int
+    status: str
+    detail: Optional[str] = None
@@ -14,6 +14,63 @@ POSTGRES_HOST = os.getenv("POSTGRES_HOST")
 POSTGRES_PORT = os.getenv("POSTGRES_PORT")
 POSTGRES_NAME = os.getenv("POSTGRES_NAME")
 
-DB_URL = f"{DB_DRIVER}://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_NAME}"
+DB_URL = os.getenv(
+    "DB_URL", f"{DB_DRIVER}://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_NAME}"
+)
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 50))
+WARMUP_DB_CONNECTIONS = int(os.getenv("WARMUP_DB_CONNECTIONS", 10))
+# `sqlalchemy` or `asyncpg`: which path serves the list and single-meme reads
+READ_BACKEND = os.getenv("READ_BACKEND", "sqlalchemy")
+READ_POOL_MIN_SIZE = int(os.getenv("READ_POOL_MIN_SIZE", 5))
+READ_POOL_MAX_SIZE = int(os.getenv("READ_POOL_MAX_SIZE", 20))
+# Comma separated URLs of read replicas; reads stay on the primary when empty
+DB_REPLICA_URLS = [url for url in os.getenv("DB_REPLICA_URLS", "").split(",") if url]
+REPLICA_EJECT_SECONDS = float(os.getenv("REPLICA_EJECT_SECONDS", 30))
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", 0))
 
 PRIVATE_SERVICE_URL = os.getenv("PRIVATE_API")
+PRIVATE_API_MAX_CONNECTIONS = int(os.getenv("PRIVATE_API_MAX_CONNECTIONS", 100))
+PRIVATE_API_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("PRIVATE_API_MAX_KEEPALIVE_CONNECTIONS", 20))
+PRIVATE_API_KEEPALIVE_EXPIRY = float(os.getenv("PRIVATE_API_KEEPALIVE_EXPIRY", 30))
+PRIVATE_API_CONNECT_TIMEOUT = float(os.getenv("PRIVATE_API_CONNECT_TIMEOUT", 5))
+PRIVATE_API_READ_TIMEOUT = float(os.getenv("PRIVATE_API_READ_TIMEOUT", 30))
+PRIVATE_API_WRITE_TIMEOUT = float(os.getenv("PRIVATE_API_WRITE_TIMEOUT", 30))
+PRIVATE_API_POOL_TIMEOUT = float(os.getenv("PRIVATE_API_POOL_TIMEOUT", 5))
+PRIVATE_API_HTTP2 = bool(int(os.getenv("PRIVATE_API_HTTP2", 0)))
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 64 * 1024))
+IMAGE_CHUNK_SIZE = int(os.getenv("IMAGE_CHUNK_SIZE", 64 * 1024))
+# Checked once the multipart body is spooled; only `UPLOAD_MAX_REQUEST_SIZE` is enforced while it streams in
+UPLOAD_MAX_FILE_SIZE = int(os.getenv("UPLOAD_MAX_FILE_SIZE", 50 * 1024 * 1024))
+UPLOAD_MAX_REQUEST_SIZE = int(os.getenv("UPLOAD_MAX_REQUEST_SIZE", 100 * 1024 * 1024))
+UPLOAD_BUDGET_BYTES = int(os.getenv("UPLOAD_BUDGET_BYTES", 512 * 1024 * 1024))
+UPLOAD_MAX_CONCURRENCY = int(os.getenv("UPLOAD_MAX_CONCURRENCY", 32))
+UPLOAD_RETRY_AFTER = int(os.getenv("UPLOAD_RETRY_AFTER", 1))
+# Image responses are versioned by `?v=<object name>`, which `update_meme` changes along with the picture
+IMAGE_CACHE_CONTROL = os.getenv("IMAGE_CACHE_CONTROL", "public, max-age=31536000, immutable")
+
+MEME_CACHE_MAX_SIZE = int(os.getenv("MEME_CACHE_MAX_SIZE", 1024))
+MEME_CACHE_TTL = float(os.getenv("MEME_CACHE_TTL", 60))
+
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", 100))
+BATCH_UPLOAD_CONCURRENCY = int(os.getenv("BATCH_UPLOAD_CONCURRENCY", 8))
+
+DERIVATIVES_ENABLED = bool(int(os.getenv("DERIVATIVES_ENABLED", 1)))
+DERIVED_PREFIX = os.getenv("DERIVED_PREFIX", "derived")
+
+RECONCILE_INTERVAL = float(os.getenv("RECONCILE_INTERVAL", 60 * 60))
+RECONCILE_GRACE_PERIOD = float(os.getenv("RECONCILE_GRACE_PERIOD", 60 * 60))
+RECONCILE_BATCH_SIZE = int(os.getenv("RECONCILE_BATCH_SIZE", 1000))
+RECONCILE_DRY_RUN = bool(int(os.getenv("RECONCILE_DRY_RUN", 0)))
+# Lifetime of the private service's presigned upload URLs, past which a reservation can no longer be uploaded to
+UPLOAD_URL_EXPIRES = float(os.getenv("UPLOAD_URL_EXPIRES", 15 * 60))
+
+THUMBNAIL_POLL_INTERVAL = float(os.getenv("THUMBNAIL_POLL_INTERVAL", 5))
+THUMBNAIL_BATCH_SIZE = int(os.getenv("THUMBNAIL_BATCH_SIZE", 100))
+# A thumbnail still missing this long after its image was stored is recorded as absent
+THUMBNAIL_PENDING_TIMEOUT = float(os.getenv("THUMBNAIL_PENDING_TIMEOUT", 10 * 60))
+
+DELETION_POLL_INTERVAL = float(os.getenv("DELETION_POLL_INTERVAL", 1))
+DELETION_BATCH_SIZE = int(os.getenv("DELETION_BATCH_SIZE", 100))
+DELETION_RETRY_BASE = float(os.getenv("DELETION_RETRY_BASE", 5))
+DELETION_RETRY_MAX = float(os.getenv("DELETION_RETRY_MAX", 15 * 60))
@@ -0,0 +1,126 @@
+"""Record which memes have a rendered thumbnail.
+
+The private service renders thumbnails in the background after an upload, so a new or replaced image
+starts with `has_thumbnail` unknown (`NULL`). Reads only sign a thumbnail once the flag is set and never ask
+storage whether it exists. This worker checks pending images in batches with one `/presign` call, marks the
+rendered ones, and gives up on those still missing after `THUMBNAIL_PENDING_TIMEOUT` (an image Pillow could
+not decode, or a deployment without derivatives). After a backfill, `--recheck` puts the given-up rows back
+in the queue.
+"""
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+import httpx
+from sqlalchemy import select, update, func, any_, bindparam, String
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from public_api.cache import meme_cache
+from public_api.database.config import engine, new_session
+from public_api.database.models import Memes
+from public_api.settings import (
+    PRIVATE_SERVICE_URL, THUMBNAIL_POLL_INTERVAL, THUMBNAIL_BATCH_SIZE, THUMBNAIL_PENDING_TIMEOUT
+)
+from public_api.utils import create_http_client, presign_images, thumbnail_name
+
+
+async def check_batch(client: httpx.AsyncClient, batch_size: int = THUMBNAIL_BATCH_SIZE,
+                      pending_timeout: float = THUMBNAIL_PENDING_TIMEOUT) -> dict:
+    """Resolve one batch of pending images and return how many were checked, found and given up on."""
+    report = {"checked": 0, "found": 0, "missing": 0}
+
+    async with new_session() as session:
+        last_updated = func.max(Memes.date_updated)
+        result = await session.execute(
+            select(Memes.filename, last_updated.label("date_updated"))
+            .where(Memes.has_thumbnail.is_(None), Memes.filename.is_not(None))
+            .group_by(Memes.filename)
+            .order_by(last_updated)
+            .limit(batch_size)
+        )
+        rows = result.all()
+    if not rows:
+        return report
+    report["checked"] = len(rows)
+
+    urls = await presign_images(
+        client=client,
+        url=f"{PRIVATE_SERVICE_URL}/presign",
+        filenames=[],
+        existing_only=[thumbnail_name(row.filename) for row in rows]
+    )
+    found = [row.filename for row in rows if thumbnail_name(row.filename) in urls]
+    deadline = datetime.utcnow() - timedelta(seconds=pending_timeout)
+    missing = [row.filename for row in rows if row.filename not in found and row.date_updated < deadline]
+
+    meme_ids = []
+    async with new_session() as session:
+        async with session.begin():
+            for has_thumbnail, filenames in ((True, found), (False, missing)):
+                if not filenames:
+                    continue
+                result = await session.execute(
+                    update(Memes)
+                    .where(
+                        Memes.filename == any_(bindparam("filenames", filenames, ARRAY(String))),
+                        Memes.has_thumbnail.is_(None)
+                    )
+                    # Not an edit: keeps `date_updated` so clients' `If-Unmodified-Since` still matches
+                    .values(has_thumbnail=has_thumbnail, date_updated=Memes.date_updated)
+                    .returning(Memes.id)
+                )
+                meme_ids.extend(result.scalars().all())
+
+    if meme_ids:
+        await meme_cache.invalidate_memes(meme_ids)
+    report["found"] = len(found)
+    report["missing"] = len(missing)
+    return report
+
+
+async def recheck_missing() -> int:
+    """Queue every image recorded without a thumbnail for another check and return how many memes that was."""
+    async with new_session() as session:
+        async with session.begin():
+            result = await session.execute(
+                update(Memes)
+                .where(Memes.has_thumbnail.is_(False))
+                .values(has_thumbnail=None, date_updated=Memes.date_updated)
+                .returning(Memes.id)
+            )
+            meme_ids = result.scalars().all()
+    return len(meme_ids)
+
+
+async def run_worker(client: httpx.AsyncClient, interval: float = THUMBNAIL_POLL_INTERVAL,
+                     batch_size: int = THUMBNAIL_BATCH_SIZE):
+    """Check batches back to back while they resolve something and poll every `interval` seconds otherwise."""
+    while True:
+        try:
+            report = await check_batch(client, batch_size)
+        except Exception as err:
+            print(f"Thumbnail check failed: {err}")
+            report = {"found": 0, "missing": 0}
+
+        if not report["found"] and not report["missing"]:
+            await asyncio.sleep(interval)
+
+
+async def main(recheck: bool):
+    if recheck:
+        print(f"Queued {await recheck_missing()} memes for another thumbnail check")
+    async with create_http_client() as client:
+        while True:
+            report = await check_batch(client)
+            if not report["found"] and not report["missing"]:
+                break
+            print(f"Checked {report['checked']} images: {report['found']} found, {report['missing']} missing")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record which memes have a rendered thumbnail")
+    parser.add_argument("--recheck", action="store_true",
+                        help="check images recorded without a thumbnail again, e.g. after a backfill")
+    args = parser.parse_args()
+
+    asyncio.run(main(recheck=args.recheck))
@@ -1,38 +1,224 @@
 import base64
+import binascii
+import hashlib
+import json
+from importlib.util import find_spec
+from typing import AsyncIterator, Optional, Sequence
 import httpx
 from fastapi import UploadFile, HTTPException
 
+from public_api.metrics import UPLOAD_BYTES, timed_private_call
+from public_api.settings import (
+    UPLOAD_CHUNK_SIZE, PRIVATE_API_MAX_CONNECTIONS, PRIVATE_API_MAX_KEEPALIVE_CONNECTIONS,
+    PRIVATE_API_KEEPALIVE_EXPIRY, PRIVATE_API_CONNECT_TIMEOUT, PRIVATE_API_READ_TIMEOUT, PRIVATE_API_WRITE_TIMEOUT,
+    PRIVATE_API_POOL_TIMEOUT, PRIVATE_API_HTTP2, DERIVED_PREFIX
+)
 
-async def get_image_url(url: str, image: UploadFile, filename: str, old_filename: str = None) -> str:
-    file_data = await image.read()
-    encoded_file_data = base64.b64encode(file_data).decode("utf-8")
 
-    data = {
-        "image": encoded_file_data,
-        "filename": filename,
-        "old_filename": old_filename
-    }
+def create_http_client() -> httpx.AsyncClient:
+    http2 = PRIVATE_API_HTTP2
+    if http2 and find_spec("h2") is None:
+        print("PRIVATE_API_HTTP2 is set but the 'h2' package is not installed, falling back to HTTP/1.1")
+        http2 = False
 
-    async with httpx.AsyncClient() as client:
-        method = client.put if old_filename else client.post
-        response = await method(url=url, json=data)
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=PRIVATE_API_MAX_CONNECTIONS,
+            max_keepalive_connections=PRIVATE_API_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=PRIVATE_API_KEEPALIVE_EXPIRY
+        ),
+        timeout=httpx.Timeout(
+            connect=PRIVATE_API_CONNECT_TIMEOUT,
+            read=PRIVATE_API_READ_TIMEOUT,
+            write=PRIVATE_API_WRITE_TIMEOUT,
+            pool=PRIVATE_API_POOL_TIMEOUT
+        ),
+        http2=http2
+    )
 
-        if response.status_code == 200:
-            image_url = response.json()
 
-            return image_url
+def thumbnail_name(filename: str) -> str:
+    """Object name of the thumbnail the private service renders for `filename`."""
+    return f"{DERIVED_PREFIX}/thumbnail/{filename}.webp"
 
-        else:
-            error_message = f"Error {response.status_code}: {response.text}"
-            raise HTTPException(status_code=response.status_code, detail=error_message)
 
+async def iter_upload(image: UploadFile, chunk_size: int = UPLOAD_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    while chunk := await image.read(chunk_size):
+        UPLOAD_BYTES.inc(len(chunk))
+        yield chunk
 
-async def delete_object(url: str) -> bool:
-    async with httpx.AsyncClient() as client:
-        response = await client.delete(url=url)
 
-        if response.status_code == 200:
-            return True
-        else:
-            error_message = f"Error {response.status_code}: {response.text}"
-            raise HTTPException(status_code=response.status_code, detail=error_message)
+async def hash_upload(image: UploadFile, chunk_size: int = UPLOAD_CHUNK_SIZE) -> str:
+    digest = hashlib.sha256()
+    async for chunk in iter_upload(image, chunk_size):
+        digest.update(chunk)
+    await image.seek(0)
+    return digest.hexdigest()
+
+
+@timed_private_call
+async def get_image_url(client: httpx.AsyncClient, url: str, image: UploadFile, filename: str,
+                        old_filename: str = None, sha256: str = None) -> str:
+    params = {"filename": filename}
+    if old_filename:
+        params["old_filename"] = old_filename
+    if sha256:
+        params["sha256"] = sha256
+
+    headers = {"Content-Type": image.content_type or "application/octet-stream"}
+    if image.size is not None:
+        # Lets the private service reserve the exact size instead of its per-request maximum
+        headers["Content-Length"] = str(image.size)
+
+    method = client.put if old_filename else client.post
+    response = await method(url=f"{url}/stream", params=params, headers=headers, content=iter_upload(image))
+
+    if response.status_code == 200:
+        image_url = response.json()
+
+        return image_url
+
+    else:
+        error_message = f"Error {response.status_code}: {response.text}"
+        # Keeps the private service's admission hint on a `429`
+        headers = {"Retry-After": response.headers["retry-after"]} if "retry-after" in response.headers else None
+        raise HTTPException(status_code=response.status_code, detail=error_message, headers=headers)
+
+
+@timed_private_call
+async def stat_object(client: httpx.AsyncClient, url: str) -> Optional[dict]:
+    response = await client.get(url=url)
+
+    if response.status_code == 200:
+        return response.json()
+    elif response.status_code == 404:
+        return None
+    else:
+        error_message = f"Error {response.status_code}: {response.text}"
+        raise HTTPException(status_code=response.status_code, detail=error_message)
+
+
+@timed_private_call
+async def open_object(client: httpx.AsyncClient, url: str, headers: dict[str, str]) -> httpx.Response:
+    """Start streaming an object; the caller owns the returned response and must close it."""
+    response = await client.send(client.build_request("GET", url=url, headers=headers), stream=True)
+
+    if response.status_code in (200, 206, 304, 416):
+        return response
+    else:
+        await response.aread()
+        await response.aclose()
+        error_message = f"Error {response.status_code}: {response.text}"
+        raise HTTPException(status_code=response.status_code, detail=error_message)
+
+
+@timed_private_call
+async def presign_images(client: httpx.AsyncClient, url: str, filenames: list[str],
+                         existing_only: Sequence[str] = ()) -> dict[str, str]:
+    """Signed URLs of `filenames`, and of those `existing_only` objects that exist."""
+    response = await client.post(url=url, json={"filenames": filenames, "existing_only": list(existing_only)})
+
+    if response.status_code == 200:
+        return response.json()
+    else:
+        error_message = f"Error {response.status_code}: {response.text}"
+        raise HTTPException(status_code=response.status_code, detail=error_message)
+
+
+@timed_private_call
+async def reserve_object(client: httpx.AsyncClient, url: str, filename: str) -> dict:
+    response = await client.post(url=url, json={"filename": filename})
+
+    if response.status_code == 200:
+        return response.json()
+    else:
+        error_message = f"Error {response.status_code}: {response.text}"
+        raise HTTPException(status_code=response.status_code, detail=error_message)
+
+
+@timed_private_call
+async def verify_object(client: httpx.AsyncClient, url: str, object_name: str) -> dict:
+    response = await client.post(url=url, json={"object_name": object_name})
+
+    if response.status_code == 200:
+        return response.json()
+    else:
+        error_message = f"Error {response.status_code}: {response.text}"
+        raise HTTPException(status_code=response.status_code, detail=error_message)
+
+
+@timed_private_call
+async def delete_object(client: httpx.AsyncClient, url: str) -> bool:
+    response = await client.delete(url=url)
+
+    if response.status_code == 200:
+        return True
+    else:
+        error_message = f"Error {response.status_code}: {response.text}"
+        raise HTTPException(status_code=response.status_code, detail=error_message)
+
+
+def _encode_payload(payload: dict) -> str:
+    data = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def _decode_payload(cursor: str) -> dict:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    payload = json.loads(base64.urlsafe_b64decode(padded))
+    if not isinstance(payload["id"], int):
+        raise ValueError("cursor id must be an integer")
+    return payload
+
+
+def encode_cursor(meme_id: int) -> str:
+    return _encode_payload({"id": meme_id})
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        return _decode_payload(cursor)["id"]
+
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def encode_search_cursor(rank: float, meme_id: int) -> str:
+    return _encode_payload({"rank": rank, "id": meme_id})
+
+
+def decode_search_cursor(cursor: str) -> tuple[float, int]:
+    try:
+        payload = _decode_payload(cursor)
+        if not isinstance(payload["rank"], (int, float)):
+            raise ValueError("cursor rank must be a number")
+        return float(payload["rank"]), payload["id"]
+
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@timed_private_call
+async def delete_objects(client: httpx.AsyncClient, url: str, filenames: list[str]) -> dict:
+    response = await client.post(url=url, json={"filenames": filenames})
+
+    if response.status_code == 200:
+        return response.json()
+    else:
+        error_message = f"Error {response.status_code}: {response.text}"
+        raise HTTPException(status_code=response.status_code, detail=error_message)
+
+
+@timed_private_call
+async def list_objects(client: httpx.AsyncClient, url: str, start_after: Optional[str], limit: int) -> list[dict]:
+    params = {"limit": limit}
+    if start_after:
+        params["start_after"] = start_after
+
+    response = await client.get(url=url, params=params)
+
+    if response.status_code == 200:
+        return response.json()
+    else:
+        error_message = f"Error {response.status_code}: {response.text}"
+        raise HTTPException(status_code=response.status_code, detail=error_message)
@@ -0,0 +1,104 @@
+"""Warm-up after startup and the `/healthz` and `/readyz` probes.
+
+The server starts answering as soon as the tables exist, but `/readyz` reports `503` until `warm_up`
+has pre-opened pool connections, run the hot queries on each of them (so both SQLAlchemy's compiled
+cache and asyncpg's per-connection statement cache are filled) and opened a connection to the private
+service. Load balancers should route traffic by `/readyz`, so the first requests after a deploy
+do not pay for any of that.
+"""
+import asyncio
+import time
+from contextlib import AsyncExitStack
+import httpx
+from fastapi import APIRouter
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import configure_mappers
+
+from public_api.database.config import engine, new_session
+from public_api.database.models import Memes
+from public_api.database.readers import meme_reader
+from public_api.database.routing import replica_router
+from public_api.repository import MEME_COLUMNS, ESTIMATED_COUNT
+from public_api.settings import PRIVATE_SERVICE_URL, WARMUP_DB_CONNECTIONS
+
+
+class Readiness:
+    def __init__(self):
+        self.ready = False
+        self.status = "starting"
+
+    def set_ready(self):
+        self.ready = True
+        self.status = "ready"
+
+    def set_not_ready(self, status: str):
+        self.ready = False
+        self.status = status
+
+
+readiness = Readiness()
+
+
+# Same shapes as the statements `MemeRepository` builds, so their compiled forms are cached
+HOT_QUERIES = (
+    select(*MEME_COLUMNS).order_by(Memes.id).offset(0).limit(5),
+    select(*MEME_COLUMNS).order_by(Memes.id).where(Memes.id > 0).limit(5),
+    select(*MEME_COLUMNS).where(Memes.id == 0),
+    ESTIMATED_COUNT,
+    select(func.count()).select_from(Memes),
+)
+
+
+async def run_hot_queries(session: AsyncSession):
+    for query in HOT_QUERIES:
+        await session.execute(query)
+
+
+async def warm_up_database(connections: int = WARMUP_DB_CONNECTIONS):
+    """Run the hot queries on `connections` pool connections of the primary and of each replica at once."""
+    configure_mappers()
+    connections = min(connections, engine.pool.size())
+    session_makers = [new_session] + [replica.new_session for replica in replica_router.replicas]
+    async with AsyncExitStack() as stack:
+        sessions = [
+            await stack.enter_async_context(make_session())
+            for make_session in session_makers for _ in range(connections)
+        ]
+        await asyncio.gather(*(run_hot_queries(session) for session in sessions))
+
+
+async def warm_up(client: httpx.AsyncClient, connections: int = WARMUP_DB_CONNECTIONS):
+    """Warm everything up, then report ready. Failures are logged, the first requests will just be slower."""
+    started_at = time.perf_counter()
+
+    try:
+        await warm_up_database(connections)
+        readers = [meme_reader] + [replica.reader for replica in replica_router.replicas]
+        for reader in readers:
+            if reader is not None:
+                await reader.warm_up(connections)
+    except Exception as err:
+        print(f"Database warm-up failed: {err}")
+
+    try:
+        await client.get(f"{PRIVATE_SERVICE_URL}/healthz")
+    except Exception as err:
+        print(f"Private service warm-up failed: {err}")
+
+    readiness.set_ready()
+    print(f"Warm-up finished in {time.perf_counter() - started_at:.2f}s")
+
+
+router = APIRouter(tags=["Health"])
+
+
+@router.get("/healthz")
+async def healthz() -> dict:
+    return {"status": "ok"}
+
+
+@router.get("/readyz")
+async def readyz() -> ORJSONResponse:
+    return ORJSONResponse({"status": readiness.status}, status_code=200 if readiness.ready else 503)
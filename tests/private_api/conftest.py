@@ -2,15 +2,24 @@ import pytest
 import base64
 from unittest.mock import patch, MagicMock
 
+from private_api.config import bucket_name, part_size
 from private_api.schemas import UploadRequest, UpdateRequest
+from private_api.storage.minio_backend import MinioBackend
 
 
 @pytest.fixture(autouse=True)
 def mock_minio_client() -> MagicMock:
-    with patch("private_api.utils.client", new_callable=MagicMock) as mock_client:
+    mock_client = MagicMock()
+    with patch("private_api.utils.storage", MinioBackend(mock_client, bucket_name, part_size)):
         yield mock_client
 
 
+@pytest.fixture(autouse=True)
+def disable_derivatives():
+    with patch("private_api.repository.derivatives_enabled", False):
+        yield
+
+
 @pytest.fixture(autouse=True)
 def mock_bucket_setup_teardown() -> MagicMock:
     with patch("private_api.config.create_bucket", MagicMock()):
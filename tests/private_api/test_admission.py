@@ -0,0 +1,45 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from private_api.admission import UploadBudget, AdmissionMiddleware, upload_budget
+from private_api.app import app
+from private_api.utils import StreamReader
+
+
+def test_stream_route_is_admitted():
+    budget = UploadBudget(max_bytes=10, max_uploads=1)
+    middleware = AdmissionMiddleware(app, budget=budget)
+
+    assert middleware._is_upload({"method": "PUT", "path": "/stream"})
+    assert middleware._is_upload({"method": "PUT", "path": "/files/derived/thumbnail/a.webp"})
+    assert not middleware._is_upload({"method": "GET", "path": "/files/a.png"})
+    assert not middleware._is_upload({"method": "POST", "path": "/presign"})
+
+
+def test_busy_stream_upload_is_refused():
+    with patch.object(upload_budget, "max_uploads", 0):
+        response = TestClient(app).post("/stream", params={"filename": "a.png"}, content=b"data")
+
+    assert response.status_code == 429
+    assert "retry-after" in response.headers
+
+
+@pytest.mark.asyncio
+async def test_stream_reader_enforces_max_size():
+    async def chunks():
+        yield b"abcd"
+        yield b"efgh"
+
+    reader = StreamReader(chunks(), asyncio.get_running_loop(), max_size=6)
+
+    def read_all():
+        while reader.read(3):
+            pass
+
+    with pytest.raises(HTTPException) as excinfo:
+        await asyncio.to_thread(read_all)
+
+    assert excinfo.value.status_code == 413
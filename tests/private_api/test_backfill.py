@@ -0,0 +1,28 @@
+import pytest
+from unittest.mock import patch
+from fastapi import HTTPException
+
+from private_api.backfill import backfill
+
+
+@pytest.mark.asyncio
+@patch("private_api.backfill.MinioUtils", autospec=True)
+async def test_backfill_skips_derivatives_and_existing(MockMinioUtils):
+    MockMinioUtils.list_files.side_effect = [
+        [{"name": "a.jpg"}, {"name": "b.jpg"}],
+        [{"name": "derived/thumbnail/a.jpg.webp"}],
+    ]
+    MockMinioUtils.derived_names.side_effect = lambda filename: [f"derived/thumbnail/{filename}.webp"]
+
+    async def stat_file(name):
+        if name != "derived/thumbnail/a.jpg.webp":
+            raise HTTPException(status_code=404, detail="Object not found")
+        return {"size": 1, "content_type": "image/webp"}
+
+    MockMinioUtils.stat_file.side_effect = stat_file
+
+    report = await backfill(batch_size=2)
+
+    assert report == {"objects": 2, "skipped": 1, "created": 1, "errors": {}}
+    MockMinioUtils.create_derivatives.assert_called_once_with("b.jpg")
+    assert MockMinioUtils.list_files.call_args_list[1].args == ("b.jpg", 2)
@@ -0,0 +1,66 @@
+import asyncio
+import threading
+import pytest
+from unittest.mock import patch, MagicMock
+
+from private_api import config
+from private_api.executor import StorageExecutor
+
+
+@pytest.mark.asyncio
+async def test_run_returns_result():
+    executor = StorageExecutor(max_workers=2)
+
+    result = await executor.run(lambda a, b=0: a + b, 1, b=2)
+
+    assert result == 3
+    assert executor.stats() == {"max_workers": 2, "active": 0, "queued": 0}
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_run_propagates_errors():
+    executor = StorageExecutor(max_workers=1)
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        await executor.run(fail)
+
+    assert executor.stats()["active"] == 0
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_queue_depth_above_cap():
+    executor = StorageExecutor(max_workers=1)
+    release = threading.Event()
+
+    tasks = [asyncio.create_task(executor.run(release.wait)) for _ in range(3)]
+    while executor.active < 1:
+        await asyncio.sleep(0.01)
+
+    assert executor.stats() == {"max_workers": 1, "active": 1, "queued": 2}
+
+    release.set()
+    await asyncio.gather(*tasks)
+    assert executor.queue_depth == 0
+    executor.shutdown()
+
+
+def test_derivative_executor_is_started_on_first_use():
+    mock_pool = MagicMock()
+
+    with patch.object(config, "_derivative_executor", None), \
+            patch("private_api.config.ProcessPoolExecutor", return_value=mock_pool) as mock_pool_class:
+        config.shutdown_derivative_executor()
+        mock_pool_class.assert_not_called()
+
+        assert config.get_derivative_executor() is mock_pool
+        assert config.get_derivative_executor() is mock_pool
+        config.shutdown_derivative_executor()
+
+        mock_pool_class.assert_called_once_with(max_workers=config.derivative_workers)
+        mock_pool.shutdown.assert_called_once()
+        assert config._derivative_executor is None
@@ -0,0 +1,46 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from private_api.executor import StorageExecutor
+from private_api.metrics import MetricsMiddleware, metrics, registry
+
+
+def test_middleware_records_route_template_and_status():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+    app.add_route("/metrics", metrics)
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int) -> dict:
+        return {"id": item_id}
+
+    labels = {"method": "GET", "route": "/items/{item_id}", "status": "200"}
+    before = registry.get_sample_value("http_request_duration_seconds_count", labels) or 0
+
+    client = TestClient(app)
+    client.get("/items/1")
+    client.get("/items/2")
+    response = client.get("/metrics")
+
+    assert registry.get_sample_value("http_request_duration_seconds_count", labels) == before + 2
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'route="/items/{item_id}"' in response.text
+
+
+@pytest.mark.asyncio
+async def test_executor_records_call_latency():
+    executor = StorageExecutor(max_workers=1)
+
+    def stat_object():
+        return "ok"
+
+    labels = {"operation": "stat_object"}
+    before = registry.get_sample_value("minio_call_duration_seconds_count", labels) or 0
+    waits_before = registry.get_sample_value("minio_queue_wait_seconds_count")
+
+    await executor.run(stat_object)
+
+    assert registry.get_sample_value("minio_call_duration_seconds_count", labels) == before + 1
+    assert registry.get_sample_value("minio_queue_wait_seconds_count") == waits_before + 1
+    executor.shutdown()
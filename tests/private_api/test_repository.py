@@ -1,8 +1,10 @@
+import asyncio
 import pytest
-from unittest.mock import patch
+from unittest.mock import patch, MagicMock
 from fastapi import HTTPException
 
 from private_api.repository import MinioRepository
+from private_api.schemas import ReserveRequest, CompleteRequest
 
 
 @patch("private_api.repository.MinioUtils", autospec=True)
@@ -48,3 +50,146 @@ class TestMinioRepository:
 
         with pytest.raises(HTTPException):
             await MinioRepository.update_meme(mock_update_request)
+
+    @pytest.mark.asyncio
+    async def test_create_meme_stream(self, MockMinioUtils):
+        MockMinioUtils.upload_stream.return_value = "http://mocked-url"
+        chunks = MagicMock()
+
+        result = await MinioRepository.create_meme_stream("test.jpg", chunks, "image/jpeg")
+
+        assert result == "http://mocked-url"
+        MockMinioUtils.upload_stream.assert_called_once_with("test.jpg", chunks, "image/jpeg", None)
+
+    @pytest.mark.asyncio
+    async def test_create_meme_stream_schedules_derivatives(self, MockMinioUtils):
+        MockMinioUtils.upload_stream.return_value = "http://mocked-url"
+
+        with patch("private_api.repository.derivatives_enabled", True):
+            await MinioRepository.create_meme_stream("test.jpg", MagicMock(), "image/jpeg")
+        await asyncio.gather(*MinioRepository._derivative_tasks)
+
+        MockMinioUtils.create_derivatives.assert_called_once_with("test.jpg")
+
+    @pytest.mark.asyncio
+    async def test_derivatives_are_bounded(self, MockMinioUtils):
+        release = asyncio.Event()
+        running = []
+
+        async def create_derivatives(filename):
+            running.append(filename)
+            await release.wait()
+
+        MockMinioUtils.create_derivatives.side_effect = create_derivatives
+
+        with patch("private_api.repository.derivatives_enabled", True), \
+                patch("private_api.repository.derivative_workers", 2), \
+                patch("private_api.repository.derivative_queue_size", 1), \
+                patch.object(MinioRepository, "_derivative_slots", asyncio.Semaphore(2)):
+            for index in range(5):
+                MinioRepository._schedule_derivatives(f"{index}.jpg")
+            await asyncio.sleep(0)
+
+            assert len(MinioRepository._derivative_tasks) == 3
+            assert running == ["0.jpg", "1.jpg"]
+
+            release.set()
+            await asyncio.gather(*MinioRepository._derivative_tasks)
+
+        assert running == ["0.jpg", "1.jpg", "2.jpg"]
+
+    @pytest.mark.asyncio
+    async def test_update_meme_stream_success(self, MockMinioUtils):
+        MockMinioUtils.upload_stream.return_value = "http://mocked-new-url"
+        MockMinioUtils.remove_file.return_value = {"status": "success"}
+
+        result = await MinioRepository.update_meme_stream("new.jpg", "old.jpg", MagicMock())
+
+        assert result == "http://mocked-new-url"
+        MockMinioUtils.remove_file.assert_called_once_with("old.jpg")
+
+    @pytest.mark.asyncio
+    async def test_reserve_upload(self, MockMinioUtils):
+        MockMinioUtils.presign_upload.return_value = "http://mocked-put-url"
+
+        result = await MinioRepository.reserve_upload(ReserveRequest(filename="test.jpg"))
+
+        assert result["upload_url"] == "http://mocked-put-url"
+        assert result["object_name"].endswith("_test.jpg")
+        MockMinioUtils.presign_upload.assert_called_once_with(result["object_name"])
+
+    @pytest.mark.asyncio
+    async def test_complete_upload_success(self, MockMinioUtils):
+        MockMinioUtils.stat_file.return_value = {"size": 10, "content_type": "image/jpeg"}
+        MockMinioUtils.presign_files.return_value = {"obj.jpg": "http://mocked-url"}
+
+        result = await MinioRepository.complete_upload(CompleteRequest(object_name="obj.jpg"))
+
+        assert result == {"image_url": "http://mocked-url", "size": 10, "content_type": "image/jpeg"}
+        MockMinioUtils.remove_file.assert_not_called()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("stat", [{"size": 0, "content_type": "image/jpeg"},
+                                      {"size": 10, "content_type": "text/html"}])
+    async def test_complete_upload_invalid(self, MockMinioUtils, stat):
+        MockMinioUtils.stat_file.return_value = stat
+
+        with pytest.raises(HTTPException) as excinfo:
+            await MinioRepository.complete_upload(CompleteRequest(object_name="obj.jpg"))
+
+        assert excinfo.value.status_code == 400
+        MockMinioUtils.remove_file.assert_called_once_with("obj.jpg")
+
+    @pytest.mark.asyncio
+    async def test_get_meme_info(self, MockMinioUtils):
+        MockMinioUtils.stat_file.return_value = {"size": 10, "content_type": "image/jpeg"}
+        MockMinioUtils.presign_files.return_value = {"obj.jpg": "http://mocked-url"}
+
+        result = await MinioRepository.get_meme_info("obj.jpg")
+
+        assert result == {"image_url": "http://mocked-url", "size": 10, "content_type": "image/jpeg"}
+
+    @pytest.mark.asyncio
+    async def test_get_meme_content_range(self, MockMinioUtils):
+        MockMinioUtils.stat_file.return_value = {"size": 1000, "content_type": "image/png", "etag": "abc",
+                                                 "last_modified": "2024-01-01T00:00:00+00:00"}
+
+        response = await MinioRepository.get_meme_content("obj.png", range_header="bytes=100-199")
+
+        assert response.status_code == 206
+        assert response.headers["content-range"] == "bytes 100-199/1000"
+        assert response.headers["content-length"] == "100"
+        assert response.headers["etag"] == '"abc"'
+        assert response.headers["last-modified"] == "Mon, 01 Jan 2024 00:00:00 GMT"
+        MockMinioUtils.open_file.assert_called_once_with("obj.png", offset=100, length=100)
+
+    @pytest.mark.asyncio
+    async def test_get_meme_content_not_modified(self, MockMinioUtils):
+        MockMinioUtils.stat_file.return_value = {"size": 1000, "content_type": "image/png", "etag": "abc",
+                                                 "last_modified": None}
+
+        response = await MinioRepository.get_meme_content("obj.png", if_none_match='"abc"')
+
+        assert response.status_code == 304
+        MockMinioUtils.open_file.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_upload_file_rejects_bad_signature(self, MockMinioUtils):
+        MockMinioUtils.verify_url.return_value = False
+
+        with pytest.raises(HTTPException) as excinfo:
+            await MinioRepository.upload_file("obj.png", 0, "bad", MagicMock(), "image/png")
+
+        assert excinfo.value.status_code == 403
+        MockMinioUtils.verify_url.assert_called_once_with("PUT", "obj.png", 0, "bad")
+        MockMinioUtils.upload_stream.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_upload_file(self, MockMinioUtils):
+        MockMinioUtils.verify_url.return_value = True
+        chunks = MagicMock()
+
+        response = await MinioRepository.upload_file("obj.png", 1, "good", chunks, "image/png")
+
+        assert response.status_code == 200
+        MockMinioUtils.upload_stream.assert_called_once_with("obj.png", chunks, "image/png")
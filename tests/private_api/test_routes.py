@@ -0,0 +1,19 @@
+from unittest.mock import patch, AsyncMock
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from private_api.routes import router
+
+
+def test_object_routes_accept_names_with_slashes():
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app)
+
+    with patch("private_api.routes.MinioRepository.get_meme_info", AsyncMock(return_value={})) as mock_info, \
+            patch("private_api.routes.MinioRepository.get_meme_content", AsyncMock(return_value={})) as mock_content:
+        assert client.get("/objects/legacy%2Fa%20b%231%3F.png").status_code == 200
+        assert client.get("/objects/legacy%2Fa%20b%231%3F.png/content").status_code == 200
+
+    mock_info.assert_called_once_with("legacy/a b#1?.png")
+    assert mock_content.call_args.args == ("legacy/a b#1?.png",)
@@ -0,0 +1,156 @@
+import io
+import os
+import time
+import pytest
+from datetime import timedelta
+from urllib.parse import urlsplit, parse_qs, unquote
+
+from private_api import config
+from private_api.storage.base import UrlSigner, ObjectNotFound, InvalidObjectName
+from private_api.storage.local_backend import LocalBackend
+from private_api.storage.memory_backend import MemoryBackend
+
+
+@pytest.fixture(params=["local", "memory"])
+def backend(request, tmp_path):
+    signer = UrlSigner("http://private:8001", b"secret")
+    if request.param == "local":
+        storage = LocalBackend(str(tmp_path / "objects"), signer, chunk_size=4)
+    else:
+        storage = MemoryBackend(signer)
+    storage.create_bucket()
+    return storage
+
+
+def test_put_get_stat(backend):
+    backend.put("a.png", io.BytesIO(b"0123456789"), -1, "image/png")
+
+    reader = backend.get("a.png", offset=2, length=5, chunk_size=3)
+    assert list(reader) == [b"234", b"56"]
+    reader.close()
+
+    stat = backend.stat("a.png")
+    assert stat.size == 10
+    assert stat.content_type == "image/png"
+    assert backend.read("a.png") == b"0123456789"
+
+
+def test_put_replaces_object(backend):
+    backend.put("a.png", io.BytesIO(b"old"), 3, "image/png")
+    old_etag = backend.stat("a.png").etag
+    backend.put("a.png", io.BytesIO(b"new data"), 8, "image/png")
+
+    assert backend.read("a.png") == b"new data"
+    assert backend.stat("a.png").etag != old_etag
+
+
+def test_missing_object(backend):
+    with pytest.raises(ObjectNotFound):
+        backend.stat("missing.png")
+    with pytest.raises(ObjectNotFound):
+        backend.get("missing.png")
+    backend.remove("missing.png")
+
+
+def test_list_and_remove_many(backend):
+    for name in ["b.png", "a.png", "derived/thumbnail/a.png.webp", "c.png"]:
+        backend.put(name, io.BytesIO(b"x"), 1, "image/png")
+
+    assert [obj.name for obj in backend.list(None, 2)] == ["a.png", "b.png"]
+    assert [obj.name for obj in backend.list("b.png", 10)] == ["c.png", "derived/thumbnail/a.png.webp"]
+
+    assert backend.remove_many(["a.png", "c.png", "missing.png"]) == {}
+    assert [obj.name for obj in backend.list(None, 10)] == ["b.png", "derived/thumbnail/a.png.webp"]
+
+
+def test_presigned_urls(backend):
+    url = urlsplit(backend.presign_put("derived/a b.png", timedelta(minutes=5)))
+    query = {key: value[0] for key, value in parse_qs(url.query).items()}
+
+    assert url.path == "/files/derived/a%20b.png"
+    name = unquote(url.path.removeprefix("/files/"))
+    assert backend.verify_url("PUT", name, int(query["expires"]), query["signature"])
+    assert not backend.verify_url("GET", name, int(query["expires"]), query["signature"])
+    assert not backend.verify_url("PUT", "other.png", int(query["expires"]), query["signature"])
+
+    expired = int(time.time()) - 1
+    assert not backend.verify_url("PUT", name, expired, backend.signer.sign("PUT", name, expired))
+
+
+@pytest.mark.parametrize("name", ["../escape.png", ".meta/a.png", "a//b.png", ""])
+def test_local_rejects_unsafe_names(tmp_path, name):
+    backend = LocalBackend(str(tmp_path), UrlSigner("http://private:8001", b"secret"))
+
+    with pytest.raises(InvalidObjectName):
+        backend.put(name, io.BytesIO(b"x"), 1)
+
+
+def test_local_keeps_no_temporary_files(tmp_path):
+    backend = LocalBackend(str(tmp_path), UrlSigner("http://private:8001", b"secret"))
+
+    class FailingReader:
+        def read(self, size):
+            raise OSError("connection reset")
+
+    with pytest.raises(Exception):
+        backend.put("a.png", FailingReader(), -1)
+
+    assert [path.name for path in tmp_path.iterdir() if path.is_file()] == []
+    assert backend.list(None, 10) == []
+
+
+def test_local_list_pages_in_name_order(tmp_path):
+    backend = LocalBackend(str(tmp_path), UrlSigner("http://private:8001", b"secret"))
+    names = ["a-b.png", "a/x.png", "a/y/z.png", "a0.png", "b.png", "derived/medium/a.png.webp",
+             "derived/thumbnail/a.png.webp", "derived/thumbnail/b.png.webp", "z.png"]
+    for name in reversed(names):
+        backend.put(name, io.BytesIO(b"x"), 1)
+
+    pages, start_after = [], None
+    while page := [obj.name for obj in backend.list(start_after, 2)]:
+        pages.append(page)
+        start_after = page[-1]
+
+    assert [name for page in pages for name in page] == sorted(names)
+    assert pages[1] == ["a/y/z.png", "a0.png"]
+    assert [obj.name for obj in backend.list("derived/medium/a.png.webp", 1)] == ["derived/thumbnail/a.png.webp"]
+    assert [obj.name for obj in backend.list("derived/missing/a.png", 1)] == ["derived/thumbnail/a.png.webp"]
+
+
+def test_local_list_reuses_unchanged_directory_listings(tmp_path, monkeypatch):
+    backend = LocalBackend(str(tmp_path), UrlSigner("http://private:8001", b"secret"))
+    for name in ["a.png", "b.png"]:
+        backend.put(name, io.BytesIO(b"x"), 1)
+    settled = time.time_ns() - 10 ** 10
+    os.utime(tmp_path, ns=(settled, settled))
+
+    scans = []
+    scandir = os.scandir
+
+    def counting_scandir(path):
+        scans.append(path)
+        return scandir(path)
+
+    monkeypatch.setattr("private_api.storage.local_backend.os.scandir", counting_scandir)
+
+    assert [obj.name for obj in backend.list(None, 10)] == ["a.png", "b.png"]
+    assert [obj.name for obj in backend.list("a.png", 10)] == ["b.png"]
+    assert len(scans) == 1
+
+    backend.put("c.png", io.BytesIO(b"x"), 1)
+    assert [obj.name for obj in backend.list("a.png", 10)] == ["b.png", "c.png"]
+    assert len(scans) == 2
+
+
+@pytest.mark.parametrize("backend", ["local", "memory"])
+def test_signed_backends_require_a_signing_key(monkeypatch, backend):
+    monkeypatch.setattr(config, "storage_signing_key", b"")
+
+    with pytest.raises(ValueError, match="STORAGE_SIGNING_KEY"):
+        config.create_storage(backend)
+
+
+def test_memory_backend_with_signing_key(monkeypatch):
+    monkeypatch.setattr(config, "storage_signing_key", b"secret")
+
+    assert isinstance(config.create_storage("memory"), MemoryBackend)
@@ -1,10 +1,14 @@
+import datetime
+import hashlib
+import io
+import threading
 import pytest
-from unittest.mock import MagicMock, Mock
+from unittest.mock import patch, MagicMock, Mock
 from fastapi import HTTPException
 from minio.error import S3Error
 
-from private_api.utils import MinioUtils
-from private_api.config import bucket_name
+from private_api.utils import MinioUtils, PresignCache, presign_cache, parse_range, etag_matches
+from private_api.config import bucket_name, part_size
 
 
 @pytest.mark.asyncio
@@ -24,7 +28,8 @@ async def test_upload_file_success(mock_minio_put_object, mock_minio_client, tes
 
     mock_minio_client.presigned_get_object.assert_called_once_with(
         bucket_name=bucket_name,
-        object_name=filename
+        object_name=filename,
+        expires=datetime.timedelta(days=7)
     )
 
     assert image_url == "http://mocked_url"
@@ -37,7 +42,7 @@ async def test_upload_file_success(mock_minio_put_object, mock_minio_client, tes
                                                                    request_id="mocked_request_id",
                                                                    host_id="mocked_host_id",
                                                                    response=Mock(status=500, data=b"Error response")),
-                                                           "Error while working with MinIO"),
+                                                           "Error while working with storage"),
                                                           (Exception("Mocked generic error"),
                                                            "Internal server error")])
 async def test_upload_file_errors(mock_minio_put_object, side_effect, expected_detail, test_file_data):
@@ -53,12 +58,176 @@ async def test_upload_file_errors(mock_minio_put_object, side_effect, expected_d
 
 
 @pytest.mark.asyncio
-async def test_remove_file_success(mock_minio_remove_object, test_file_data):
+async def test_upload_stream_success(mock_minio_put_object, mock_minio_client, test_file_data):
+    filename, file_data = test_file_data
+    received = []
+    threads = []
+
+    def consume(**kwargs):
+        threads.append(threading.current_thread().name)
+        while chunk := kwargs["data"].read(4):
+            received.append(chunk)
+
+    async def chunks():
+        yield file_data[:5]
+        yield file_data[5:]
+
+    mock_minio_put_object.side_effect = consume
+    mock_minio_client.presigned_get_object = MagicMock(return_value="http://mocked_url")
+
+    image_url = await MinioUtils.upload_stream(filename, chunks(), "image/png", hashlib.sha256(file_data).hexdigest())
+
+    _, kwargs = mock_minio_put_object.call_args
+    assert kwargs["object_name"] == filename
+    assert kwargs["length"] == -1
+    assert kwargs["part_size"] == part_size
+    assert kwargs["content_type"] == "image/png"
+    assert b"".join(received) == file_data
+    assert all(len(chunk) <= 4 for chunk in received)
+    # Streamed bodies are written from the upload threads, not the shared storage executor
+    assert threads[0].startswith("minio-upload")
+
+    assert image_url == "http://mocked_url"
+
+
+@pytest.mark.asyncio
+async def test_upload_stream_checksum_mismatch(mock_minio_put_object, mock_minio_remove_object, test_file_data):
+    filename, file_data = test_file_data
+
+    async def chunks():
+        yield file_data
+
+    mock_minio_put_object.side_effect = lambda **kwargs: kwargs["data"].read()
+
+    with pytest.raises(HTTPException) as excinfo:
+        await MinioUtils.upload_stream(filename, chunks(), sha256=hashlib.sha256(b"other").hexdigest())
+
+    assert excinfo.value.status_code == 400
+    mock_minio_remove_object.assert_called_once_with(bucket_name, filename)
+
+
+@pytest.mark.asyncio
+async def test_upload_stream_error(mock_minio_put_object, test_file_data):
+    filename, file_data = test_file_data
+
+    async def chunks():
+        yield file_data
+
+    mock_minio_put_object.side_effect = Exception("Mocked generic error")
+
+    with pytest.raises(HTTPException) as excinfo:
+        await MinioUtils.upload_stream(filename, chunks())
+
+    assert excinfo.value.status_code == 500
+    assert "Internal server error" in excinfo.value.detail
+
+
+@pytest.mark.asyncio
+async def test_presign_files_uses_cache(mock_minio_client):
+    presign_cache.clear()
+    mock_minio_client.presigned_get_object = MagicMock(side_effect=lambda bucket_name, object_name, expires:
+                                                       f"http://signed/{object_name}")
+
+    first = await MinioUtils.presign_files(["a.jpg", "b.jpg", "a.jpg"])
+    second = await MinioUtils.presign_files(["b.jpg", "c.jpg"])
+
+    assert first == {"a.jpg": "http://signed/a.jpg", "b.jpg": "http://signed/b.jpg"}
+    assert second == {"b.jpg": "http://signed/b.jpg", "c.jpg": "http://signed/c.jpg"}
+    assert mock_minio_client.presigned_get_object.call_count == 3
+    presign_cache.clear()
+
+
+def test_presign_cache_evicts_least_recently_used():
+    cache = PresignCache(expires=3600, refresh_margin=60, max_size=2)
+    cache.set("a.jpg", "http://signed/a.jpg")
+    cache.set("b.jpg", "http://signed/b.jpg")
+    assert cache.get("a.jpg") == "http://signed/a.jpg"
+
+    cache.set_missing("c.webp")
+
+    assert len(cache) == 2
+    assert cache.get("b.jpg") is None
+    assert cache.get("a.jpg") == "http://signed/a.jpg"
+    assert cache.get("c.webp") == PresignCache.MISSING
+
+
+@pytest.mark.asyncio
+async def test_presign_files_existing_only_skips_missing_objects(mock_minio_client):
+    presign_cache.clear()
+    mock_minio_client.presigned_get_object = MagicMock(side_effect=lambda bucket_name, object_name, expires:
+                                                       f"http://signed/{object_name}")
+    not_found = S3Error(code="NoSuchKey", message="Not found", resource="b.webp", request_id="id", host_id="host",
+                        response=Mock(status=404, data=b""))
+
+    def stat_object(bucket_name, object_name):
+        if object_name == "b.webp":
+            raise not_found
+        return MagicMock()
+
+    mock_minio_client.stat_object = MagicMock(side_effect=stat_object)
+
+    first = await MinioUtils.presign_files(["a.jpg"], existing_only=["a.webp", "b.webp"])
+    second = await MinioUtils.presign_files(["b.jpg"], existing_only=["b.webp"])
+
+    assert first == {"a.jpg": "http://signed/a.jpg", "a.webp": "http://signed/a.webp"}
+    assert second == {"b.jpg": "http://signed/b.jpg"}
+    # The miss is remembered until the derivative is stored
+    assert mock_minio_client.stat_object.call_count == 2
+
+    presign_cache.discard("b.webp")
+    mock_minio_client.stat_object.side_effect = None
+    third = await MinioUtils.presign_files([], existing_only=["b.webp"])
+    assert third == {"b.webp": "http://signed/b.webp"}
+    presign_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_remove_files_in_batches(mock_minio_client):
+    filenames = [f"file_{index}.jpg" for index in range(2500)]
+
+    def remove_objects(bucket, objects):
+        if objects[0]._name != "file_0.jpg":
+            return iter([])
+        error = Mock(message="Access Denied")
+        error.name = objects[1]._name
+        return iter([error])
+
+    mock_minio_client.remove_objects = MagicMock(side_effect=remove_objects)
+
+    result = await MinioUtils.remove_files(filenames + ["file_0.jpg"])
+
+    assert mock_minio_client.remove_objects.call_count == 4
+    batch_sizes = sorted(len(call.args[1]) for call in mock_minio_client.remove_objects.call_args_list)
+    assert batch_sizes == [500, 1000, 1000, 2499 * len(MinioUtils.derived_names("file_0.jpg"))]
+    assert result["errors"] == {"file_1.jpg": "Access Denied"}
+    assert len(result["deleted"]) == 2499
+    assert "file_1.jpg" not in result["deleted"]
+
+
+@pytest.mark.asyncio
+async def test_list_files(mock_minio_client):
+    modified = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    objects = [Mock(object_name=f"file_{index}.jpg", last_modified=modified) for index in range(5)]
+    mock_minio_client.list_objects = MagicMock(return_value=iter(objects))
+
+    result = await MinioUtils.list_files(start_after="file.jpg", limit=2)
+
+    assert result == [
+        {"name": "file_0.jpg", "last_modified": modified.isoformat()},
+        {"name": "file_1.jpg", "last_modified": modified.isoformat()},
+    ]
+    mock_minio_client.list_objects.assert_called_once_with(bucket_name, recursive=True, start_after="file.jpg")
+
+
+@pytest.mark.asyncio
+async def test_remove_file_success(mock_minio_remove_object, mock_minio_client, test_file_data):
     filename = test_file_data[0]
 
     result = await MinioUtils.remove_file(filename)
 
     mock_minio_remove_object.assert_called_once_with(bucket_name, filename)
+    derived = [obj._name for obj in mock_minio_client.remove_objects.call_args.args[1]]
+    assert derived == MinioUtils.derived_names(filename)
 
     assert result == {"status": "success"}
 
@@ -70,7 +239,7 @@ async def test_remove_file_success(mock_minio_remove_object, test_file_data):
                                                                    request_id="mocked_request_id",
                                                                    host_id="mocked_host_id",
                                                                    response=Mock(status=500, data=b"Error response")),
-                                                           "Error while working with MinIO"),
+                                                           "Error while working with storage"),
                                                           (Exception("Mocked generic error"),
                                                            "Internal server error")])
 async def test_remove_file_errors(mock_minio_remove_object, side_effect, expected_detail, test_file_data):
@@ -83,3 +252,66 @@ async def test_remove_file_errors(mock_minio_remove_object, side_effect, expecte
 
     assert excinfo.value.status_code == 500
     assert expected_detail in excinfo.value.detail
+
+
+@pytest.mark.asyncio
+async def test_create_derivatives(mock_minio_client, mock_minio_put_object):
+    image = pytest.importorskip("PIL.Image")
+    buffer = io.BytesIO()
+    image.new("RGB", (2000, 1000), "red").save(buffer, format="PNG")
+    mock_minio_client.get_object.return_value.read.return_value = buffer.getvalue()
+
+    with patch("private_api.utils.get_derivative_executor", return_value=None):
+        names = await MinioUtils.create_derivatives("source.png")
+
+    assert names == MinioUtils.derived_names("source.png")
+    assert names[0] == "derived/thumbnail/source.png.webp"
+    stored = {call.kwargs["object_name"]: call.kwargs for call in mock_minio_put_object.call_args_list}
+    assert set(stored) == set(names)
+    with image.open(stored[names[0]]["data"]) as thumbnail:
+        assert thumbnail.format == "WEBP"
+        assert thumbnail.size == (320, 160)
+    assert stored[names[0]]["content_type"] == "image/webp"
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("bytes=0-99", (0, 99)),
+    ("bytes=900-", (900, 999)),
+    ("bytes=-100", (900, 999)),
+    ("bytes=990-2000", (990, 999)),
+    ("bytes=0-1,5-6", None),
+    ("items=0-1", None),
+    ("bytes=abc", None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=-0"])
+def test_parse_range_unsatisfiable(header):
+    with pytest.raises(HTTPException) as excinfo:
+        parse_range(header, 1000)
+
+    assert excinfo.value.status_code == 416
+    assert excinfo.value.headers == {"Content-Range": "bytes */1000"}
+
+
+def test_etag_matches():
+    assert etag_matches('"a", W/"b"', '"b"')
+    assert etag_matches("*", '"b"')
+    assert not etag_matches('"a"', '"b"')
+    assert not etag_matches(None, '"b"')
+
+
+@pytest.mark.asyncio
+async def test_open_file_streams_chunks(mock_minio_client):
+    response = mock_minio_client.get_object.return_value
+    response.stream.return_value = iter([b"abc", b"def"])
+
+    chunks = await MinioUtils.open_file("file.jpg", offset=10, length=6)
+
+    assert [chunk async for chunk in chunks] == [b"abc", b"def"]
+    mock_minio_client.get_object.assert_called_once_with(bucket_name=bucket_name, object_name="file.jpg",
+                                                         offset=10, length=6)
+    response.release_conn.assert_called_once()
@@ -0,0 +1,65 @@
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch, AsyncMock, MagicMock
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from private_api.warmup import readiness, router, warm_up, warm_up_derivative_workers
+
+
+@pytest.fixture(autouse=True)
+def reset_readiness():
+    readiness.set_not_ready("starting")
+    yield
+    readiness.set_not_ready("starting")
+
+
+def test_readyz_reports_ready_only_after_warm_up():
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app)
+
+    assert client.get("/healthz").status_code == 200
+    assert client.get("/readyz").status_code == 503
+
+    readiness.set_ready()
+    assert client.get("/readyz").json() == {"status": "ready"}
+
+
+@pytest.mark.asyncio
+async def test_warm_up_creates_bucket_off_the_event_loop():
+    mock_create_bucket = MagicMock()
+
+    with patch("private_api.warmup.create_bucket", mock_create_bucket), \
+            patch("private_api.warmup.derivatives_enabled", False):
+        await warm_up()
+
+    mock_create_bucket.assert_called_once_with()
+    assert readiness.ready
+
+
+@pytest.mark.asyncio
+async def test_warm_up_retries_unreachable_storage():
+    mock_create_bucket = MagicMock(side_effect=[ConnectionError("minio:9000 refused"), OSError("timed out"), None])
+    mock_sleep = AsyncMock()
+
+    with patch("private_api.warmup.create_bucket", mock_create_bucket), \
+            patch("private_api.warmup.asyncio.sleep", mock_sleep), \
+            patch("private_api.warmup.derivatives_enabled", False):
+        await warm_up()
+
+    assert mock_create_bucket.call_count == 3
+    assert [call.args[0] for call in mock_sleep.call_args_list] == [1, 2]
+    assert readiness.ready
+
+
+@pytest.mark.asyncio
+async def test_warm_up_derivative_workers_keeps_every_worker_busy():
+    mock_available = MagicMock(return_value=True)
+
+    with ThreadPoolExecutor(max_workers=3) as executor, \
+            patch("private_api.warmup.get_derivative_executor", return_value=executor), \
+            patch("private_api.warmup.derivatives_available", mock_available):
+        await warm_up_derivative_workers(workers=3)
+
+    assert mock_available.call_count == 3
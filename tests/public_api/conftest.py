@@ -1,12 +1,31 @@
+import hashlib
 import pytest
+import pytest_asyncio
 from unittest.mock import patch, AsyncMock, MagicMock
 from fastapi import UploadFile
 
+from public_api.cache import meme_cache
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def clear_meme_cache():
+    await meme_cache.clear()
+    yield
+    await meme_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def mock_presign_images():
+    with patch("public_api.repository.presign_images", new_callable=AsyncMock, return_value={}) as mock:
+        yield mock
+
 
 @pytest.fixture
 def mock_upload_b_file():
     mock_file = MagicMock(spec=UploadFile)
-    mock_file.read = AsyncMock(return_value=b"dummy_image_data")
+    mock_file.content_type = "image/jpeg"
+    mock_file.size = len(b"dummy_image_data")
+    mock_file.read = AsyncMock(side_effect=[b"dummy_image_data", b""])
     return mock_file
 
 
@@ -14,15 +33,19 @@ def mock_upload_b_file():
 def mock_upload_file():
     mock_file = MagicMock(spec=UploadFile)
     mock_file.filename = "test_image.jpg"
+    mock_file.size = len(b"test_image_data")
+    mock_file.read = AsyncMock(side_effect=[b"test_image_data", b""])
     return mock_file
 
 
+@pytest.fixture
+def upload_file_hash() -> str:
+    return hashlib.sha256(b"test_image_data").hexdigest()
+
+
 @pytest.fixture
 def mock_http_client():
-    mock_client = MagicMock()
-    mock_client.__aenter__.return_value = mock_client
-    mock_client.__aexit__ = AsyncMock(return_value=None)
-    return mock_client
+    return MagicMock()
 
 
 @pytest.fixture
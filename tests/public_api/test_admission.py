@@ -0,0 +1,75 @@
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from public_api.admission import AdmissionMiddleware, UploadBudget
+
+
+def make_client(budget: UploadBudget, max_request_size: int = 100) -> TestClient:
+    app = FastAPI()
+    app.add_middleware(AdmissionMiddleware, budget=budget, max_request_size=max_request_size, retry_after=3)
+
+    @app.post("/memes")
+    async def upload(request: Request) -> dict:
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+        return {"size": size, "reserved": budget.bytes}
+
+    @app.post("/memes/search")
+    async def not_an_upload(request: Request) -> dict:
+        return {"size": len(await request.body())}
+
+    return TestClient(app)
+
+
+def test_admits_and_releases():
+    budget = UploadBudget(max_bytes=1000, max_uploads=2)
+
+    response = make_client(budget).post("/memes", content=b"x" * 50)
+
+    assert response.json() == {"size": 50, "reserved": 50}
+    assert (budget.bytes, budget.uploads) == (0, 0)
+
+
+def test_rejects_declared_oversize_body():
+    budget = UploadBudget(max_bytes=1000, max_uploads=2)
+
+    response = make_client(budget).post("/memes", content=b"x" * 101)
+
+    assert response.status_code == 413
+    assert budget.uploads == 0
+
+
+def test_rejects_streamed_oversize_body():
+    budget = UploadBudget(max_bytes=1000, max_uploads=2)
+
+    def chunks():
+        for _ in range(5):
+            yield b"x" * 30
+
+    response = make_client(budget).post("/memes", content=chunks())
+
+    assert response.status_code == 413
+    assert (budget.bytes, budget.uploads) == (0, 0)
+
+
+def test_rejects_when_budget_is_used_up():
+    budget = UploadBudget(max_bytes=1000, max_uploads=2)
+    client = make_client(budget)
+
+    assert budget.try_acquire(960)
+    response = client.post("/memes", content=b"x" * 50)
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "3"
+
+    assert budget.try_acquire(10)
+    response = client.post("/memes", content=b"x")
+    assert response.status_code == 429
+
+
+def test_ignores_other_routes():
+    budget = UploadBudget(max_bytes=0, max_uploads=0)
+
+    response = make_client(budget).post("/memes/search", content=b"x" * 500)
+
+    assert response.json() == {"size": 500}
@@ -0,0 +1,82 @@
+import pytest
+from unittest.mock import patch
+
+from public_api.cache import CacheBackend, LRUCacheBackend, MemeCache
+
+
+@pytest.mark.asyncio
+async def test_lru_evicts_least_recently_used():
+    backend = LRUCacheBackend(max_size=2, ttl=60)
+
+    await backend.set("a", 1)
+    await backend.set("b", 2)
+    assert await backend.get("a") == 1
+    await backend.set("c", 3)
+
+    assert await backend.get("b") is None
+    assert await backend.get("a") == 1
+    assert await backend.get("c") == 3
+    assert len(backend) == 2
+
+
+@pytest.mark.asyncio
+async def test_lru_expires_entries():
+    backend = LRUCacheBackend(max_size=10, ttl=5)
+
+    with patch("public_api.cache.time.monotonic", return_value=100):
+        await backend.set("a", 1)
+    with patch("public_api.cache.time.monotonic", return_value=104):
+        assert await backend.get("a") == 1
+    with patch("public_api.cache.time.monotonic", return_value=105):
+        assert await backend.get("a") is None
+
+
+@pytest.mark.asyncio
+async def test_page_keys_change_with_generation():
+    cache = MemeCache(LRUCacheBackend(max_size=10, ttl=60))
+
+    key = await cache.page_key(offset=0, limit=5, after_id=None)
+    await cache.set_page(key, ["page"])
+    assert await cache.get_page(await cache.page_key(offset=0, limit=5, after_id=None)) == ["page"]
+
+    await cache.invalidate_lists()
+
+    assert await cache.get_page(await cache.page_key(offset=0, limit=5, after_id=None)) is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 1}
+
+
+@pytest.mark.asyncio
+async def test_exact_count_is_dropped_on_write_estimate_is_not():
+    cache = MemeCache(LRUCacheBackend(max_size=10, ttl=60))
+
+    await cache.set_count(await cache.count_key(exact=True), 10)
+    await cache.set_count(await cache.count_key(exact=False), 12)
+    await cache.invalidate_meme(1)
+
+    assert await cache.get_count(await cache.count_key(exact=True)) is None
+    assert await cache.get_count(await cache.count_key(exact=False)) == 12
+
+
+@pytest.mark.asyncio
+async def test_invalidate_memes_drops_each_meme_and_the_lists():
+    cache = MemeCache(LRUCacheBackend(max_size=10, ttl=60))
+    page_key = await cache.page_key(offset=0, limit=5, after_id=None)
+
+    for meme_id in (1, 2, 3):
+        await cache.set_meme(meme_id, {"id": meme_id})
+    await cache.set_page(page_key, ["page"])
+    await cache.invalidate_memes([1, 2])
+
+    assert await cache.get_meme(1) is None
+    assert await cache.get_meme(2) is None
+    assert await cache.get_meme(3) == {"id": 3}
+    assert await cache.get_page(await cache.page_key(offset=0, limit=5, after_id=None)) is None
+
+
+def test_cache_backend_requires_the_whole_interface():
+    class GetOnly(CacheBackend):
+        async def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        GetOnly()
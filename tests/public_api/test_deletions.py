@@ -0,0 +1,86 @@
+import datetime
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+from fastapi import HTTPException
+from sqlalchemy import Delete, Update
+from sqlalchemy.dialects.postgresql import asyncpg
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from public_api.deletions import drain_batch, retry_delay
+from public_api.settings import PRIVATE_SERVICE_URL
+
+
+def claimed(*rows: tuple[int, str, int]) -> MagicMock:
+    return MagicMock(**{"all.return_value": [MagicMock(id=id_, filename=filename, attempts=attempts)
+                                             for id_, filename, attempts in rows]})
+
+
+@pytest.fixture
+def mock_session():
+    session = MagicMock(spec=AsyncSession)
+    with patch("public_api.deletions.new_session") as mock_new_session:
+        mock_new_session.return_value.__aenter__.return_value = session
+        yield session
+
+
+def statements(session: MagicMock, kind: type) -> list:
+    return [call for call in session.execute.call_args_list if isinstance(call.args[0], kind)]
+
+
+@pytest.mark.asyncio
+async def test_drain_batch_removes_and_reschedules(mock_session):
+    mock_session.execute.side_effect = [claimed((1, "hash-a", 0), (2, "hash-b", 2)), MagicMock(), MagicMock()]
+    mock_delete_objects = AsyncMock(return_value={"deleted": ["hash-a"], "errors": {"hash-b": "Access Denied"}})
+
+    with patch("public_api.deletions.delete_objects", mock_delete_objects):
+        report = await drain_batch(MagicMock(), batch_size=10)
+
+    assert report == {"claimed": 2, "deleted": 1, "failed": 1}
+    mock_delete_objects.assert_called_once()
+    assert mock_delete_objects.call_args.kwargs["url"] == f"{PRIVATE_SERVICE_URL}/delete"
+    assert mock_delete_objects.call_args.kwargs["filenames"] == ["hash-a", "hash-b"]
+
+    claim_query = str(mock_session.execute.call_args_list[0].args[0].compile(dialect=asyncpg.dialect()))
+    assert "FOR UPDATE SKIP LOCKED" in claim_query
+
+    [delete_call] = statements(mock_session, Delete)
+    assert delete_call.args[0].compile().params["done"] == [1]
+
+    [update_call] = statements(mock_session, Update)
+    [failed] = update_call.args[1]
+    assert failed["id"] == 2
+    assert failed["attempts"] == 3
+    assert failed["last_error"] == "Access Denied"
+    expected = datetime.datetime.utcnow() + datetime.timedelta(seconds=retry_delay(3))
+    assert abs((failed["next_attempt_at"] - expected).total_seconds()) < 5
+
+
+@pytest.mark.asyncio
+async def test_drain_batch_storage_unavailable(mock_session):
+    mock_session.execute.side_effect = [claimed((1, "hash-a", 0), (2, "hash-b", 0)), MagicMock()]
+
+    with patch("public_api.deletions.delete_objects", side_effect=HTTPException(status_code=503, detail="Down")):
+        report = await drain_batch(MagicMock(), batch_size=10)
+
+    assert report == {"claimed": 2, "deleted": 0, "failed": 2}
+    assert statements(mock_session, Delete) == []
+    [update_call] = statements(mock_session, Update)
+    assert [(row["id"], row["attempts"], row["last_error"]) for row in update_call.args[1]] == [
+        (1, 1, "Down"), (2, 1, "Down")
+    ]
+
+
+@pytest.mark.asyncio
+async def test_drain_batch_empty(mock_session):
+    mock_session.execute.return_value = claimed()
+
+    with patch("public_api.deletions.delete_objects") as mock_delete_objects:
+        report = await drain_batch(MagicMock(), batch_size=10)
+
+    assert report == {"claimed": 0, "deleted": 0, "failed": 0}
+    mock_delete_objects.assert_not_called()
+    mock_session.execute.assert_called_once()
+
+
+def test_retry_delay_backs_off_up_to_maximum():
+    assert [retry_delay(attempts, base=5, maximum=60) for attempts in range(1, 6)] == [5, 10, 20, 40, 60]
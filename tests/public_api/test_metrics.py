@@ -0,0 +1,31 @@
+import pytest
+from unittest.mock import MagicMock
+
+from public_api.metrics import registry, timed_private_call
+from public_api.repository import db_session
+
+
+@pytest.mark.asyncio
+async def test_timed_private_call():
+    @timed_private_call
+    async def fetch_thing():
+        assert registry.get_sample_value("private_api_requests_in_flight") == 1
+        return "thing"
+
+    assert await fetch_thing() == "thing"
+    assert registry.get_sample_value("private_api_request_duration_seconds_count",
+                                     {"operation": "fetch_thing"}) == 1
+    assert registry.get_sample_value("private_api_requests_in_flight") == 0
+
+
+@pytest.mark.asyncio
+async def test_db_session_is_timed(mock_new_session):
+    session = MagicMock()
+    mock_new_session.return_value.__aenter__.return_value = session
+    labels = {"operation": "test_operation"}
+    before = registry.get_sample_value("db_session_duration_seconds_count", labels) or 0
+
+    async with db_session("test_operation") as opened:
+        assert opened is session
+
+    assert registry.get_sample_value("db_session_duration_seconds_count", labels) == before + 1
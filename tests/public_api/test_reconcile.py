@@ -0,0 +1,128 @@
+import datetime
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+
+from sqlalchemy import Delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from public_api.reconcile import reconcile, sweep_stale_uploads
+from public_api.settings import PRIVATE_SERVICE_URL, UPLOAD_URL_EXPIRES
+
+
+OLD = (datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=1)).isoformat()
+NEW = datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+
+def mock_referenced(filenames):
+    async def iter_referenced_filenames(batch_size, uploads_after):
+        for filename in filenames:
+            yield filename
+    return iter_referenced_filenames
+
+
+def mock_listing(objects):
+    async def list_objects(client, url, start_after, limit):
+        names = [stored_object["name"] for stored_object in objects]
+        start = names.index(start_after) + 1 if start_after else 0
+        return objects[start:start + limit]
+    return list_objects
+
+
+@pytest.fixture(autouse=True)
+def mock_sweep_stale_uploads():
+    with patch("public_api.reconcile.sweep_stale_uploads", AsyncMock(return_value=0)) as mock_sweep:
+        yield mock_sweep
+
+
+@pytest.mark.asyncio
+async def test_reconcile_deletes_old_orphans_in_batches():
+    objects = [
+        {"name": "a", "last_modified": OLD},
+        {"name": "b", "last_modified": OLD},
+        {"name": "c", "last_modified": OLD},
+        {"name": "d", "last_modified": NEW},
+        {"name": "e", "last_modified": OLD},
+        {"name": "g", "last_modified": OLD},
+    ]
+    mock_delete_objects = AsyncMock(side_effect=lambda client, url, filenames: {"deleted": filenames, "errors": {}})
+
+    with patch("public_api.reconcile.iter_referenced_filenames", mock_referenced(["b", "f", "g"])), \
+            patch("public_api.reconcile.list_objects", side_effect=mock_listing(objects)), \
+            patch("public_api.reconcile.delete_objects", mock_delete_objects):
+        report = await reconcile(MagicMock(), dry_run=False, grace_period=3600, batch_size=2)
+
+    assert report["objects"] == 6
+    assert report["orphans"] == 3
+    assert report["recent"] == 1
+    assert report["deleted"] == 3
+    assert report["missing"] == 1
+    assert report["missing_sample"] == ["f"]
+    deleted_batches = [call.kwargs["filenames"] for call in mock_delete_objects.call_args_list]
+    assert deleted_batches == [["a", "c"], ["e"]]
+    assert all(call.kwargs["url"] == f"{PRIVATE_SERVICE_URL}/delete" for call in mock_delete_objects.call_args_list)
+
+
+@pytest.mark.asyncio
+async def test_reconcile_dry_run():
+    objects = [{"name": "a", "last_modified": OLD}]
+    mock_delete_objects = AsyncMock()
+
+    with patch("public_api.reconcile.iter_referenced_filenames", mock_referenced([])), \
+            patch("public_api.reconcile.list_objects", side_effect=mock_listing(objects)), \
+            patch("public_api.reconcile.delete_objects", mock_delete_objects):
+        report = await reconcile(MagicMock(), dry_run=True, grace_period=3600, batch_size=10)
+
+    assert report["orphans"] == 1
+    assert report["deleted"] == 0
+    mock_delete_objects.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_reconcile_sweeps_abandoned_upload_reservations(mock_sweep_stale_uploads):
+    mock_sweep_stale_uploads.return_value = 2
+
+    with patch("public_api.reconcile.iter_referenced_filenames", mock_referenced([])), \
+            patch("public_api.reconcile.list_objects", side_effect=mock_listing([])):
+        report = await reconcile(MagicMock(), dry_run=False, grace_period=3600, batch_size=10)
+
+    assert report["stale_uploads"] == 2
+    [uploads_after] = mock_sweep_stale_uploads.call_args.args
+    expected = datetime.datetime.utcnow() - datetime.timedelta(seconds=UPLOAD_URL_EXPIRES + 3600)
+    assert abs((uploads_after - expected).total_seconds()) < 5
+
+    mock_sweep_stale_uploads.reset_mock()
+    with patch("public_api.reconcile.iter_referenced_filenames", mock_referenced([])), \
+            patch("public_api.reconcile.list_objects", side_effect=mock_listing([])):
+        await reconcile(MagicMock(), dry_run=True, grace_period=3600, batch_size=10)
+    mock_sweep_stale_uploads.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_sweep_stale_uploads_deletes_old_reservations():
+    session = MagicMock(spec=AsyncSession)
+    session.execute.return_value = MagicMock(rowcount=3)
+    uploads_after = datetime.datetime(2024, 1, 1)
+
+    with patch("public_api.reconcile.new_session") as mock_new_session:
+        mock_new_session.return_value.__aenter__.return_value = session
+        assert await sweep_stale_uploads(uploads_after) == 3
+
+    statement = session.execute.call_args.args[0]
+    assert isinstance(statement, Delete)
+    assert "meme_uploads.date_added <=" in str(statement)
+    assert uploads_after in statement.compile().params.values()
+
+
+@pytest.mark.asyncio
+async def test_reconcile_ignores_derivatives():
+    objects = [{"name": "a", "last_modified": OLD}, {"name": "derived/thumbnail/a.webp", "last_modified": OLD}]
+    mock_delete_objects = AsyncMock()
+
+    with patch("public_api.reconcile.iter_referenced_filenames", mock_referenced(["a"])), \
+            patch("public_api.reconcile.list_objects", side_effect=mock_listing(objects)), \
+            patch("public_api.reconcile.delete_objects", mock_delete_objects):
+        report = await reconcile(MagicMock(), dry_run=False, grace_period=3600, batch_size=10)
+
+    assert report["objects"] == 1
+    assert report["orphans"] == 0
+    mock_delete_objects.assert_not_called()
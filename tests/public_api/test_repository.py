@@ -2,22 +2,46 @@ import datetime
 import pytest
 from unittest.mock import patch, MagicMock
 from fastapi import HTTPException
+from sqlalchemy import Insert
+from sqlalchemy.dialects.postgresql import asyncpg
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
-from public_api.repository import MemeRepository, Memes
-from public_api.schemas import MemeBase, MemeId, MemeFull
+from public_api.cache import meme_cache
+from public_api.repository import MemeRepository, Memes, MemeUploads, MEME_COLUMNS
+from public_api.schemas import MemeBase, MemeId, MemeFull, UploadReserve, UploadTicket
 from public_api.settings import PRIVATE_SERVICE_URL
+from public_api.utils import thumbnail_name
+
+
+def meme_row(meme_id: int, filename: str = "image.jpg", **fields) -> dict:
+    row = {
+        "id": meme_id, "meme_name": f"Test Meme {meme_id}", "filename": filename,
+        "image_url": f"http://stale/{filename}", "text": f"Text {meme_id}",
+        "date_added": datetime.datetime.now(), "date_updated": datetime.datetime.now(), "has_thumbnail": None
+    }
+    row.update(fields)
+    return row
+
+
+def rows_result(rows: list[dict]) -> MagicMock:
+    return MagicMock(**{"mappings.return_value": rows})
+
+
+def row_result(row) -> MagicMock:
+    return MagicMock(**{"mappings.return_value.one_or_none.return_value": row})
 
 
 @pytest.mark.asyncio
-async def test_create_meme_success(mock_get_image_url, mock_new_session, mock_meme_model, mock_upload_file):
+async def test_create_meme_success(mock_get_image_url, mock_new_session, mock_meme_model, mock_upload_file,
+                                   upload_file_hash):
     mock_meme_data = MemeBase(meme_name="Test Meme", text="This is a test meme")
 
     mock_image_url = "http://mocked-url.com/image.jpg"
     mock_get_image_url.return_value = mock_image_url
 
-    mock_session_instance = MagicMock()
+    mock_session_instance = MagicMock(spec=AsyncSession)
+    mock_session_instance.execute.return_value = MagicMock(**{"scalar_one.return_value": 1})
     mock_new_session.return_value.__aenter__.return_value = mock_session_instance
 
     mock_new_meme_instance = MagicMock()
@@ -34,11 +58,13 @@ async def test_create_meme_success(mock_get_image_url, mock_new_session, mock_me
     assert result.meme_name == mock_meme_data.meme_name
     assert result.image_url == mock_image_url
     assert result.text == mock_meme_data.text
-    mock_get_image_url.assert_called_once_with(url=PRIVATE_SERVICE_URL, image=mock_upload_file,
-                                               filename=mock_upload_file.filename)
+    mock_upload_file.seek.assert_called_once_with(0)
+    mock_get_image_url.assert_called_once_with(client=MemeRepository.http_client, url=PRIVATE_SERVICE_URL,
+                                               image=mock_upload_file, filename=upload_file_hash,
+                                               sha256=upload_file_hash)
     mock_meme_model.assert_called_once_with(
         meme_name=mock_meme_data.meme_name,
-        filename=mock_upload_file.filename,
+        filename=upload_file_hash,
         text=mock_meme_data.text,
         image_url=mock_image_url
     )
@@ -46,12 +72,47 @@ async def test_create_meme_success(mock_get_image_url, mock_new_session, mock_me
 
 
 @pytest.mark.asyncio
-async def test_create_meme_error(mock_get_image_url, mock_new_session, mock_meme_model, mock_upload_file):
+async def test_create_meme_known_content(mock_get_image_url, mock_new_session, mock_meme_model, mock_upload_file,
+                                         upload_file_hash):
+    mock_meme_data = MemeBase(meme_name="Test Meme", text="This is a test meme")
+
+    mock_session_instance = MagicMock(spec=AsyncSession)
+    mock_session_instance.execute.return_value = MagicMock(**{"scalar_one.return_value": 2})
+    mock_new_session.return_value.__aenter__.return_value = mock_session_instance
+
+    mock_new_meme_instance = MagicMock()
+    mock_new_meme_instance.id = 2
+    mock_new_meme_instance.meme_name = mock_meme_data.meme_name
+    mock_new_meme_instance.image_url = "http://mocked-url.com/stored.jpg"
+    mock_new_meme_instance.text = mock_meme_data.text
+    mock_meme_model.return_value = mock_new_meme_instance
+
+    with patch("public_api.repository.stat_object",
+               return_value={"image_url": "http://mocked-url.com/stored.jpg"}) as mock_stat_object:
+        result = await MemeRepository.create_meme(mock_upload_file, mock_meme_data)
+
+    assert result.image_url == "http://mocked-url.com/stored.jpg"
+    mock_stat_object.assert_called_once_with(client=MemeRepository.http_client,
+                                             url=f"{PRIVATE_SERVICE_URL}/objects/{upload_file_hash}")
+    mock_get_image_url.assert_not_called()
+    mock_meme_model.assert_called_once_with(
+        meme_name=mock_meme_data.meme_name,
+        filename=upload_file_hash,
+        text=mock_meme_data.text,
+        image_url="http://mocked-url.com/stored.jpg"
+    )
+
+
+@pytest.mark.asyncio
+async def test_create_meme_error(mock_get_image_url, mock_new_session, mock_meme_model, mock_upload_file,
+                                 upload_file_hash):
     mock_meme_data = MemeBase(meme_name="Test Meme", text="This is a test meme")
 
     mock_get_image_url.side_effect = Exception("Image processing error")
 
-    mock_session_instance = MagicMock()
+    mock_session_instance = MagicMock(spec=AsyncSession)
+    mock_session_instance.execute.return_value = MagicMock(**{"scalar_one.return_value": 1,
+                                                              "all.return_value": []})
     mock_new_session.return_value.__aenter__.return_value = mock_session_instance
 
     with pytest.raises(HTTPException) as exc_info:
@@ -59,43 +120,63 @@ async def test_create_meme_error(mock_get_image_url, mock_new_session, mock_meme
 
     assert exc_info.value.status_code == 500
     assert str(exc_info.value.detail) == "Meme creation error"
-    mock_get_image_url.assert_called_once_with(url=PRIVATE_SERVICE_URL, image=mock_upload_file,
-                                               filename=mock_upload_file.filename)
+    mock_get_image_url.assert_called_once_with(client=MemeRepository.http_client, url=PRIVATE_SERVICE_URL,
+                                               image=mock_upload_file, filename=upload_file_hash,
+                                               sha256=upload_file_hash)
+    assert queued_deletions(mock_session_instance) == [upload_file_hash]
     mock_meme_model.assert_not_called()
     mock_session_instance.add.assert_not_called()
 
 
 @pytest.mark.asyncio
-async def test_get_memes_success(mock_new_session):
+async def test_create_meme_rejects_oversized_file(mock_get_image_url, mock_new_session, mock_upload_file):
+    mock_upload_file.size = 10
+
+    with patch("public_api.repository.UPLOAD_MAX_FILE_SIZE", 5), pytest.raises(HTTPException) as exc_info:
+        await MemeRepository.create_meme(mock_upload_file, MemeBase(meme_name="Big", text="t"))
+
+    assert exc_info.value.status_code == 413
+    mock_get_image_url.assert_not_called()
+    mock_new_session.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_create_meme_relays_private_admission(mock_get_image_url, mock_new_session, mock_upload_file):
     mock_session_instance = MagicMock(spec=AsyncSession)
+    mock_session_instance.execute.return_value = MagicMock(**{"scalar_one.return_value": 1, "all.return_value": []})
     mock_new_session.return_value.__aenter__.return_value = mock_session_instance
+    mock_get_image_url.side_effect = HTTPException(status_code=429, detail="Busy", headers={"Retry-After": "1"})
+
+    with pytest.raises(HTTPException) as exc_info:
+        await MemeRepository.create_meme(mock_upload_file, MemeBase(meme_name="Busy", text="t"))
+
+    assert exc_info.value.status_code == 429
+    assert exc_info.value.headers == {"Retry-After": "1"}
 
-    mock_meme_instances = [
-        Memes(id=1, meme_name="Test Meme 1", filename="image1.jpg", image_url="http://example.com/image1.jpg",
-              text="Text 1", date_added=datetime.datetime.now(), date_updated=datetime.datetime.now()),
-        Memes(id=2, meme_name="Test Meme 2", filename="image2.jpg", image_url="http://example.com/image2.jpg",
-              text="Text 2", date_added=datetime.datetime.now(), date_updated=datetime.datetime.now()),
-    ]
 
-    mock_query_result = MagicMock()
-    mock_query_result.scalars().all.return_value = mock_meme_instances
+@pytest.mark.asyncio
+async def test_get_memes_success(mock_new_session):
+    mock_session_instance = MagicMock(spec=AsyncSession)
+    mock_new_session.return_value.__aenter__.return_value = mock_session_instance
 
-    mock_session_instance.execute.return_value = mock_query_result
+    mock_rows = [meme_row(1, "image1.jpg"), meme_row(2, "image2.jpg")]
+    mock_session_instance.execute.return_value = rows_result(mock_rows)
 
     offset = 0
     limit = 10
     result = await MemeRepository.get_memes(offset, limit)
 
     assert isinstance(result, list)
-    assert len(result) == len(mock_meme_instances)
+    assert len(result) == len(mock_rows)
 
     for meme in result:
-        assert isinstance(meme, MemeFull)
-        assert meme.meme_name in ["Test Meme 1", "Test Meme 2"]
-        assert meme.image_url in ["http://example.com/image1.jpg", "http://example.com/image2.jpg"]
-        assert meme.text in ["Text 1", "Text 2"]
+        MemeFull.model_validate(meme)
+        assert "filename" not in meme
+        assert meme["meme_name"] in ["Test Meme 1", "Test Meme 2"]
+        assert meme["image_url"] in ["http://stale/image1.jpg", "http://stale/image2.jpg"]
+        assert meme["text"] in ["Text 1", "Text 2"]
 
-    query = select(Memes).offset(offset).limit(limit)
+    query = select(*MEME_COLUMNS).order_by(Memes.id).offset(offset).limit(limit)
 
     assert mock_session_instance.execute.call_count == 1
     called_args, _ = mock_session_instance.execute.call_args
@@ -103,6 +184,128 @@ async def test_get_memes_success(mock_new_session):
     assert called_args[0].compile().params == query.compile().params
 
 
+@pytest.mark.asyncio
+async def test_get_memes_fresh_urls(mock_new_session, mock_presign_images):
+    mock_session_instance = MagicMock(spec=AsyncSession)
+    mock_new_session.return_value.__aenter__.return_value = mock_session_instance
+
+    mock_session_instance.execute.return_value = rows_result(
+        [meme_row(1, "image1.jpg", has_thumbnail=True), meme_row(2, "image2.jpg"), meme_row(3, "image3.jpg")]
+    )
+    mock_presign_images.return_value = {
+        "image1.jpg": "http://fresh/image1.jpg",
+        thumbnail_name("image1.jpg"): "http://fresh/thumbnail1.webp"
+    }
+
+    result = await MemeRepository.get_memes(0, 10)
+
+    assert [meme["image_url"] for meme in result] == [
+        "http://fresh/image1.jpg", "http://stale/image2.jpg", "http://stale/image3.jpg"
+    ]
+    assert "filename" not in result[0]
+    assert "has_thumbnail" not in result[0]
+    # Only thumbnails recorded as rendered are signed, without asking storage whether they exist
+    mock_presign_images.assert_called_once_with(
+        client=MemeRepository.http_client,
+        url=f"{PRIVATE_SERVICE_URL}/presign",
+        filenames=["image1.jpg", "image2.jpg", "image3.jpg", thumbnail_name("image1.jpg")]
+    )
+    assert [meme["thumbnail_url"] for meme in result] == ["http://fresh/thumbnail1.webp", None, None]
+
+
+@pytest.mark.asyncio
+async def test_get_meme_thumbnail_url(mock_new_session, mock_presign_images):
+    mock_session_instance = MagicMock(spec=AsyncSession)
+    mock_new_session.return_value.__aenter__.return_value = mock_session_instance
+    mock_session_instance.execute.return_value = row_result(meme_row(1, "image1.jpg", has_thumbnail=True))
+    mock_presign_images.return_value = {
+        "image1.jpg": "http://fresh/image1.jpg",
+        thumbnail_name("image1.jpg"): "http://fresh/thumbnail.webp"
+    }
+
+    result = await MemeRepository.get_meme(1)
+
+    assert result["thumbnail_url"] == "http://fresh/thumbnail.webp"
+    assert thumbnail_name("image1.jpg") == "derived/thumbnail/image1.jpg.webp"
+
+
+@pytest.mark.asyncio
+async def test_get_meme_without_derivatives_has_no_thumbnail_url(mock_new_session, mock_presign_images):
+    mock_session_instance = MagicMock(spec=AsyncSession)
+    mock_new_session.return_value.__aenter__.return_value = mock_session_instance
+    mock_session_instance.execute.return_value = row_result(meme_row(1, "image1.jpg", has_thumbnail=True))
+    mock_presign_images.return_value = {"image1.jpg": "http://fresh/image1.jpg"}
+
+    with patch("public_api.repository.DERIVATIVES_ENABLED", False):
+        result = await MemeRepository.get_meme(1)
+
+    assert result["thumbnail_url"] is None
+    assert mock_presign_images.call_args.kwargs["filenames"] == ["image1.jpg"]
+
+
+@pytest.mark.asyncio
+async def test_search_memes(mock_new_session):
+    mock_session_instance = MagicMock(spec=AsyncSession)
+    mock_new_session.return_value.__aenter__.return_value = mock_session_instance
+    mock_session_instance.execute.return_value = rows_result([meme_row(7, "cat.jpg", rank=0.5)])
+
+    result = await MemeRepository.search_memes("cat 50%", limit=10, after=(0.75, 3))
+
+    assert [(meme["id"], meme["rank"]) for meme in result] == [(7, 0.5)]
+    statement = mock_session_instance.execute.call_args.args[0]
+    compiled = statement.compile(dialect=asyncpg.dialect())
+    sql = str(compiled)
+    assert "websearch_to_tsquery('simple'::regconfig" in sql
+    assert "memes.search_vector @@" in sql
+    assert "memes.meme_name % " in sql
+    assert "ORDER BY greatest(" in sql and "DESC, memes.id" in sql
+    assert "cat 50\\%%" in compiled.params.values()
+    assert 0.75 in compiled.params.values() and 3 in compiled.params.values()
+
+
+@pytest.mark.asyncio
+async def test_get_image_name(mock_new_session):
+    mock_session_instance = MagicMock(spec=AsyncSession)
+    mock_new_session.return_value.__aenter__.return_value = mock_session_instance
+    mock_session_instance.execute.return_value = row_result(meme_row(1, "image1.jpg"))
+
+    assert await MemeRepository.get_image_name(1) == "image1.jpg"
+
+
+@pytest.mark.asyncio
+async def test_open_image():
+    with patch("public_api.repository.open_object") as mock_open_object:
+        result = await MemeRepository.open_image("image1.jpg", headers={"range": "bytes=0-9"})
+
+    assert result is mock_open_object.return_value
+    mock_open_object.assert_called_once_with(client=MemeRepository.http_client,
+                                             url=f"{PRIVATE_SERVICE_URL}/objects/image1.jpg/content",
+                                             headers={"range": "bytes=0-9"})
+
+
+@pytest.mark.asyncio
+async def test_open_image_quotes_filename():
+    with patch("public_api.repository.open_object") as mock_open_object:
+        await MemeRepository.open_image("legacy/a b#1?.png", headers={})
+
+    assert mock_open_object.call_args.kwargs["url"] == (
+        f"{PRIVATE_SERVICE_URL}/objects/legacy%2Fa%20b%231%3F.png/content"
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_memes_presign_failure_serves_stored_urls(mock_new_session, mock_presign_images):
+    mock_session_instance = MagicMock(spec=AsyncSession)
+    mock_new_session.return_value.__aenter__.return_value = mock_session_instance
+
+    mock_session_instance.execute.return_value = rows_result([meme_row(1, "image1.jpg")])
+    mock_presign_images.side_effect = HTTPException(status_code=500, detail="Presign error")
+
+    result = await MemeRepository.get_memes(0, 10)
+
+    assert result[0]["image_url"] == "http://stale/image1.jpg"
+
+
 @pytest.mark.asyncio
 async def test_get_memes_error_handling(mock_new_session):
     mock_session_instance = MagicMock(spec=AsyncSession)
@@ -120,8 +323,25 @@ async def test_get_memes_error_handling(mock_new_session):
 
     mock_session_instance.execute.assert_called_once()
     actual_query = mock_session_instance.execute.call_args[0][0]
-    expected_query = select(Memes).offset(offset).limit(limit)
+    expected_query = select(*MEME_COLUMNS).order_by(Memes.id).offset(offset).limit(limit)
+    assert str(actual_query) == str(expected_query)
+
+
+@pytest.mark.asyncio
+async def test_get_memes_after_cursor(mock_new_session):
+    mock_session_instance = MagicMock(spec=AsyncSession)
+    mock_new_session.return_value.__aenter__.return_value = mock_session_instance
+
+    mock_session_instance.execute.return_value = rows_result([])
+
+    result = await MemeRepository.get_memes(offset=0, limit=10, after_id=42)
+
+    assert result == []
+    actual_query = mock_session_instance.execute.call_args[0][0]
+    expected_query = select(*MEME_COLUMNS).order_by(Memes.id).where(Memes.id > 42).limit(10)
     assert str(actual_query) == str(expected_query)
+    assert "OFFSET" not in str(actual_query)
+    assert actual_query.compile().params == expected_query.compile().params
 
 
 @pytest.mark.asyncio
@@ -130,18 +350,55 @@ async def test_get_meme_success(mock_new_session):
     mock_new_session.return_value.__aenter__.return_value = mock_session_instance
 
     meme_id = 1
-    mock_meme = Memes(id=meme_id, meme_name="Test Meme", filename="image.jpg", image_url="http://example.com/image.jpg",
-                      text="Test Text", date_added=datetime.datetime.now(), date_updated=datetime.datetime.now())
-
-    mock_session_instance.get.return_value = mock_meme
+    mock_session_instance.execute.return_value = row_result(meme_row(meme_id, meme_name="Test Meme"))
 
     result = await MemeRepository.get_meme(meme_id)
 
-    assert isinstance(result, Memes)
-    assert result.id == meme_id
-    assert result.meme_name == "Test Meme"
+    MemeFull.model_validate(result)
+    assert result["id"] == meme_id
+    assert result["meme_name"] == "Test Meme"
+
+    mock_session_instance.execute.assert_called_once()
+    actual_query = mock_session_instance.execute.call_args[0][0]
+    assert str(actual_query) == str(select(*MEME_COLUMNS).where(Memes.id == meme_id))
+
+
+@pytest.mark.asyncio
+async def test_get_meme_cached(mock_new_session):
+    mock_session_instance = MagicMock(spec=AsyncSession)
+    mock_new_session.return_value.__aenter__.return_value = mock_session_instance
+
+    meme_id = 1
+    mock_session_instance.execute.return_value = row_result(meme_row(meme_id))
+
+    first = await MemeRepository.get_meme(meme_id)
+    second = await MemeRepository.get_meme(meme_id)
+
+    assert first == second
+    mock_session_instance.execute.assert_called_once()
+    assert meme_cache.stats()["hits"] == 1
+    assert meme_cache.stats()["misses"] == 1
+
+    await meme_cache.invalidate_meme(meme_id)
+    await MemeRepository.get_meme(meme_id)
+
+    assert mock_session_instance.execute.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_get_memes_cached_until_write(mock_new_session):
+    mock_session_instance = MagicMock(spec=AsyncSession)
+    mock_new_session.return_value.__aenter__.return_value = mock_session_instance
+
+    mock_session_instance.execute.return_value = rows_result([])
 
-    mock_session_instance.get.assert_called_once_with(Memes, meme_id)
+    await MemeRepository.get_memes(offset=0, limit=10)
+    await MemeRepository.get_memes(offset=0, limit=10)
+    assert mock_session_instance.execute.call_count == 1
+
+    await meme_cache.invalidate_lists()
+    await MemeRepository.get_memes(offset=0, limit=10)
+    assert mock_session_instance.execute.call_count == 2
 
 
 @pytest.mark.asyncio
@@ -150,7 +407,7 @@ async def test_get_meme_not_found(mock_new_session):
     mock_new_session.return_value.__aenter__.return_value = mock_session_instance
 
     meme_id = 10
-    mock_session_instance.get.return_value = None
+    mock_session_instance.execute.return_value = row_result(None)
 
     with pytest.raises(HTTPException) as exc_info:
         await MemeRepository.get_meme(meme_id)
@@ -158,7 +415,7 @@ async def test_get_meme_not_found(mock_new_session):
     assert exc_info.value.status_code == 404
     assert exc_info.value.detail == "Meme not found"
 
-    mock_session_instance.get.assert_called_once_with(Memes, meme_id)
+    mock_session_instance.execute.assert_called_once()
 
 
 @pytest.mark.asyncio
@@ -167,7 +424,7 @@ async def test_get_meme_error(mock_new_session):
     mock_new_session.return_value.__aenter__.return_value = mock_session_instance
 
     meme_id = 1
-    mock_session_instance.get.side_effect = Exception("Database error")
+    mock_session_instance.execute.side_effect = Exception("Database error")
 
     with pytest.raises(HTTPException) as exc_info:
         await MemeRepository.get_meme(meme_id)
@@ -175,67 +432,151 @@ async def test_get_meme_error(mock_new_session):
     assert exc_info.value.status_code == 500
     assert exc_info.value.detail == "Meme retrieval error"
 
-    mock_session_instance.get.assert_called_once_with(Memes, meme_id)
+    mock_session_instance.execute.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_count_memes_estimated(mock_new_session):
+    mock_session_instance = MagicMock(spec=AsyncSession)
+    mock_new_session.return_value.__aenter__.return_value = mock_session_instance
+    mock_session_instance.scalar.return_value = 1200
+
+    assert await MemeRepository.count_memes() == 1200
+    assert await MemeRepository.count_memes() == 1200
+
+    mock_session_instance.scalar.assert_called_once()
+    assert "pg_class" in str(mock_session_instance.scalar.call_args.args[0])
+
+
+@pytest.mark.asyncio
+async def test_count_memes_estimate_falls_back_to_count(mock_new_session):
+    mock_session_instance = MagicMock(spec=AsyncSession)
+    mock_new_session.return_value.__aenter__.return_value = mock_session_instance
+    mock_session_instance.scalar.side_effect = [None, 3]
+
+    assert await MemeRepository.count_memes() == 3
+    assert "count(*)" in str(mock_session_instance.scalar.call_args.args[0])
+
+
+@pytest.mark.asyncio
+async def test_count_memes_exact_until_next_write(mock_new_session):
+    mock_session_instance = MagicMock(spec=AsyncSession)
+    mock_new_session.return_value.__aenter__.return_value = mock_session_instance
+    mock_session_instance.scalar.side_effect = [7, 8]
+
+    assert await MemeRepository.count_memes(exact=True) == 7
+    assert await MemeRepository.count_memes(exact=True) == 7
+    await meme_cache.invalidate_lists()
+    assert await MemeRepository.count_memes(exact=True) == 8
+
+    assert mock_session_instance.scalar.call_count == 2
+    assert all("count(*)" in str(call.args[0]) for call in mock_session_instance.scalar.call_args_list)
 
 
 @pytest.mark.asyncio
-async def test_update_meme_success(mock_new_session, mock_upload_file, mock_get_image_url, mock_meme_model):
+async def test_update_meme_success(mock_new_session, mock_upload_file, mock_get_image_url, upload_file_hash):
     meme_id = 1
     mock_meme_data = MemeBase(meme_name="Updated Test Meme", text="This is an updated test meme")
     mock_image_url = "http://mocked-url.com/updated_image.jpg"
     mock_get_image_url.return_value = mock_image_url
+    read_at = datetime.datetime(2024, 1, 1, 12, 0, 0, 123456)
 
     mock_session_instance = MagicMock(spec=AsyncSession)
+    mock_session_instance.execute.side_effect = [
+        row_result({"filename": "image1.jpg", "date_updated": read_at}),
+        MagicMock(**{"scalar_one.return_value": 1}),
+        MagicMock(),
+        row_result(meme_row(meme_id, filename=upload_file_hash, image_url=mock_image_url,
+                            meme_name="Updated Test Meme", text="This is an updated test meme")),
+        MagicMock(**{"all.return_value": [("image1.jpg", 1)]}),
+    ]
     mock_new_session.return_value.__aenter__.return_value = mock_session_instance
-    mock_meme_instance = Memes(
-        id=1, meme_name="Test Meme 1", filename="image1.jpg", image_url="http://example.com/image1.jpg", text="Text 1",
-        date_added=datetime.datetime.now(), date_updated=datetime.datetime.now())
-    mock_session_instance.get.return_value = mock_meme_instance
-
-    mock_upload_file.filename = "updated_test_image.jpg"
 
     updated_meme = await MemeRepository.update_meme(meme_id, mock_upload_file, mock_meme_data)
 
-    mock_meme_instance.filename = mock_upload_file.filename
-    mock_meme_instance.old_filename = "image1.jpg"
-
     mock_get_image_url.assert_called_once_with(
+        client=MemeRepository.http_client,
         url=PRIVATE_SERVICE_URL,
         image=mock_upload_file,
-        filename=mock_upload_file.filename,
-        old_filename="image1.jpg"
+        filename=upload_file_hash,
+        sha256=upload_file_hash
     )
-    mock_session_instance.add.assert_called_once_with(mock_meme_instance)
-    mock_session_instance.commit.assert_called_once()
+    update_query = mock_session_instance.execute.call_args_list[3].args[0].compile(dialect=asyncpg.dialect())
+    assert "memes.date_updated = $" in str(update_query)
+    assert read_at in update_query.params.values()
+    assert update_query.params["filename"] == upload_file_hash
+    # The new image's thumbnail is checked again by `public_api.thumbnails`
+    assert "has_thumbnail" in update_query.params and update_query.params["has_thumbnail"] is None
 
     assert updated_meme.meme_name == "Updated Test Meme"
     assert updated_meme.image_url == mock_image_url
 
 
 @pytest.mark.asyncio
-async def test_update_meme_not_found(mock_new_session, mock_upload_file, mock_get_image_url, mock_meme_model):
+async def test_update_meme_text_only(mock_new_session, mock_get_image_url):
+    mock_session_instance = MagicMock(spec=AsyncSession)
+    mock_session_instance.execute.return_value = row_result(meme_row(1, text="New text"))
+    mock_new_session.return_value.__aenter__.return_value = mock_session_instance
+
+    updated_meme = await MemeRepository.update_meme(1, None, MemeBase(text="New text"))
+
+    assert updated_meme.text == "New text"
+    mock_session_instance.execute.assert_called_once()
+    mock_get_image_url.assert_not_called()
+    update_query = mock_session_instance.execute.call_args.args[0].compile(dialect=asyncpg.dialect())
+    assert "date_updated = $" not in str(update_query).split("WHERE")[1]
+
+
+@pytest.mark.asyncio
+async def test_update_meme_concurrent_change(mock_new_session, mock_upload_file, mock_get_image_url,
+                                             upload_file_hash):
+    mock_get_image_url.return_value = "http://mocked-url.com/updated_image.jpg"
+
+    mock_session_instance = MagicMock(spec=AsyncSession)
+    mock_session_instance.execute.side_effect = [
+        row_result({"filename": "image1.jpg", "date_updated": datetime.datetime.now()}),
+        MagicMock(**{"scalar_one.return_value": 1}),
+        MagicMock(),
+        row_result(None),
+        MagicMock(**{"all.return_value": [(upload_file_hash, 0)]}),
+        MagicMock(),
+        MagicMock(),
+    ]
+    mock_session_instance.scalar.return_value = 1
+    mock_new_session.return_value.__aenter__.return_value = mock_session_instance
+
+    with pytest.raises(HTTPException) as exc_info:
+        await MemeRepository.update_meme(1, mock_upload_file, MemeBase(text="New text"))
+
+    assert exc_info.value.status_code == 409
+    assert queued_deletions(mock_session_instance) == [upload_file_hash]
+
+
+@pytest.mark.asyncio
+async def test_update_meme_not_found(mock_new_session, mock_upload_file, mock_get_image_url):
     meme_id = 1
     mock_meme_data = MemeBase(meme_name="Updated Test Meme", text="This is an updated test meme")
 
     mock_session_instance = MagicMock(spec=AsyncSession)
     mock_new_session.return_value.__aenter__.return_value = mock_session_instance
-    mock_session_instance.get.return_value = None
+    mock_session_instance.execute.return_value = row_result(None)
 
-    with pytest.raises(HTTPException):
+    with pytest.raises(HTTPException) as exc_info:
         await MemeRepository.update_meme(meme_id, mock_upload_file, mock_meme_data)
 
+    assert exc_info.value.status_code == 404
+    mock_get_image_url.assert_not_called()
+
 
 @pytest.mark.asyncio
-async def test_update_meme_image_error(mock_new_session, mock_upload_file, mock_get_image_url, mock_meme_model):
+async def test_update_meme_image_error(mock_new_session, mock_upload_file, mock_get_image_url):
     meme_id = 1
     mock_meme_data = MemeBase(meme_name="Updated Test Meme", text="This is an updated test meme")
 
     mock_session_instance = MagicMock(spec=AsyncSession)
     mock_new_session.return_value.__aenter__.return_value = mock_session_instance
-    mock_meme_instance = Memes(
-        id=1, meme_name="Test Meme 1", filename="image1.jpg", image_url="http://example.com/image1.jpg", text="Text 1",
-        date_added=datetime.datetime.now(), date_updated=datetime.datetime.now())
-    mock_session_instance.get.return_value = mock_meme_instance
+    mock_session_instance.execute.return_value = row_result({"filename": "image1.jpg",
+                                                             "date_updated": datetime.datetime.now()})
 
     mock_upload_file.filename = "updated_test_image.jpg"
     mock_upload_file.read.side_effect = IOError("Unable to read uploaded file")
@@ -244,82 +585,234 @@ async def test_update_meme_image_error(mock_new_session, mock_upload_file, mock_
         await MemeRepository.update_meme(meme_id, mock_upload_file, mock_meme_data)
 
 
+def queued_deletions(session: MagicMock) -> list[str]:
+    """Filenames queued in `object_deletions` by the statements the session executed."""
+    filenames = []
+    for call in session.execute.call_args_list:
+        statement = call.args[0]
+        if isinstance(statement, Insert) and statement.table.name == "object_deletions":
+            params = statement.compile(dialect=asyncpg.dialect()).params
+            filenames.extend(value for key, value in params.items() if key.startswith("filename"))
+    return sorted(filenames)
+
+
+def deleted_meme(meme_id: int = 1, filename: str = "test_image.jpg") -> dict:
+    return {"id": meme_id, "meme_name": "Test Meme", "image_url": f"http://stale/{filename}", "text": "Text",
+            "filename": filename}
+
+
 @pytest.mark.asyncio
 async def test_delete_meme_success(mock_new_session):
     mock_session_instance = MagicMock(spec=AsyncSession)
     mock_new_session.return_value.__aenter__.return_value = mock_session_instance
+    mock_session_instance.execute.side_effect = [
+        row_result(deleted_meme()),
+        MagicMock(**{"all.return_value": []}),
+        MagicMock(),
+        MagicMock(),
+    ]
 
-    meme_id = 1
-    meme = Memes(id=meme_id, meme_name="Test Meme", filename="test_image.jpg", date_added=datetime.datetime.now(),
-                 date_updated=datetime.datetime.now())
-    mock_session_instance.get.return_value = meme
-
-    with patch("public_api.repository.delete_object", return_value=True) as mock_delete_object:
-        result = await MemeRepository.delete_meme(meme_id)
+    result = await MemeRepository.delete_meme(1)
 
-        assert result == meme
-        mock_session_instance.get.assert_called_once_with(Memes, meme_id)
-        mock_delete_object.assert_called_once_with(url=f"{PRIVATE_SERVICE_URL}/test_image.jpg")
-        mock_session_instance.delete.assert_called_once_with(meme)
-        mock_session_instance.commit.assert_called_once()
+    assert result.id == 1
+    assert result.deleted
+    assert queued_deletions(mock_session_instance) == ["test_image.jpg"]
 
 
 @pytest.mark.asyncio
 async def test_delete_meme_not_found(mock_new_session):
     mock_session_instance = MagicMock(spec=AsyncSession)
     mock_new_session.return_value.__aenter__.return_value = mock_session_instance
-    meme_id = 1
-    mock_session_instance.get.return_value = None
+    mock_session_instance.execute.return_value = row_result(None)
 
     with pytest.raises(HTTPException) as exc_info:
-        await MemeRepository.delete_meme(meme_id)
+        await MemeRepository.delete_meme(1)
 
     assert exc_info.value.status_code == 404
     assert exc_info.value.detail == "Meme not found"
-    mock_session_instance.get.assert_called_once_with(Memes, meme_id)
+    assert queued_deletions(mock_session_instance) == []
 
 
 @pytest.mark.asyncio
-async def test_delete_meme_file_deletion_error(mock_new_session):
+async def test_delete_meme_db_error(mock_new_session):
     mock_session_instance = MagicMock(spec=AsyncSession)
     mock_new_session.return_value.__aenter__.return_value = mock_session_instance
+    mock_session_instance.execute.side_effect = Exception("Database error")
 
-    meme_id = 1
-    meme = Memes(id=meme_id, meme_name="Test Meme", filename="test_image.jpg", date_added=datetime.datetime.now(),
-                 date_updated=datetime.datetime.now())
-    mock_session_instance.get.return_value = meme
+    with pytest.raises(HTTPException) as exc_info:
+        await MemeRepository.delete_meme(1)
 
-    with patch("public_api.repository.delete_object",
-               side_effect=HTTPException(status_code=500, detail="File deletion error")) as mock_delete_object:
-        with pytest.raises(HTTPException) as exc_info:
-            await MemeRepository.delete_meme(meme_id)
+    assert exc_info.value.status_code == 500
+    assert exc_info.value.detail == "An unexpected error occurred while deleting the meme"
+
+
+@pytest.mark.asyncio
+async def test_reserve_upload_success(mock_new_session):
+    mock_session_instance = MagicMock(spec=AsyncSession)
+    mock_new_session.return_value.__aenter__.return_value = mock_session_instance
+    mock_session_instance.add.side_effect = lambda instance: setattr(instance, "id", 1)
+    upload_data = UploadReserve(meme_name="Test Meme", text="Test Text", filename="image.jpg")
+
+    with patch("public_api.repository.reserve_object",
+               return_value={"object_name": "abc_image.jpg", "upload_url": "http://minio/put"}) as mock_reserve:
+        result = await MemeRepository.reserve_upload(upload_data)
 
-        assert exc_info.value.status_code == 500
-        assert exc_info.value.detail == "Meme deletion error: File deletion error"
-        mock_session_instance.get.assert_called_once_with(Memes, meme_id)
-        mock_delete_object.assert_called_once_with(url=f"{PRIVATE_SERVICE_URL}/test_image.jpg")
-        mock_session_instance.delete.assert_not_called()
-        mock_session_instance.commit.assert_not_called()
+    assert isinstance(result, UploadTicket)
+    assert result.upload_url == "http://minio/put"
+    mock_reserve.assert_called_once_with(client=MemeRepository.http_client, url=f"{PRIVATE_SERVICE_URL}/uploads",
+                                         filename="image.jpg")
+    added = mock_session_instance.add.call_args[0][0]
+    assert isinstance(added, MemeUploads)
+    assert added.filename == "abc_image.jpg"
 
 
 @pytest.mark.asyncio
-async def test_delete_meme_db_error(mock_new_session):
+async def test_complete_upload_success(mock_new_session):
     mock_session_instance = MagicMock(spec=AsyncSession)
     mock_new_session.return_value.__aenter__.return_value = mock_session_instance
+    mock_session_instance.add.side_effect = lambda instance: setattr(instance, "id", 7)
+    upload = MemeUploads(id=1, meme_name="Test Meme", filename="abc_image.jpg", text="Test Text")
+    mock_session_instance.get.return_value = upload
 
-    meme_id = 1
-    meme = Memes(id=meme_id, meme_name="Test Meme", filename="test_image.jpg", date_added=datetime.datetime.now(),
-                 date_updated=datetime.datetime.now())
-    mock_session_instance.get.return_value = meme
+    with patch("public_api.repository.verify_object",
+               return_value={"image_url": "http://minio/abc_image.jpg", "size": 10, "content_type": "image/jpeg"}):
+        result = await MemeRepository.complete_upload(1)
+
+    assert isinstance(result, MemeId)
+    assert result.id == 7
+    assert result.meme_name == "Test Meme"
+    assert result.image_url == "http://minio/abc_image.jpg"
+    added = mock_session_instance.add.call_args[0][0]
+    assert isinstance(added, Memes)
+    assert added.filename == "abc_image.jpg"
+    mock_session_instance.execute.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_complete_upload_not_found(mock_new_session):
+    mock_session_instance = MagicMock(spec=AsyncSession)
+    mock_new_session.return_value.__aenter__.return_value = mock_session_instance
+    mock_session_instance.get.return_value = None
+
+    with pytest.raises(HTTPException) as exc_info:
+        await MemeRepository.complete_upload(1)
+
+    assert exc_info.value.status_code == 404
+    assert exc_info.value.detail == "Upload not found"
 
-    with patch("public_api.repository.delete_object", return_value=True):
-        mock_session_instance.delete.side_effect = Exception("Database error")
 
+@pytest.mark.asyncio
+async def test_complete_upload_invalid_object(mock_new_session):
+    mock_session_instance = MagicMock(spec=AsyncSession)
+    mock_new_session.return_value.__aenter__.return_value = mock_session_instance
+    mock_session_instance.get.return_value = MemeUploads(id=1, meme_name="Test Meme", filename="abc_image.jpg",
+                                                         text="Test Text")
+
+    with patch("public_api.repository.verify_object",
+               side_effect=HTTPException(status_code=400, detail="Invalid content type")):
         with pytest.raises(HTTPException) as exc_info:
-            await MemeRepository.delete_meme(meme_id)
+            await MemeRepository.complete_upload(1)
+
+    assert exc_info.value.status_code == 400
+    mock_session_instance.execute.assert_called_once()
+    mock_session_instance.add.assert_not_called()
+
 
-        assert exc_info.value.status_code == 500
-        assert exc_info.value.detail == "An unexpected error occurred while deleting the meme"
-        mock_session_instance.get.assert_called_once_with(Memes, meme_id)
-        mock_session_instance.delete.assert_called_once_with(meme)
-        mock_session_instance.commit.assert_not_called()
+@pytest.mark.asyncio
+async def test_delete_meme_shared_object_kept(mock_new_session):
+    mock_session_instance = MagicMock(spec=AsyncSession)
+    mock_new_session.return_value.__aenter__.return_value = mock_session_instance
+    mock_session_instance.execute.side_effect = [
+        row_result(deleted_meme(filename="abc123")),
+        MagicMock(**{"all.return_value": [("abc123", 1)]}),
+    ]
+
+    result = await MemeRepository.delete_meme(1)
+
+    assert result.id == 1
+    assert mock_session_instance.execute.call_count == 2
+    assert queued_deletions(mock_session_instance) == []
+
+
+@pytest.mark.asyncio
+async def test_create_memes_batch(mock_new_session):
+    mock_session_instance = MagicMock(spec=AsyncSession)
+    mock_new_session.return_value.__aenter__.return_value = mock_session_instance
+    mock_session_instance.execute.return_value = [
+        MagicMock(id=10, meme_name="First", image_url="http://minio/a", text="a"),
+    ]
+
+    images = [MagicMock(), MagicMock(), MagicMock(), MagicMock()]
+    items = [
+        (images[0], MemeBase(meme_name="First", text="a")),
+        (images[1], MemeBase(meme_name="Broken", text="b")),
+        (images[2], MemeBase(meme_name="First", text="c")),
+        (images[3], MemeBase(meme_name="Taken", text="d")),
+    ]
+    stored = {
+        id(images[0]): ("hash-a", "http://minio/a"),
+        id(images[2]): ("hash-c", "http://minio/c"),
+        id(images[3]): ("hash-d", "http://minio/d"),
+    }
+
+    async def store_image(image):
+        if id(image) not in stored:
+            raise HTTPException(status_code=500, detail="Upload failed")
+        return stored[id(image)]
+
+    with patch.object(MemeRepository, "_store_image", side_effect=store_image), \
+            patch.object(MemeRepository, "_release_image") as mock_release_image:
+        results = await MemeRepository.create_memes(items)
+
+    assert [result.status for result in results] == ["created", "failed", "failed", "failed"]
+    assert results[0].meme.id == 10
+    assert results[1].detail == "Image upload error"
+    assert results[2].detail == "Duplicate meme_name in batch"
+    assert results[3].detail == "Meme name already exists"
+    assert mock_session_instance.execute.call_count == 1
+    released = sorted(call.args[0] for call in mock_release_image.call_args_list)
+    assert released == ["hash-c", "hash-d"]
+
+
+@pytest.mark.asyncio
+async def test_create_memes_batch_rejects_oversized_file(mock_new_session, mock_get_image_url):
+    mock_session_instance = MagicMock(spec=AsyncSession)
+    mock_new_session.return_value.__aenter__.return_value = mock_session_instance
+    mock_session_instance.execute.side_effect = [
+        MagicMock(**{"scalar_one.return_value": 1}),
+        MagicMock(),
+        [MagicMock(id=1, meme_name="Small", image_url="http://a", text="a")]
+    ]
+    mock_get_image_url.return_value = "http://a"
+
+    with patch("public_api.repository.UPLOAD_MAX_FILE_SIZE", 5), \
+            patch("public_api.repository.hash_upload", return_value="hash-a"):
+        results = await MemeRepository.create_memes([
+            (MagicMock(size=5), MemeBase(meme_name="Small", text="a")),
+            (MagicMock(size=10), MemeBase(meme_name="Big", text="b"))
+        ])
+
+    assert [result.status for result in results] == ["created", "failed"]
+    assert results[1].detail == "Image is larger than 5 bytes"
+    mock_get_image_url.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_delete_memes_bulk(mock_new_session):
+    mock_session_instance = MagicMock(spec=AsyncSession)
+    mock_new_session.return_value.__aenter__.return_value = mock_session_instance
+    mock_session_instance.execute.side_effect = [
+        MagicMock(**{"all.return_value": [(1, "hash-a"), (2, "hash-b"), (4, "hash-c")]}),
+        MagicMock(**{"all.return_value": [("hash-a", 0), ("hash-c", 2)]}),
+        MagicMock(),
+        MagicMock(),
+    ]
+
+    results = await MemeRepository.delete_memes([1, 2, 3, 4, 1])
+
+    assert [(result.id, result.status) for result in results] == [
+        (1, "deleted"), (2, "deleted"), (3, "not_found"), (4, "deleted")
+    ]
+    assert queued_deletions(mock_session_instance) == ["hash-a", "hash-b"]
+    delete_query = mock_session_instance.execute.call_args_list[0].args[0]
+    assert delete_query.compile().params["ids"] == [1, 2, 3, 4]
@@ -0,0 +1,73 @@
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from public_api.repository import MemeRepository
+from public_api.routes import router
+from public_api.settings import IMAGE_CACHE_CONTROL
+from public_api.utils import encode_cursor
+
+
+@pytest.fixture
+def client() -> TestClient:
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+@pytest.fixture
+def mock_get_memes():
+    memes = [{"id": 1, "meme_name": "a", "image_url": "http://a", "text": "t", "thumbnail_url": None}]
+    with patch.object(MemeRepository, "get_memes", AsyncMock(return_value=memes)) as mock:
+        yield mock
+
+
+def test_total_count_only_on_first_page(client, mock_get_memes):
+    with patch.object(MemeRepository, "count_memes", AsyncMock(return_value=42)) as mock_count_memes:
+        first = client.get("/memes", params={"limit": 1, "exact": True})
+        by_cursor = client.get("/memes", params={"limit": 1, "cursor": encode_cursor(1)})
+        by_offset = client.get("/memes", params={"limit": 1, "offset": 1})
+
+    assert first.headers["X-Total-Count"] == "42"
+    assert "X-Total-Count" not in by_cursor.headers
+    assert "X-Total-Count" not in by_offset.headers
+    mock_count_memes.assert_called_once_with(exact=True)
+
+
+def test_failed_count_still_returns_the_page(client, mock_get_memes):
+    failure = HTTPException(status_code=500, detail="Error counting memes")
+    with patch.object(MemeRepository, "count_memes", AsyncMock(side_effect=failure)):
+        response = client.get("/memes", params={"limit": 1})
+
+    assert response.status_code == 200
+    assert [meme["id"] for meme in response.json()] == [1]
+    assert "X-Total-Count" not in response.headers
+    assert "X-Next-Cursor" in response.headers
+
+
+@pytest.mark.parametrize("status_code, cached", [(200, True), (206, True), (304, True), (416, False), (404, False)])
+def test_image_cache_control_only_on_success(client, status_code, cached):
+    async def body(chunk_size):
+        yield b""
+
+    image = MagicMock(status_code=status_code, headers={"etag": '"abc"'}, aiter_raw=body, aclose=AsyncMock())
+    with patch.object(MemeRepository, "get_image_name", AsyncMock(return_value="hash-a")), \
+            patch.object(MemeRepository, "open_image", AsyncMock(return_value=image)) as mock_open_image:
+        response = client.get("/memes/1/image", params={"v": "hash-a"})
+
+    assert response.status_code == status_code
+    assert response.headers.get("Cache-Control") == (IMAGE_CACHE_CONTROL if cached else None)
+    assert mock_open_image.call_args.kwargs["filename"] == "hash-a"
+
+
+@pytest.mark.parametrize("params", [{}, {"v": "hash-old"}])
+def test_image_redirects_to_current_version(client, params):
+    with patch.object(MemeRepository, "get_image_name", AsyncMock(return_value="hash-a")), \
+            patch.object(MemeRepository, "open_image", AsyncMock()) as mock_open_image:
+        response = client.get("/memes/1/image", params=params, follow_redirects=False)
+
+    assert response.status_code == 307
+    assert response.headers["Location"] == "http://testserver/memes/1/image?v=hash-a"
+    assert response.headers["Cache-Control"] == "no-cache"
+    mock_open_image.assert_not_called()
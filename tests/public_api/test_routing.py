@@ -0,0 +1,134 @@
+import time
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+from public_api.cache import meme_cache
+from public_api.database.routing import (
+    Replica, ReplicaRouter, ReadYourWritesMiddleware, is_connection_error, primary_reads_until, reading_own_writes,
+    LAST_WRITE_COOKIE
+)
+from public_api.repository import MemeRepository, routed_read
+
+
+def make_router(*names: str, eject_seconds: float = 30) -> ReplicaRouter:
+    return ReplicaRouter([Replica(name, MagicMock()) for name in names], eject_seconds=eject_seconds)
+
+
+def test_router_round_robin_skips_ejected_replicas():
+    router = make_router("a", "b", "c")
+    assert [router.pick().name for _ in range(4)] == ["a", "b", "c", "a"]
+
+    with patch("public_api.database.routing.time.monotonic", return_value=100):
+        router.eject(router.replicas[1], OSError("refused"))
+    with patch("public_api.database.routing.time.monotonic", return_value=110):
+        assert [router.pick().name for _ in range(3)] == ["c", "a", "c"]
+    with patch("public_api.database.routing.time.monotonic", return_value=131):
+        assert [router.pick().name for _ in range(3)] == ["a", "b", "c"]
+
+
+def test_router_without_healthy_replicas_reads_from_primary():
+    assert make_router().pick() is None
+
+    router = make_router("a")
+    router.eject(router.replicas[0], OSError("refused"))
+    assert router.pick() is None
+
+
+def test_is_connection_error():
+    assert is_connection_error(ConnectionRefusedError())
+    assert is_connection_error(OperationalError("SELECT 1", {}, Exception("server closed the connection")))
+    assert not is_connection_error(ProgrammingError("SELECT nope", {}, Exception("relation does not exist")))
+    assert not is_connection_error(ValueError())
+
+
+@pytest.mark.asyncio
+async def test_routed_read_uses_replica():
+    router = make_router("a")
+    read = AsyncMock(return_value="rows")
+
+    with patch("public_api.repository.replica_router", router):
+        assert await routed_read(read) == "rows"
+
+    read.assert_called_once_with(router.replicas[0])
+
+
+@pytest.mark.asyncio
+async def test_routed_read_ejects_unreachable_replica_and_falls_back_to_primary():
+    router = make_router("a")
+    read = AsyncMock(side_effect=[ConnectionRefusedError(), "rows"])
+
+    with patch("public_api.repository.replica_router", router):
+        assert await routed_read(read) == "rows"
+
+    assert [call.args[0] for call in read.call_args_list] == [router.replicas[0], None]
+    assert router.pick() is None
+
+
+@pytest.mark.asyncio
+async def test_routed_read_does_not_eject_on_query_errors():
+    router = make_router("a")
+    read = AsyncMock(side_effect=ProgrammingError("SELECT nope", {}, Exception("relation does not exist")))
+
+    with patch("public_api.repository.replica_router", router):
+        with pytest.raises(ProgrammingError):
+            await routed_read(read)
+
+    read.assert_called_once()
+    assert router.pick() is router.replicas[0]
+
+
+@pytest.mark.asyncio
+async def test_own_writes_are_read_from_the_primary_past_the_cache():
+    router = make_router("a")
+    meme = {"id": 1, "meme_name": "fresh", "filename": None, "image_url": "http://stale/x", "text": "t"}
+    await meme_cache.set_meme(1, {**meme, "meme_name": "stale"})
+    fetch_meme = AsyncMock(return_value=meme)
+
+    token = primary_reads_until.set(time.time() + 5)
+    try:
+        with patch("public_api.repository.replica_router", router), \
+                patch.object(MemeRepository, "_fetch_meme", fetch_meme):
+            result = await MemeRepository.get_meme(1)
+    finally:
+        primary_reads_until.reset(token)
+
+    assert result["meme_name"] == "fresh"
+    fetch_meme.assert_called_once_with(1, None)
+
+
+def make_client(window: float) -> TestClient:
+    app = FastAPI()
+    app.add_middleware(ReadYourWritesMiddleware, window=window)
+
+    @app.post("/memes")
+    async def write() -> dict:
+        return {}
+
+    @app.get("/memes")
+    async def read() -> dict:
+        return {"primary": reading_own_writes()}
+
+    return TestClient(app)
+
+
+def test_read_your_writes_window_follows_the_clients_write():
+    client = make_client(window=5)
+
+    assert client.get("/memes").json() == {"primary": False}
+    response = client.post("/memes")
+    assert LAST_WRITE_COOKIE in response.cookies
+    assert client.get("/memes").json() == {"primary": True}
+
+    client.cookies.set(LAST_WRITE_COOKIE, str(time.time() - 10))
+    assert client.get("/memes").json() == {"primary": False}
+
+
+def test_read_your_writes_is_off_by_default():
+    client = make_client(window=0)
+
+    response = client.post("/memes")
+    assert LAST_WRITE_COOKIE not in response.cookies
+    assert client.get("/memes").json() == {"primary": False}
@@ -0,0 +1,88 @@
+import datetime
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+from sqlalchemy import Update
+from sqlalchemy.dialects.postgresql import asyncpg
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from public_api.settings import PRIVATE_SERVICE_URL
+from public_api.thumbnails import check_batch
+from public_api.utils import thumbnail_name
+
+
+def pending(*rows: tuple[str, datetime.datetime]) -> MagicMock:
+    return MagicMock(**{"all.return_value": [MagicMock(filename=filename, date_updated=date_updated)
+                                             for filename, date_updated in rows]})
+
+
+def updated(*meme_ids: int) -> MagicMock:
+    return MagicMock(**{"scalars.return_value.all.return_value": list(meme_ids)})
+
+
+@pytest.fixture
+def mock_session():
+    session = MagicMock(spec=AsyncSession)
+    with patch("public_api.thumbnails.new_session") as mock_new_session:
+        mock_new_session.return_value.__aenter__.return_value = session
+        yield session
+
+
+@pytest.fixture
+def mock_meme_cache():
+    with patch("public_api.thumbnails.meme_cache") as mock:
+        mock.invalidate_memes = AsyncMock()
+        yield mock
+
+
+@pytest.mark.asyncio
+async def test_check_batch_records_found_and_overdue(mock_session, mock_meme_cache):
+    now = datetime.datetime.utcnow()
+    mock_session.execute.side_effect = [
+        pending(("hash-a", now), ("hash-b", now - datetime.timedelta(hours=1)), ("hash-c", now)),
+        updated(1, 2),
+        updated(3)
+    ]
+    mock_presign_images = AsyncMock(return_value={thumbnail_name("hash-a"): "http://fresh/a.webp"})
+
+    with patch("public_api.thumbnails.presign_images", mock_presign_images):
+        report = await check_batch(MagicMock(), batch_size=10, pending_timeout=600)
+
+    assert report == {"checked": 3, "found": 1, "missing": 1}
+    mock_presign_images.assert_called_once()
+    assert mock_presign_images.call_args.kwargs["url"] == f"{PRIVATE_SERVICE_URL}/presign"
+    assert mock_presign_images.call_args.kwargs["filenames"] == []
+    assert mock_presign_images.call_args.kwargs["existing_only"] == [
+        thumbnail_name("hash-a"), thumbnail_name("hash-b"), thumbnail_name("hash-c")
+    ]
+
+    found, missing = [call.args[0].compile(dialect=asyncpg.dialect()) for call in mock_session.execute.call_args_list
+                      if isinstance(call.args[0], Update)]
+    assert (found.params["filenames"], found.params["has_thumbnail"]) == (["hash-a"], True)
+    assert (missing.params["filenames"], missing.params["has_thumbnail"]) == (["hash-b"], False)
+    # Not an edit, so optimistic concurrency checks against `date_updated` keep matching
+    assert "date_updated=memes.date_updated" in str(found)
+    mock_meme_cache.invalidate_memes.assert_called_once_with([1, 2, 3])
+
+
+@pytest.mark.asyncio
+async def test_check_batch_leaves_recent_misses_pending(mock_session, mock_meme_cache):
+    mock_session.execute.side_effect = [pending(("hash-a", datetime.datetime.utcnow()))]
+
+    with patch("public_api.thumbnails.presign_images", AsyncMock(return_value={})):
+        report = await check_batch(MagicMock(), batch_size=10, pending_timeout=600)
+
+    assert report == {"checked": 1, "found": 0, "missing": 0}
+    assert mock_session.execute.call_count == 1
+    mock_meme_cache.invalidate_memes.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_check_batch_nothing_pending(mock_session, mock_meme_cache):
+    mock_session.execute.side_effect = [pending()]
+    mock_presign_images = AsyncMock()
+
+    with patch("public_api.thumbnails.presign_images", mock_presign_images):
+        report = await check_batch(MagicMock())
+
+    assert report == {"checked": 0, "found": 0, "missing": 0}
+    mock_presign_images.assert_not_called()
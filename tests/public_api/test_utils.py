@@ -1,48 +1,95 @@
 import pytest
 import httpx
-import base64
-from unittest.mock import MagicMock, AsyncMock
+from unittest.mock import AsyncMock, MagicMock
 from fastapi import HTTPException
 
-from public_api.utils import get_image_url, delete_object
+from public_api.utils import (
+    create_http_client, get_image_url, delete_object, presign_images, iter_upload, encode_cursor, decode_cursor,
+    open_object, encode_search_cursor, decode_search_cursor
+)
+from public_api.settings import PRIVATE_API_MAX_CONNECTIONS, PRIVATE_API_CONNECT_TIMEOUT, PRIVATE_API_READ_TIMEOUT
+
+
+@pytest.mark.asyncio
+async def test_create_http_client():
+    client = create_http_client()
+
+    assert isinstance(client, httpx.AsyncClient)
+    assert client.timeout.connect == PRIVATE_API_CONNECT_TIMEOUT
+    assert client.timeout.read == PRIVATE_API_READ_TIMEOUT
+    assert client._transport._pool._max_connections == PRIVATE_API_MAX_CONNECTIONS
+
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_iter_upload(mock_upload_b_file):
+    chunks = [chunk async for chunk in iter_upload(mock_upload_b_file, chunk_size=4)]
+
+    assert chunks == [b"dummy_image_data"]
+    assert mock_upload_b_file.read.call_count == 2
+    mock_upload_b_file.read.assert_called_with(4)
 
 
 @pytest.mark.asyncio
 async def test_get_image_url_success(mock_upload_b_file, mock_http_client, mock_successful_response, test_file_data):
     mock_http_client.post = AsyncMock(return_value=mock_successful_response)
-    httpx.AsyncClient = MagicMock(return_value=mock_http_client)
 
     url, filename, old_filename = test_file_data
 
-    image_url = await get_image_url(url, mock_upload_b_file, filename, old_filename)
+    image_url = await get_image_url(mock_http_client, url, mock_upload_b_file, filename, old_filename)
 
     assert image_url == {"image_url": "http://example.com/image.jpg"}
-    mock_upload_b_file.read.assert_called_once()
-    mock_http_client.post.assert_called_once_with(url=url, json={
-        "image": base64.b64encode(b"dummy_image_data").decode("utf-8"),
-        "filename": filename,
-        "old_filename": old_filename
-    })
+    mock_http_client.post.assert_called_once()
+    _, kwargs = mock_http_client.post.call_args
+    assert kwargs["url"] == f"{url}/stream"
+    assert kwargs["params"] == {"filename": filename}
+    assert kwargs["headers"] == {"Content-Type": "image/jpeg", "Content-Length": "16"}
 
 
 @pytest.mark.asyncio
 async def test_get_image_url_failure(mock_upload_b_file, mock_http_client, mock_failure_response, test_file_data):
     mock_http_client.post = AsyncMock(return_value=mock_failure_response)
-    httpx.AsyncClient = MagicMock(return_value=mock_http_client)
 
     url, filename, old_filename = test_file_data
 
     with pytest.raises(HTTPException) as exc_info:
-        await get_image_url(url, mock_upload_b_file, filename, old_filename)
+        await get_image_url(mock_http_client, url, mock_upload_b_file, filename, old_filename)
 
     assert exc_info.value.status_code == 404
     assert exc_info.value.detail == "Error 404: Not Found"
-    mock_upload_b_file.read.assert_called_once()
-    mock_http_client.post.assert_called_once_with(url=url, json={
-        "image": base64.b64encode(b"dummy_image_data").decode("utf-8"),
-        "filename": filename,
-        "old_filename": old_filename
-    })
+    mock_http_client.post.assert_called_once()
+    _, kwargs = mock_http_client.post.call_args
+    assert kwargs["url"] == f"{url}/stream"
+    assert kwargs["params"] == {"filename": filename}
+    assert kwargs["headers"] == {"Content-Type": "image/jpeg", "Content-Length": "16"}
+
+
+@pytest.mark.asyncio
+async def test_get_image_url_relays_retry_after(mock_upload_b_file, mock_http_client, test_file_data):
+    response = MagicMock(status_code=429, text="Upload capacity exhausted", headers={"retry-after": "3"})
+    mock_http_client.post = AsyncMock(return_value=response)
+    url, filename, _ = test_file_data
+
+    with pytest.raises(HTTPException) as exc_info:
+        await get_image_url(mock_http_client, url, mock_upload_b_file, filename)
+
+    assert exc_info.value.status_code == 429
+    assert exc_info.value.headers == {"Retry-After": "3"}
+
+
+@pytest.mark.asyncio
+async def test_presign_images_success(mock_http_client, mock_successful_response):
+    url = "http://example.com/presign"
+    mock_successful_response.json.return_value = {"image.jpg": "http://example.com/image.jpg?sig"}
+    mock_http_client.post = AsyncMock(return_value=mock_successful_response)
+
+    result = await presign_images(mock_http_client, url, ["image.jpg"], existing_only=["derived/image.jpg.webp"])
+
+    assert result == {"image.jpg": "http://example.com/image.jpg?sig"}
+    mock_http_client.post.assert_called_once_with(
+        url=url, json={"filenames": ["image.jpg"], "existing_only": ["derived/image.jpg.webp"]}
+    )
 
 
 @pytest.mark.asyncio
@@ -50,9 +97,8 @@ async def test_delete_object_success(mock_http_client, mock_successful_response)
     url = "http://example.com/delete"
 
     mock_http_client.delete = AsyncMock(return_value=mock_successful_response)
-    httpx.AsyncClient = MagicMock(return_value=mock_http_client)
 
-    result = await delete_object(url)
+    result = await delete_object(mock_http_client, url)
 
     assert result is True
     mock_http_client.delete.assert_called_once_with(url=url)
@@ -63,11 +109,60 @@ async def test_delete_object_failure(mock_http_client, mock_failure_response):
     url = "http://example.com/delete"
 
     mock_http_client.delete = AsyncMock(return_value=mock_failure_response)
-    httpx.AsyncClient = MagicMock(return_value=mock_http_client)
 
     with pytest.raises(HTTPException) as exc_info:
-        await delete_object(url)
+        await delete_object(mock_http_client, url)
 
     assert exc_info.value.status_code == 404
     assert str(exc_info.value.detail) == "Error 404: Not Found"
     mock_http_client.delete.assert_called_once_with(url=url)
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(12345)
+
+    assert "12345" not in cursor
+    assert decode_cursor(cursor) == 12345
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", encode_cursor(1)[:-2], "eyJpZCI6ICJ4In0"])
+def test_decode_cursor_invalid(cursor):
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor(cursor)
+
+    assert exc_info.value.status_code == 400
+    assert exc_info.value.detail == "Invalid cursor"
+
+
+@pytest.mark.asyncio
+async def test_open_object_streams_partial_content():
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.headers["range"] == "bytes=0-3"
+        return httpx.Response(206, headers={"content-range": "bytes 0-3/10"}, stream=httpx.ByteStream(b"meme"))
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        response = await open_object(client, "http://private/objects/a/content", headers={"range": "bytes=0-3"})
+        body = b"".join([chunk async for chunk in response.aiter_raw()])
+        await response.aclose()
+
+    assert response.status_code == 206
+    assert body == b"meme"
+
+
+@pytest.mark.asyncio
+async def test_open_object_error():
+    transport = httpx.MockTransport(lambda request: httpx.Response(404, text="Object not found"))
+
+    async with httpx.AsyncClient(transport=transport) as client:
+        with pytest.raises(HTTPException) as exc_info:
+            await open_object(client, "http://private/objects/a/content", headers={})
+
+    assert exc_info.value.status_code == 404
+
+
+def test_search_cursor_round_trip():
+    cursor = encode_search_cursor(0.0759999975562096, 42)
+
+    assert decode_search_cursor(cursor) == (0.0759999975562096, 42)
+    with pytest.raises(HTTPException):
+        decode_search_cursor(encode_cursor(42))
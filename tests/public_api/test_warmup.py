@@ -0,0 +1,57 @@
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from public_api.settings import PRIVATE_SERVICE_URL
+from public_api.warmup import HOT_QUERIES, readiness, router, warm_up, warm_up_database
+
+
+@pytest.fixture(autouse=True)
+def reset_readiness():
+    readiness.set_not_ready("starting")
+    yield
+    readiness.set_not_ready("starting")
+
+
+def test_readyz_reports_ready_only_after_warm_up():
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app)
+
+    assert client.get("/healthz").status_code == 200
+    response = client.get("/readyz")
+    assert response.status_code == 503
+    assert response.json() == {"status": "starting"}
+
+    readiness.set_ready()
+    assert client.get("/readyz").status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_warm_up_database_runs_hot_queries_on_each_connection():
+    sessions = [MagicMock(spec=AsyncSession) for _ in range(4)]
+    mock_new_session = MagicMock(side_effect=[MagicMock(**{"__aenter__.return_value": session})
+                                              for session in sessions])
+
+    with patch("public_api.warmup.new_session", mock_new_session), \
+            patch("public_api.warmup.engine") as mock_engine:
+        mock_engine.pool.size.return_value = 3
+        await warm_up_database(connections=10)
+
+    assert mock_new_session.call_count == 3
+    for session in sessions[:3]:
+        assert [call.args[0] for call in session.execute.call_args_list] == list(HOT_QUERIES)
+    sessions[3].execute.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_warm_up_reports_ready_when_database_warm_up_fails():
+    client = MagicMock(get=AsyncMock())
+
+    with patch("public_api.warmup.warm_up_database", side_effect=Exception("connection refused")):
+        await warm_up(client)
+
+    assert readiness.ready
+    client.get.assert_called_once_with(f"{PRIVATE_SERVICE_URL}/healthz")